@@ -0,0 +1,78 @@
+"""
+Hot path benchmarks for the modules.* data layer
+Run: pytest benchmarks --bench-scales small,medium --benchmark-json benchmarks/results/current.json
+"""
+from modules import database, fees, notifications
+from modules.analytics import get_analytics_data
+from modules.export import export_to_csv
+from modules.search import search_records
+from modules.datagen import DEFAULT_PASSWORDS
+
+# ----------------------------------------------------------------------------
+# Authentication
+# ----------------------------------------------------------------------------
+
+def bench_get_user(benchmark, sample_ids):
+    benchmark(database.get_user, sample_ids['email'], DEFAULT_PASSWORDS['student'])
+
+# ----------------------------------------------------------------------------
+# Academic marks & performance
+# ----------------------------------------------------------------------------
+
+def bench_add_student_marks(benchmark, sample_ids):
+    result = benchmark(database.add_student_marks, sample_ids['student_id'], 'BENCH101',
+                       41.0, 47.0, 1, sample_ids['faculty_id'])
+    assert result
+
+def bench_update_student_performance_metrics(benchmark, sample_ids):
+    assert benchmark(database.update_student_performance_metrics, sample_ids['student_id'], 3)
+
+def bench_get_departmental_analytics(benchmark, sample_ids):
+    result = benchmark(database.get_departmental_analytics, sample_ids['department'])
+    assert result['total_students'] > 0
+
+# ----------------------------------------------------------------------------
+# Search, analytics & export
+# ----------------------------------------------------------------------------
+
+def bench_search_records(benchmark, sample_ids):
+    benchmark(search_records, sample_ids['student_id'], 'issue')
+
+def bench_get_analytics_data(benchmark, bench_db):
+    result = benchmark(get_analytics_data, days=30)
+    assert result is not None
+
+def bench_export_to_csv(benchmark, sample_ids):
+    benchmark(export_to_csv, sample_ids['student_id'])
+
+# ----------------------------------------------------------------------------
+# Notifications
+# ----------------------------------------------------------------------------
+
+def bench_get_unread_notifications(benchmark, sample_ids):
+    benchmark(notifications.get_unread_notifications, sample_ids['student_id'])
+
+def bench_get_all_notifications(benchmark, sample_ids):
+    benchmark(notifications.get_all_notifications, sample_ids['student_id'])
+
+# ----------------------------------------------------------------------------
+# Fees
+# ----------------------------------------------------------------------------
+
+def bench_get_student_fees(benchmark, sample_ids):
+    assert benchmark(database.get_student_fees, sample_ids['student_id'])
+
+def bench_update_fee_record(benchmark, sample_ids):
+    assert benchmark(database.update_fee_record, sample_ids['student_id'], 2, 60000.0, 30000.0)
+
+def bench_get_fee_summary(benchmark, sample_ids):
+    benchmark(fees.get_fee_summary, sample_ids['student_id'])
+
+def bench_get_fee_details(benchmark, sample_ids):
+    benchmark(fees.get_fee_details, sample_ids['student_id'])
+
+def bench_update_fee_payment(benchmark, sample_ids):
+    with database.get_db_connection() as conn:
+        fee_id = conn.execute('SELECT MIN(rowid) FROM fees WHERE user_id = ?',
+                              (sample_ids['student_id'],)).fetchone()[0]
+    benchmark(fees.update_fee_payment, fee_id, 1.0)
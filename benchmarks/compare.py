@@ -0,0 +1,64 @@
+"""
+Compare a pytest-benchmark JSON run against a saved baseline
+Usage: python benchmarks/compare.py benchmarks/baselines/small.json benchmarks/results/current.json --threshold 15
+Exits with status 1 when any benchmark's statistic regressed by more than the threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+def load_stats(path: str, stat: str) -> Dict[str, float]:
+    """Map benchmark fullname -> chosen statistic (seconds)"""
+    with open(path) as f:
+        data = json.load(f)
+    return {b['fullname']: b['stats'][stat] for b in data.get('benchmarks', [])}
+
+def compare(baseline: Dict[str, float], current: Dict[str, float],
+            threshold: float) -> Tuple[List[Tuple], List[str]]:
+    """Return (rows, regressions); rows are (name, base, current, change%)"""
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline) | set(current)):
+        base = baseline.get(name)
+        now = current.get(name)
+        if base is None or now is None:
+            rows.append((name, base, now, None))
+            continue
+        change = (now - base) / base * 100 if base else 0.0
+        rows.append((name, base, now, change))
+        if change > threshold:
+            regressions.append(name)
+    return rows, regressions
+
+def _fmt(seconds) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.3f} ms"
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Fail when hot paths regress against a baseline")
+    parser.add_argument("baseline", help="Baseline JSON written by --benchmark-json")
+    parser.add_argument("current", help="Current JSON written by --benchmark-json")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Allowed slowdown in percent before failing (default: 10)")
+    parser.add_argument("--stat", default="median", choices=["min", "median", "mean", "max"],
+                        help="Statistic to compare (default: median)")
+    args = parser.parse_args(argv)
+
+    rows, regressions = compare(load_stats(args.baseline, args.stat),
+                                load_stats(args.current, args.stat), args.threshold)
+
+    width = max([len(r[0]) for r in rows] + [9])
+    print(f"{'benchmark':<{width}}  {'baseline':>12}  {'current':>12}  {'change':>8}")
+    for name, base, now, change in rows:
+        flag = "  REGRESSED" if name in regressions else ""
+        pct = "new/gone" if change is None else f"{change:+.1f}%"
+        print(f"{name:<{width}}  {_fmt(base):>12}  {_fmt(now):>12}  {pct:>8}{flag}")
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} hot path(s) regressed more than {args.threshold:.0f}% ({args.stat})")
+        return 1
+    print(f"\n✅ No regressions above {args.threshold:.0f}% ({args.stat})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Benchmark fixtures: generated databases at small, medium and large scale
+"""
+import functools
+import glob
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+BENCH_DIR = os.path.join(ROOT, 'data', 'bench')
+BENCH_SEED = 42
+
+def pytest_addoption(parser):
+    parser.addoption("--bench-scales", default="small",
+                     help="Comma-separated dataset scales to benchmark: small,medium,large")
+
+def pytest_generate_tests(metafunc):
+    if "bench_db" in metafunc.fixturenames:
+        scales = [s.strip() for s in metafunc.config.getoption("--bench-scales").split(",") if s.strip()]
+        metafunc.parametrize("bench_db", scales, indirect=True, scope="session")
+
+@functools.lru_cache(maxsize=None)
+def _template_version() -> str:
+    """Hash of the current schema (as every init function creates it) and of datagen.py.
+
+    Part of each template's file name, so a template generated before a schema or
+    generator change is never reused.
+    """
+    from modules import database, datagen
+
+    digest = hashlib.sha256()
+    with open(datagen.__file__, 'rb') as f:
+        digest.update(f.read())
+    previous = database.DATABASE_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_PATH = os.path.join(tmp, 'schema.db')
+        try:
+            datagen.init_all_tables()
+            with database.get_db_connection() as conn:
+                for row in conn.execute("""
+                    SELECT type, name, COALESCE(sql, '') FROM sqlite_master ORDER BY type, name
+                """):
+                    digest.update('\0'.join(row).encode())
+        finally:
+            database.DATABASE_PATH = previous
+    return digest.hexdigest()[:12]
+
+def _pristine_database(scale: str) -> str:
+    """Generate (or reuse) the read-only template database for a scale"""
+    from modules import database
+    from modules.datagen import generate_scale
+
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    as_of = date.today()
+    path = os.path.join(BENCH_DIR, f'{scale}-{BENCH_SEED}-{as_of.isoformat()}-{_template_version()}.db')
+    if not os.path.exists(path):
+        for stale in glob.glob(os.path.join(BENCH_DIR, f'{scale}-{BENCH_SEED}-*.db')):
+            os.remove(stale)
+        previous = database.DATABASE_PATH
+        database.DATABASE_PATH = path + '.tmp'
+        try:
+            generate_scale(scale, seed=BENCH_SEED, as_of=as_of, reset=True)
+        finally:
+            database.DATABASE_PATH = previous
+        os.replace(path + '.tmp', path)
+    return path
+
+@pytest.fixture(scope="session")
+def bench_db(request):
+    """Point modules.database at a fresh working copy of the scale's database"""
+    from modules import database
+
+    scale = request.param
+    working = os.path.join(BENCH_DIR, f'{scale}-working.db')
+    shutil.copyfile(_pristine_database(scale), working)
+
+    previous = database.DATABASE_PATH
+    database.DATABASE_PATH = working
+    yield scale
+    database.DATABASE_PATH = previous
+
+@pytest.fixture(scope="session")
+def sample_ids(bench_db):
+    """A handful of real ids from the generated data to drive the hot paths"""
+    from modules.database import get_db_connection
+
+    with get_db_connection() as conn:
+        student = conn.execute('''
+            SELECT u.user_id, u.email, sp.department FROM users u
+            JOIN student_profiles sp ON sp.user_id = u.user_id
+            WHERE u.role = 'student' ORDER BY u.user_id LIMIT 1 OFFSET 17
+        ''').fetchone()
+        faculty = conn.execute("SELECT user_id FROM users WHERE role = 'faculty' LIMIT 1").fetchone()
+    return {
+        'student_id': student['user_id'],
+        'email': student['email'],
+        'department': student['department'],
+        'faculty_id': faculty['user_id'],
+    }
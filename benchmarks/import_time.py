@@ -0,0 +1,107 @@
+"""
+Cold-start benchmark for the login screen
+Runs app.py as __main__ under `python -X importtime` in fresh interpreters
+(bare mode renders the unauthenticated login page, as `streamlit run` would)
+and reports wall time, total import time and the heaviest imports, so
+lazy-import regressions show up as numbers. Exits non-zero if the login page
+loads a heavy library that `import streamlit` does not already load.
+
+Usage: python benchmarks/import_time.py --repeat 5 --json benchmarks/results/import_time.json
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# "import time: self [us] | cumulative | imported package"
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+HEAVY_MODULES = ('pandas', 'numpy', 'plotly', 'pyarrow')
+
+def parse_importtime(stderr: str) -> dict:
+    """Total import time, cumulative time per module and which heavy libraries were loaded"""
+    total = 0
+    modules = {}
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, module = match.groups()
+        if len(indent) == 1:
+            total += int(cumulative)
+        modules[module] = max(modules.get(module, 0), int(cumulative))
+    loaded = {m.split('.')[0] for m in modules if m.split('.')[0] in HEAVY_MODULES}
+    return {'total_us': total, 'modules_us': modules, 'heavy_loaded': sorted(loaded)}
+
+def run_once(statement: str, db_path: str) -> dict:
+    """One cold interpreter; returns wall seconds and the parsed import profile"""
+    env = dict(os.environ, ERP_DATABASE_PATH=db_path)
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise SystemExit(f"{statement!r} failed:\n{proc.stderr[-2000:]}")
+    profile = parse_importtime(proc.stderr)
+    profile['wall_s'] = wall
+    return profile
+
+def measure(statement: str, repeat: int, db_path: str) -> dict:
+    """Median over fresh interpreters, after one warm-up run"""
+    run_once(statement, db_path)  # warm the bytecode and OS file caches
+    runs = [run_once(statement, db_path) for _ in range(repeat)]
+    heaviest = sorted(runs[-1]['modules_us'].items(), key=lambda kv: kv[1], reverse=True)
+    return {
+        'statement': statement,
+        'wall_ms': round(statistics.median(r['wall_s'] for r in runs) * 1000, 1),
+        'import_ms': round(statistics.median(r['total_us'] for r in runs) / 1000, 1),
+        'heavy_loaded': runs[-1]['heavy_loaded'],
+        'top_imports_ms': {name: round(us / 1000, 1) for name, us in heaviest[:12]},
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure login-page cold start with python -X importtime")
+    parser.add_argument("--repeat", type=int, default=5, help="Cold interpreters per statement (median reported)")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    statements = {
+        'python': 'pass',
+        'streamlit': 'import streamlit',
+        # Run as __main__ so main() and pages.auth_page execute too
+        'login page': "import runpy; runpy.run_path('app.py', run_name='__main__')",
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'cold_start.db')
+        results = {label: measure(stmt, args.repeat, db_path) for label, stmt in statements.items()}
+
+    print(f"\n{'target':<12} {'wall ms':>9} {'import ms':>10}  heavy libraries")
+    for label, r in results.items():
+        print(f"{label:<12} {r['wall_ms']:>9.1f} {r['import_ms']:>10.1f}  {', '.join(r['heavy_loaded']) or '-'}")
+    app_only = results['login page']['wall_ms'] - results['streamlit']['wall_ms']
+    print(f"\nlogin page cost on top of streamlit: {app_only:.1f} ms")
+    print("heaviest imports for the login page (cumulative):")
+    for name, ms in results['login page']['top_imports_ms'].items():
+        print(f"  {name:<40} {ms:>8.1f} ms")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+    # streamlit itself pulls in a small plotly stub; anything beyond it is a regression
+    extra = sorted(set(results['login page']['heavy_loaded']) - set(results['streamlit']['heavy_loaded']))
+    if extra:
+        raise SystemExit(f"login page loads {', '.join(extra)}; import them inside the functions that use them")
+
+if __name__ == "__main__":
+    main()
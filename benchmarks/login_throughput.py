@@ -0,0 +1,116 @@
+"""
+Login throughput benchmark for the password service
+Seeds a throwaway database with users hashed at the target KDF cost, then
+fires concurrent database.get_user calls (one thread per simulated session)
+for each KDF pool size and reports logins/sec and latency percentiles, so the
+pool can be sized for a login storm.
+
+Usage: python benchmarks/login_throughput.py --workers 1,2,4 --sessions 32 --logins 200
+       python benchmarks/login_throughput.py --kdf pbkdf2_sha256 --legacy --json benchmarks/results/logins.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+PASSWORD = 'student123'
+
+def seed_users(db_path: str, users: int, legacy: bool) -> list:
+    """Create users sharing one password hash; legacy=True stores unsalted SHA-256"""
+    from modules import database, passwords
+
+    database.DATABASE_PATH = db_path
+    database.init_database()
+    stored = passwords.legacy_hash(PASSWORD) if legacy else passwords.hash_password(PASSWORD)
+    emails = [f'student{i}@example.com' for i in range(1, users + 1)]
+    with database.get_db_connection() as conn:
+        conn.executemany('''
+            INSERT INTO users (email, password, full_name, role) VALUES (?, ?, ?, 'student')
+        ''', [(email, stored, f'Student {i}') for i, email in enumerate(emails, start=1)])
+        conn.commit()
+    return emails
+
+def run_storm(emails: list, logins: int, sessions: int) -> dict:
+    """logins get_user calls spread over sessions concurrent threads"""
+    from modules import database
+
+    def login(i):
+        started = time.perf_counter()
+        user = database.get_user(emails[i % len(emails)], PASSWORD)
+        return time.perf_counter() - started, user is not None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as clients:
+        results = list(clients.map(login, range(logins)))
+    wall = time.perf_counter() - started
+    database.last_logins.flush()  # before the temporary database goes away
+
+    latencies = sorted(seconds for seconds, _ in results)
+    return {
+        'logins': logins,
+        'succeeded': sum(ok for _, ok in results),
+        'logins_per_sec': round(logins / wall, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        'max_ms': round(latencies[-1] * 1000, 1),
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure logins/sec through the KDF thread pool")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated KDF pool sizes to try")
+    parser.add_argument("--sessions", type=int, default=32, help="Concurrent login threads")
+    parser.add_argument("--logins", type=int, default=200, help="Logins per pool size")
+    parser.add_argument("--users", type=int, default=500, help="Distinct seeded accounts")
+    parser.add_argument("--kdf", choices=['scrypt', 'pbkdf2_sha256'], help="Override ERP_KDF")
+    parser.add_argument("--scrypt-n", type=int, help="Override ERP_SCRYPT_N")
+    parser.add_argument("--pbkdf2-iterations", type=int, help="Override ERP_PBKDF2_ITERATIONS")
+    parser.add_argument("--legacy", action="store_true",
+                        help="Seed SHA-256 hashes so every login also pays for the rehash")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    # The password service reads its cost settings at import time
+    if args.kdf:
+        os.environ['ERP_KDF'] = args.kdf
+    if args.scrypt_n:
+        os.environ['ERP_SCRYPT_N'] = str(args.scrypt_n)
+    if args.pbkdf2_iterations:
+        os.environ['ERP_PBKDF2_ITERATIONS'] = str(args.pbkdf2_iterations)
+    from modules import passwords
+
+    cost = (f"scrypt n={passwords.SCRYPT_N} r={passwords.SCRYPT_R} p={passwords.SCRYPT_P}"
+            if passwords.KDF == 'scrypt' else f"pbkdf2_sha256 iterations={passwords.PBKDF2_ITERATIONS}")
+    print(f"KDF: {cost}; {os.cpu_count()} CPUs; {args.sessions} concurrent sessions"
+          f"{'; legacy hashes (verify + rehash)' if args.legacy else ''}")
+
+    results = {'kdf': cost, 'cpus': os.cpu_count(), 'sessions': args.sessions, 'legacy': args.legacy, 'runs': {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in [int(w) for w in args.workers.split(',')]:
+            # Fresh accounts per run so legacy rehashes are not already done
+            emails = seed_users(os.path.join(tmp, f'logins_{workers}.db'), args.users, args.legacy)
+            passwords.configure(workers=workers, max_pending=max(args.sessions, workers))
+            results['runs'][workers] = run_storm(emails, args.logins, args.sessions)
+
+    print(f"\n{'pool':>5} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  ok")
+    for workers, r in results['runs'].items():
+        print(f"{workers:>5} {r['logins_per_sec']:>9.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['max_ms']:>8.1f}  {r['succeeded']}/{r['logins']}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+if __name__ == "__main__":
+    main()
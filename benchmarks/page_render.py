@@ -0,0 +1,123 @@
+"""
+Headless page-render benchmark for app.py using Streamlit's AppTest
+Logs in as seeded users, reruns every sidebar page and records wall time,
+SQL statement count (from modules.querystats) and peak Python memory per page.
+
+Usage: python benchmarks/page_render.py --scale medium --repeat 3 --json benchmarks/results/pages.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+APP_PATH = os.path.join(ROOT, 'app.py')
+NAV_KEYS = {'student': 'student_nav', 'admin': 'admin_nav'}
+USERS = {'student': 'student1@example.com', 'admin': 'admin@example.com'}
+
+def _login_state(email: str) -> dict:
+    """Session state auth.login would set for a seeded user"""
+    from modules.database import get_db_connection
+
+    with get_db_connection() as conn:
+        user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+    if not user:
+        raise SystemExit(f"Seeded user {email} not found; generate data first")
+    return {
+        'user_id': user['user_id'],
+        'user_email': user['email'],
+        'user_role': user['role'],
+        'user_name': user['full_name'],
+        'logged_in': True,
+    }
+
+def measure_role(role: str, repeat: int, timeout: float) -> list:
+    """Rerun every sidebar page for one role and collect per-page measurements"""
+    from streamlit.testing.v1 import AppTest
+    from modules import querystats
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    for key, value in _login_state(USERS[role]).items():
+        at.session_state[key] = value
+    at.run()
+
+    results = []
+    for label in at.sidebar.radio(key=NAV_KEYS[role]).options:
+        at.sidebar.radio(key=NAV_KEYS[role]).set_value(label)
+        timings = []
+        queries = []
+        suspects = set()
+        for _ in range(repeat):
+            started = time.perf_counter()
+            at.run()
+            timings.append(time.perf_counter() - started)
+            rerun = querystats.recent_reruns()[0]
+            queries.append(rerun['queries'])
+            suspects.update(hit['sql'] for hit in rerun['n_plus_one'])
+
+        # Separate pass so tracemalloc overhead doesn't distort wall time
+        tracemalloc.start()
+        at.run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        results.append({
+            'role': role,
+            'page': label.split(' ', 1)[-1],
+            'wall_ms': round(statistics.median(timings) * 1000, 2),
+            'queries': int(statistics.median(queries)),
+            'peak_kb': round(peak / 1024, 1),
+            'n_plus_one': sorted(suspects),
+            'errors': [e.message for e in at.exception],
+        })
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark full reruns of every portal page")
+    parser.add_argument("--scale", choices=["small", "medium", "large"], default="small",
+                        help="Generated dataset scale (ignored with --db)")
+    parser.add_argument("--db", help="Use an existing database instead of generating one")
+    parser.add_argument("--roles", default="student,admin", help="Comma-separated roles to measure")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed reruns per page (median reported)")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-rerun timeout in seconds")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from modules import database, querystats
+    from modules.datagen import generate_scale
+
+    if args.db:
+        database.DATABASE_PATH = os.path.abspath(args.db)
+    else:
+        database.DATABASE_PATH = os.path.join(ROOT, 'data', 'bench', f'pages-{args.scale}.db')
+        os.makedirs(os.path.dirname(database.DATABASE_PATH), exist_ok=True)
+        print(f"Generating {args.scale} dataset...")
+        generate_scale(args.scale)
+
+    querystats.enable()
+    results = []
+    for role in [r.strip() for r in args.roles.split(',') if r.strip()]:
+        results.extend(measure_role(role, args.repeat, args.timeout))
+
+    print(f"\n{'role':<8} {'page':<16} {'wall ms':>10} {'queries':>8} {'peak KB':>10}")
+    for r in results:
+        flag = ("  (error)" if r['errors'] else "") + ("  (N+1)" if r['n_plus_one'] else "")
+        print(f"{r['role']:<8} {r['page']:<16} {r['wall_ms']:>10.1f} {r['queries']:>8} {r['peak_kb']:>10.1f}{flag}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'database': database.DATABASE_PATH, 'pages': results}, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+if __name__ == "__main__":
+    main()
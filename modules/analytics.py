@@ -4,9 +4,13 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from modules.database import get_db_connection
+from modules.charts import cache_figure, downsample_timeline
+from modules import snapshot
 
 def get_analytics_data(user_id=None, days=30):
     """Get analytics data for dashboard"""
+    if snapshot.is_enabled():
+        return snapshot.analytics_data(days)
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -45,16 +49,19 @@ def get_analytics_data(user_id=None, days=30):
         st.error(f"Error fetching analytics: {str(e)}")
         return None
 
-def create_request_trend_chart(data):
+@cache_figure
+def create_request_trend_chart(data, days=30):
     """Create request trend chart"""
     if data.empty:
         return None
+    data = downsample_timeline(data, x='date', y='count', group='status')
     fig = px.line(data, x='date', y='count', color='status', 
-                  title='Service Requests Trend (Last 30 Days)',
+                  title=f'Service Requests Trend (Last {days} Days)',
                   markers=True, line_shape='spline')
     fig.update_layout(hovermode='x unified', height=400)
     return fig
 
+@cache_figure
 def create_ticket_distribution_chart(data):
     """Create ticket distribution chart"""
     if data.empty:
@@ -65,6 +72,7 @@ def create_ticket_distribution_chart(data):
     fig.update_layout(height=400)
     return fig
 
+@cache_figure
 def create_status_pie_chart(data):
     """Create status distribution pie chart"""
     if data.empty:
@@ -87,7 +95,7 @@ def show_advanced_analytics():
     if analytics_data:
         # Request trends
         st.subheader("Request Trends")
-        trend_chart = create_request_trend_chart(analytics_data['requests_trend'])
+        trend_chart = create_request_trend_chart(analytics_data['requests_trend'], days=days)
         if trend_chart:
             st.plotly_chart(trend_chart, use_container_width=True)
         
@@ -0,0 +1,250 @@
+"""
+Ticket and Request Assignment
+Routes new tickets and service requests to faculty or admin staff by category,
+picking the least-loaded staff member of the eligible roles.
+
+Open items per assignee are counted from workflow_state once per process (and
+again if the database path changes) and then kept in memory, updated on every
+assignment, reassignment, status change and (de)activation. Each role has a min-heap of (open items,
+user_id). An entry is stale once the assignee's count has moved on and is
+skipped when it reaches the top, so a pick is O(log n) amortised.
+"""
+
+import heapq
+import threading
+from typing import Dict, List, Optional
+
+from modules import database, metrics
+from modules.workflow import init_workflow_table, record_workflow_event
+
+STAFF_ROLES = ('faculty', 'admin')
+
+# Categories handled by one role; everything else goes to whoever is least loaded
+CATEGORY_ROUTES = {
+    'Academic': ('faculty',),
+    'Academic Query': ('faculty',),
+    'Exam': ('faculty',),
+    'Admission': ('admin',),
+    'Fee Related': ('admin',),
+    'Hostel': ('admin',),
+}
+DEFAULT_ROUTE = STAFF_ROLES
+
+# Statuses that count towards an assignee's open items
+OPEN_STATUSES = {
+    'request': ('Submitted', 'In Progress'),
+    'ticket': ('Open', 'In Progress'),
+}
+
+def _open_items(conn, user_id: Optional[int] = None) -> Dict[int, int]:
+    """Open requests and tickets per assignee (or for one assignee) from workflow_state"""
+    rows = conn.execute(f'''
+        SELECT ws.assigned_to, COUNT(*) AS open_items
+        FROM workflow_state ws
+        LEFT JOIN service_requests r ON ws.entity_type = 'request' AND r.request_id = ws.entity_id
+        LEFT JOIN tickets t ON ws.entity_type = 'ticket' AND t.ticket_id = ws.entity_id
+        WHERE ws.assigned_to IS NOT NULL {'AND ws.assigned_to = ?' if user_id is not None else ''}
+          AND (r.status IN ({','.join('?' * len(OPEN_STATUSES['request']))})
+               OR t.status IN ({','.join('?' * len(OPEN_STATUSES['ticket']))}))
+        GROUP BY ws.assigned_to
+    ''', ((user_id,) if user_id is not None else ()) + OPEN_STATUSES['request'] + OPEN_STATUSES['ticket'])
+    return {row['assigned_to']: row['open_items'] for row in rows}
+
+def _is_open(conn, entity_type: str, entity_id: int) -> bool:
+    table, key = ('service_requests', 'request_id') if entity_type == 'request' else ('tickets', 'ticket_id')
+    row = conn.execute(f'SELECT status FROM {table} WHERE {key} = ?', (entity_id,)).fetchone()
+    return bool(row) and row['status'] in OPEN_STATUSES[entity_type]
+
+class AssignmentQueue:
+    """Per-role min-heaps of staff keyed on their current open items"""
+
+    def __init__(self):
+        self._counts: Dict[int, int] = {}
+        self._roles: Dict[int, str] = {}
+        self._heaps: Dict[str, List[tuple]] = {role: [] for role in STAFF_ROLES}
+        self._lock = threading.RLock()
+
+    def rebuild(self, conn):
+        """Reload active staff and their open items from SQL"""
+        staff = conn.execute(f'''
+            SELECT user_id, role FROM users
+            WHERE role IN ({','.join('?' * len(STAFF_ROLES))}) AND is_active = 1
+        ''', STAFF_ROLES).fetchall()
+        counts = _open_items(conn)
+
+        with self._lock:
+            self._roles = {row['user_id']: row['role'] for row in staff}
+            self._counts = {user_id: counts.get(user_id, 0) for user_id in self._roles}
+            self._compact()
+            for user_id in self._roles:
+                self._publish(user_id)
+
+    def _compact(self):
+        """Rebuild every heap from the current counts, dropping stale entries"""
+        self._heaps = {role: [] for role in STAFF_ROLES}
+        for user_id, role in self._roles.items():
+            self._heaps[role].append((self._counts[user_id], user_id))
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+
+    def _publish(self, user_id: int):
+        metrics.ASSIGNEE_OPEN_ITEMS.set(self._counts[user_id], assignee=user_id, role=self._roles[user_id])
+
+    def _top(self, role: str) -> Optional[tuple]:
+        heap = self._heaps.get(role, [])
+        while heap and heap[0][0] != self._counts.get(heap[0][1]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def adjust(self, user_id: int, delta: int):
+        """Change an assignee's open items and queue their new position"""
+        with self._lock:
+            if user_id not in self._counts:
+                return
+            self._counts[user_id] = max(0, self._counts[user_id] + delta)
+            heap = self._heaps[self._roles[user_id]]
+            heapq.heappush(heap, (self._counts[user_id], user_id))
+            if len(heap) > 2 * len(self._counts) + 64:
+                self._compact()
+            self._publish(user_id)
+
+    def pick(self, category: str) -> Optional[int]:
+        """Least-loaded staff member for the category; their count is taken immediately"""
+        with self._lock:
+            candidates = [top for top in (self._top(role) for role in CATEGORY_ROUTES.get(category, DEFAULT_ROUTE))
+                          if top is not None]
+            if not candidates:
+                return None
+            _, user_id = min(candidates)
+            self.adjust(user_id, 1)
+            return user_id
+
+    def add_staff(self, user_id: int, role: str, open_items: int = 0):
+        """Make a new (or reactivated) staff member available for picks"""
+        with self._lock:
+            if role not in self._heaps or user_id in self._counts:
+                return
+            self._roles[user_id] = role
+            self._counts[user_id] = open_items
+            heapq.heappush(self._heaps[role], (open_items, user_id))
+            self._publish(user_id)
+
+    def remove_staff(self, user_id: int):
+        """Stop picking a deactivated staff member; their heap entries go stale and are skipped"""
+        with self._lock:
+            if self._counts.pop(user_id, None) is None:
+                return
+            role = self._roles.pop(user_id)
+            metrics.ASSIGNEE_OPEN_ITEMS.set(0, assignee=user_id, role=role)
+
+    def depths(self) -> Dict[int, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def assign(self, conn, entity_type: str, entity_id: int, category: str) -> Optional[int]:
+        """Pick an assignee for a new item and log it in the workflow on conn; the caller commits"""
+        user_id = self.pick(category)
+        if user_id is None:
+            return None
+        record_workflow_event(conn, entity_id if entity_type == 'request' else None,
+                              entity_id if entity_type == 'ticket' else None,
+                              stage='Received', progress=0, notes='Auto-assigned', assigned_to=user_id)
+        return user_id
+
+    def release(self, user_id: Optional[int]):
+        """Give back a pick whose transaction did not commit"""
+        if user_id is not None:
+            self.adjust(user_id, -1)
+
+    def status_changed(self, conn, entity_type: str, entity_id: int, old_status: str, new_status: str):
+        """Move the assignee's open count when an item closes or reopens"""
+        was_open = old_status in OPEN_STATUSES[entity_type]
+        is_open = new_status in OPEN_STATUSES[entity_type]
+        if was_open == is_open:
+            return
+        row = conn.execute('''
+            SELECT assigned_to FROM workflow_state WHERE entity_type = ? AND entity_id = ?
+        ''', (entity_type, entity_id)).fetchone()
+        if row and row['assigned_to'] is not None:
+            self.adjust(row['assigned_to'], 1 if is_open else -1)
+
+    def reassigned(self, conn, entity_type: str, entity_id: int, old_assignee: Optional[int],
+                   new_assignee: Optional[int]):
+        """Move an open item's count from its old assignee to the new one"""
+        if old_assignee == new_assignee or not _is_open(conn, entity_type, entity_id):
+            return
+        if old_assignee is not None:
+            self.adjust(old_assignee, -1)
+        if new_assignee is not None:
+            self.adjust(new_assignee, 1)
+
+_queue: Optional[AssignmentQueue] = None
+_queue_path = None
+_queue_lock = threading.Lock()
+
+def get_queue() -> AssignmentQueue:
+    """Process-wide queue, built from SQL on first use.
+
+    Call it before opening a write transaction: building it creates the
+    workflow tables on a separate connection.
+    """
+    global _queue, _queue_path
+    with _queue_lock:
+        if _queue is None or _queue_path != database.DATABASE_PATH:
+            queue = AssignmentQueue()
+            try:
+                init_workflow_table()
+                with database.get_db_connection() as conn:
+                    queue.rebuild(conn)
+            except Exception as e:
+                # An empty queue assigns nobody; the next call retries
+                print(f"Error building assignment queue: {e}")
+                return queue
+            _queue, _queue_path = queue, database.DATABASE_PATH
+        return _queue
+
+def _built() -> Optional[AssignmentQueue]:
+    """The queue if it is already built for the current database; otherwise it will read SQL"""
+    return _queue if _queue is not None and _queue_path == database.DATABASE_PATH else None
+
+def staff_added(user_id: int, role: str):
+    """Register a new faculty/admin account with the queue if it is already built"""
+    queue = _built()
+    if queue is not None:
+        queue.add_staff(user_id, role)
+
+def staff_deactivated(user_id: int):
+    """Take a deactivated account out of the queue if it is already built"""
+    queue = _built()
+    if queue is not None:
+        queue.remove_staff(user_id)
+
+def item_reassigned(conn, entity_type: str, entity_id: int, old_assignee: Optional[int],
+                    new_assignee: Optional[int]):
+    """Move the open count of a reassigned item if the queue is already built"""
+    queue = _built()
+    if queue is not None:
+        queue.reassigned(conn, entity_type, entity_id, old_assignee, new_assignee)
+
+def staff_reactivated(conn, user_id: int, role: str):
+    """Put a reactivated account back in the queue, with the open items it still holds"""
+    queue = _built()
+    if queue is not None:
+        queue.add_staff(user_id, role, _open_items(conn, user_id).get(user_id, 0))
+
+def get_queue_depths() -> List[Dict]:
+    """Open items per staff member, busiest first"""
+    depths = get_queue().depths()
+    if not depths:
+        return []
+    try:
+        with database.get_db_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT user_id, full_name, role FROM users WHERE user_id IN ({','.join('?' * len(depths))})
+            ''', list(depths)).fetchall()
+    except Exception as e:
+        print(f"Error getting queue depths: {e}")
+        return []
+    return sorted(({'user_id': row['user_id'], 'name': row['full_name'], 'role': row['role'],
+                    'open_items': depths[row['user_id']]} for row in rows),
+                  key=lambda item: (-item['open_items'], item['user_id']))
@@ -1,7 +1,24 @@
+import json
+import os
+import time
 import streamlit as st
 from modules.database import get_user, add_user
+from modules import metrics, sessions, throttle
 from datetime import datetime
 
+# HttpOnly cookie carrying the signed session token, so a reload or another
+# worker process behind the proxy restores the login. It is set and cleared by
+# the routes in modules.auth_routes, which server.py mounts next to the app.
+SESSION_COOKIE = 'erp_session'
+SESSION_ROUTE = '/erp/session'
+LOGOUT_ROUTE = '/erp/logout'
+
+# Older builds put the token in this query parameter; it is stripped, never used
+LEGACY_SESSION_PARAM = 'session'
+
+# Take the client address from X-Forwarded-For (only behind a proxy that sets it)
+TRUST_PROXY = os.environ.get('ERP_TRUST_PROXY', '0') == '1'
+
 def initialize_session():
     """Initialize session state variables"""
     if 'user_id' not in st.session_state:
@@ -14,25 +31,90 @@ def initialize_session():
         st.session_state.user_name = None
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
+    if 'session_token' not in st.session_state:
+        st.session_state.session_token = None
+
+    if LEGACY_SESSION_PARAM in st.query_params:
+        del st.query_params[LEGACY_SESSION_PARAM]
+
+    # Login and logout hand over to the cookie routes on the next rerun
+    redirect = st.session_state.pop('auth_redirect', None)
+    if redirect:
+        st.html(_navigation_script(*redirect), unsafe_allow_javascript=True)
+
+    # A new browser session (reload, or a different worker process): restore from the store
+    if not st.session_state.logged_in and cookies_enabled():
+        token = st.context.cookies.get(SESSION_COOKIE)
+        if token:
+            user = sessions.resolve(token)
+            if user:
+                _set_user(user, token)
+
+def _navigation_script(method: str, url: str) -> str:
+    """Script that sends the browser to url (logout is a POST, so a link or <img> cannot do it)"""
+    if method == 'POST':
+        return (f"<script>const form = document.createElement('form'); form.method = 'post';"
+                f" form.action = {json.dumps(url)}; document.body.appendChild(form); form.submit();</script>")
+    return f"<script>window.location.replace({json.dumps(url)})</script>"
+
+def cookies_enabled() -> bool:
+    """True when the cookie routes are mounted (the app was started from server.py)"""
+    return os.environ.get('ERP_SESSION_COOKIES', '0') == '1'
+
+def _set_user(user: dict, token: str = None):
+    st.session_state.user_id = user['user_id']
+    st.session_state.user_email = user['email']
+    st.session_state.user_role = user['role']
+    st.session_state.user_name = user['full_name']
+    st.session_state.session_token = token
+    st.session_state.logged_in = True
+
+def client_ip() -> str:
+    """Address of the browser, or the first X-Forwarded-For hop behind a trusted proxy"""
+    if TRUST_PROXY:
+        forwarded = st.context.headers.get('X-Forwarded-For')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return st.context.ip_address
 
 def login(email: str, password: str) -> bool:
-    """Authenticate user"""
+    """Authenticate user; raises throttle.LoginThrottled when rate limited"""
+    ip = client_ip()
+    try:
+        delay = throttle.check(ip, email)
+    except throttle.LoginThrottled:
+        metrics.LOGINS.inc(result='throttled')
+        raise
+    if delay:
+        time.sleep(delay)
     user = get_user(email, password)
+    metrics.LOGINS.inc(result='success' if user else 'failure')
     if user:
-        st.session_state.user_id = user['user_id']
-        st.session_state.user_email = user['email']
-        st.session_state.user_role = user['role']
-        st.session_state.user_name = user['full_name']
-        st.session_state.logged_in = True
+        throttle.record_success(email, ip)
+        token = sessions.create_session(user)
+        _set_user(user, token)
+        if token and cookies_enabled():
+            # The token itself never goes in a URL, only a single-use code for it
+            code = sessions.create_handoff(token)
+            if code:
+                st.session_state.auth_redirect = ('GET', f"{SESSION_ROUTE}?code={code}")
         return True
+    throttle.record_failure(email, ip)
     return False
 
 def logout():
     """Logout user"""
+    token = st.session_state.get('session_token')
+    # The logout route only clears the cookie for a code minted here for its session
+    code = sessions.create_handoff(token) if token and cookies_enabled() else None
+    sessions.revoke(token)
+    if code:
+        st.session_state.auth_redirect = ('POST', f"{LOGOUT_ROUTE}?code={code}")
     st.session_state.user_id = None
     st.session_state.user_email = None
     st.session_state.user_role = None
     st.session_state.user_name = None
+    st.session_state.session_token = None
     st.session_state.logged_in = False
 
 def register(email: str, password: str, full_name: str, role: str) -> bool:
@@ -40,8 +122,14 @@ def register(email: str, password: str, full_name: str, role: str) -> bool:
     return add_user(email, password, full_name, role)
 
 def is_authenticated() -> bool:
-    """Check if user is logged in"""
-    return st.session_state.get('logged_in', False)
+    """Check if user is logged in and their session has not been revoked or expired"""
+    if not st.session_state.get('logged_in', False):
+        return False
+    token = st.session_state.get('session_token')
+    if token and sessions.resolve(token) is None:
+        logout()
+        return False
+    return True
 
 def get_current_user() -> dict:
     """Get current logged in user info"""
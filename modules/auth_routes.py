@@ -0,0 +1,52 @@
+"""
+Session Cookie Routes
+HTTP endpoints that server.py mounts next to the Streamlit app. A Streamlit
+script cannot set response headers, so after a password login the page is
+sent to SESSION_ROUTE with a single-use handoff code. The route trades the
+code for the session token and stores it in an HttpOnly, SameSite=Strict
+cookie (Secure over HTTPS). The token therefore never appears in a URL,
+browser history, a Referer header or an access log, and page scripts cannot
+read it.
+
+LOGOUT_ROUTE only accepts a POST carrying a handoff code that auth.logout
+minted for the session in the cookie. It revokes the session and clears the
+cookie. Any other request (an <img> or link on another site, a replayed or
+foreign code) is redirected without touching the cookie.
+"""
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import RedirectResponse
+from starlette.routing import Route
+
+from modules import sessions
+from modules.auth import LOGOUT_ROUTE, SESSION_COOKIE, SESSION_ROUTE, TRUST_PROXY
+
+def _secure(request) -> bool:
+    """Whether the browser reached us over HTTPS (directly or via a trusted proxy)"""
+    if TRUST_PROXY:
+        forwarded = request.headers.get('x-forwarded-proto', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip() == 'https'
+    return request.url.scheme == 'https'
+
+async def start_session(request):
+    token = await run_in_threadpool(sessions.redeem_handoff, request.query_params.get('code'))
+    response = RedirectResponse('/', status_code=303)
+    if token:
+        response.set_cookie(SESSION_COOKIE, token, max_age=sessions.SESSION_TTL, path='/',
+                            httponly=True, secure=_secure(request), samesite='strict')
+    return response
+
+async def end_session(request):
+    token = await run_in_threadpool(sessions.redeem_handoff, request.query_params.get('code'))
+    response = RedirectResponse('/', status_code=303)
+    if token and token == request.cookies.get(SESSION_COOKIE):
+        await run_in_threadpool(sessions.revoke, token)
+        response.delete_cookie(SESSION_COOKIE, path='/', httponly=True, secure=_secure(request),
+                               samesite='strict')
+    return response
+
+ROUTES = [
+    Route(SESSION_ROUTE, start_session, methods=['GET']),
+    Route(LOGOUT_ROUTE, end_session, methods=['POST']),
+]
@@ -0,0 +1,139 @@
+"""
+Chart Helpers
+Process-wide Plotly figure cache keyed on a fingerprint of the aggregated input
+frame and chart parameters, plus LTTB downsampling for long timelines.
+
+Figures are stored as serialized JSON, so every session rendering the same
+aggregates reuses one build instead of re-running plotly.express.
+"""
+
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+from modules import metrics
+
+MAX_ENTRIES = 256
+MAX_BYTES = 64 * 1024 * 1024
+TIMELINE_POINTS = 500  # points per series shipped to the browser
+
+_lock = threading.Lock()
+_figures: 'OrderedDict[str, str]' = OrderedDict()
+_size = 0
+
+# ============================================================================
+# FIGURE CACHE
+# ============================================================================
+
+def fingerprint(name: str, data: Optional[pd.DataFrame], params: dict) -> str:
+    """Stable hash of a chart name, its input frame (values, index, dtypes) and parameters"""
+    digest = hashlib.sha1(name.encode())
+    digest.update(repr(sorted(params.items())).encode())
+    if data is not None:
+        digest.update(repr([(str(c), str(t)) for c, t in data.dtypes.items()]).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+    return digest.hexdigest()
+
+def _get(key: str) -> Optional[str]:
+    with _lock:
+        payload = _figures.get(key)
+        if payload is not None:
+            _figures.move_to_end(key)
+        return payload
+
+def _put(key: str, payload: str):
+    global _size
+    with _lock:
+        if key in _figures:
+            return
+        _figures[key] = payload
+        _size += len(payload)
+        while _figures and (len(_figures) > MAX_ENTRIES or _size > MAX_BYTES):
+            _, evicted = _figures.popitem(last=False)
+            _size -= len(evicted)
+
+def clear_cache():
+    """Drop every cached figure"""
+    global _size
+    with _lock:
+        _figures.clear()
+        _size = 0
+
+def cache_info() -> dict:
+    with _lock:
+        return {'entries': len(_figures), 'bytes': _size}
+
+def cached_figure(name: str, data: Optional[pd.DataFrame], build: Callable, **params):
+    """Return build()'s figure, reusing the serialized figure when data and params are unchanged"""
+    key = fingerprint(name, data, params)
+    payload = _get(key)
+    metrics.cache_lookup('figures', payload is not None)
+    if payload is not None:
+        return pio.from_json(payload)
+
+    fig = build()
+    if fig is not None:
+        _put(key, fig.to_json())
+    return fig
+
+def cache_figure(builder: Callable) -> Callable:
+    """Decorator form for chart builders taking a DataFrame plus keyword parameters"""
+    @functools.wraps(builder)
+    def wrapper(data, **params):
+        if data is None or data.empty:
+            return builder(data, **params)
+        return cached_figure(builder.__qualname__, data, lambda: builder(data, **params), **params)
+    return wrapper
+
+# ============================================================================
+# DOWNSAMPLING
+# ============================================================================
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    selected = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        areas = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected])
+                       - (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(areas.argmax())
+        keep[i + 1] = selected
+    return keep
+
+def downsample_timeline(data: pd.DataFrame, x: str, y: str, group: Optional[str] = None,
+                        max_points: int = TIMELINE_POINTS) -> pd.DataFrame:
+    """LTTB-downsample each series of a timeline frame to at most max_points rows"""
+    if data.empty:
+        return data
+
+    def reduce(series: pd.DataFrame) -> pd.DataFrame:
+        if len(series) <= max_points:
+            return series
+        series = series.sort_values(x)
+        xs = pd.to_datetime(series[x]).astype('int64').to_numpy()
+        return series.iloc[lttb(xs, series[y].to_numpy(), max_points)]
+
+    if group is None:
+        return reduce(data)
+    return pd.concat([reduce(part) for _, part in data.groupby(group, sort=False)], ignore_index=True)
@@ -7,16 +7,20 @@ Placement Prediction, Financial Management
 
 import sqlite3
 import os
+import time
+import atexit
+import threading
 from datetime import datetime
 from typing import List, Dict, Tuple, Optional
 from contextlib import contextmanager
-import hashlib
+
+from modules import querystats, metrics, passwords
 
 # Ensure data directory exists
 DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
 os.makedirs(DATA_DIR, exist_ok=True)
 
-DATABASE_PATH = os.path.join(DATA_DIR, 'erp_system.db')
+DATABASE_PATH = os.environ.get('ERP_DATABASE_PATH', os.path.join(DATA_DIR, 'erp_system.db'))
 
 # Constants
 ROLES = ['student', 'faculty', 'admin']
@@ -25,9 +29,20 @@ FEE_STATUSES = ['Pending', 'Partial', 'Paid', 'Overdue']
 SEMESTERS = list(range(1, 9))
 GRADE_SCALE = {'A': 4.0, 'B': 3.0, 'C': 2.0, 'D': 1.0, 'F': 0.0}
 
+# Seconds between batched last_login writes
+LAST_LOGIN_FLUSH_SECONDS = float(os.environ.get('ERP_LAST_LOGIN_FLUSH', '5'))
+
+# Cached aggregates and the tables whose writes invalidate them
+CACHE_SOURCES = {
+    'department_analytics': ['student_profiles', 'academic_marks'],
+}
+
 def get_connection():
     """Get database connection with proper configuration"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    if querystats.is_enabled() or metrics.is_enabled():
+        conn = querystats.connect(DATABASE_PATH)
+    else:
+        conn = sqlite3.connect(DATABASE_PATH)
     conn.row_factory = sqlite3.Row
     conn.execute("PRAGMA foreign_keys = ON")
     return conn
@@ -42,8 +57,8 @@ def get_db_connection():
         conn.close()
 
 def hash_password(password: str) -> str:
-    """Hash password using SHA256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Salted KDF hash (see modules.passwords); runs on the calling thread"""
+    return passwords.hash_password(password)
 
 def init_database():
     """Initialize comprehensive ERP database with all required tables"""
@@ -65,6 +80,8 @@ def init_database():
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+    # Login looks emails up case-insensitively; the UNIQUE index is case-sensitive
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email_nocase ON users(email COLLATE NOCASE)')
     
     # Enhanced Student Profile
     cursor.execute('''
@@ -193,24 +210,6 @@ def init_database():
         )
     ''')
     
-    # Fee Management
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS fees (
-            fee_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            semester INTEGER NOT NULL,
-            amount_due REAL NOT NULL,
-            amount_paid REAL DEFAULT 0.0,
-            fee_status TEXT DEFAULT 'Pending',
-            due_date TEXT,
-            paid_date TEXT,
-            transaction_id TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (user_id) REFERENCES users(user_id),
-            UNIQUE(user_id, semester)
-        )
-    ''')
-    
     # Support Tickets
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS tickets (
@@ -279,9 +278,34 @@ def init_database():
         )
     ''')
     
+    # Write counters for cached aggregates, bumped by triggers on their source tables
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    for name, tables in CACHE_SOURCES.items():
+        cursor.execute('INSERT OR IGNORE INTO cache_versions (name) VALUES (?)', (name,))
+        if not cursor.rowcount:
+            continue  # triggers were created along with the counter row
+        for table in tables:
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS cache_{name}_{table}_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE cache_versions SET version = version + 1 WHERE name = '{name}';
+                    END
+                ''')
+    
     conn.commit()
     conn.close()
 
+    # Fees, their ledger and rollups live in one place (and may need migrating)
+    from modules import fee_repository
+    fee_repository.ensure_schema()
+
 # ============================================================================
 # USER MANAGEMENT
 # ============================================================================
@@ -297,19 +321,43 @@ def add_user(email: str, password: str, full_name: str, role: str, phone: str =
     try:
         with get_db_connection() as conn:
             cursor = conn.cursor()
-            hashed_password = hash_password(password)
+            hashed_password = passwords.hash_in_pool(password)
             cursor.execute('''
                 INSERT INTO users (email, password, full_name, role, phone)
                 VALUES (?, ?, ?, ?, ?)
             ''', (email.lower(), hashed_password, full_name.strip(), role, phone))
             conn.commit()
-            return True
+        if role != 'student':
+            from modules import assignment
+            assignment.staff_added(cursor.lastrowid, role)
+        return True
     except sqlite3.IntegrityError:
         return False
     except Exception as e:
         print(f"Error adding user: {e}")
         return False
 
+def set_user_active(user_id: int, active: bool) -> bool:
+    """Activate or deactivate an account; deactivated staff stop receiving assignments"""
+    try:
+        with get_db_connection() as conn:
+            user = conn.execute('SELECT role FROM users WHERE user_id = ?', (user_id,)).fetchone()
+            if not user:
+                return False
+            conn.execute('UPDATE users SET is_active = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?',
+                         (1 if active else 0, user_id))
+            conn.commit()
+            if user['role'] != 'student':
+                from modules import assignment
+                if active:
+                    assignment.staff_reactivated(conn, user_id, user['role'])
+                else:
+                    assignment.staff_deactivated(user_id)
+        return True
+    except Exception as e:
+        print(f"Error updating user status: {e}")
+        return False
+
 def get_user(email: str, password: str) -> Optional[Dict]:
     """Authenticate user"""
     if not email or not password:
@@ -317,22 +365,80 @@ def get_user(email: str, password: str) -> Optional[Dict]:
     
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            hashed_password = hash_password(password)
-            cursor.execute('''
-                SELECT * FROM users WHERE LOWER(email) = ? AND password = ? AND is_active = 1
-            ''', (email.lower(), hashed_password))
-            user = cursor.fetchone()
+            # One seek on idx_users_email_nocase
+            user = conn.execute('''
+                SELECT * FROM users WHERE email = ? COLLATE NOCASE AND is_active = 1
+            ''', (email.strip(),)).fetchone()
         
-        if user:
-            cursor.execute('UPDATE users SET last_login = CURRENT_TIMESTAMP WHERE user_id = ?', (user['user_id'],))
-            conn.commit()
+        if not user:
+            return None
+        matches, rehash = passwords.verify_in_pool(password, user['password'])
+        if not matches:
+            return None
         
-        return dict(user) if user else None
+        if rehash:
+            # Legacy SHA-256 or outdated KDF cost; only replace the hash we verified
+            upgraded = passwords.hash_in_pool(password)
+            with get_db_connection() as conn:
+                conn.execute('UPDATE users SET password = ? WHERE user_id = ? AND password = ?',
+                             (upgraded, user['user_id'], user['password']))
+                conn.commit()
+        
+        last_logins.record(user['user_id'])
+        return dict(user)
     except Exception as e:
         print(f"Error getting user: {e}")
         return None
 
+class LastLoginWriter:
+    """Buffers last_login timestamps and writes them in one executemany per interval"""
+    
+    def __init__(self, interval: float = LAST_LOGIN_FLUSH_SECONDS):
+        self.interval = interval
+        self._pending: Dict[str, Dict[int, str]] = {}  # database path -> user_id -> UTC timestamp
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def record(self, user_id: int):
+        stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        with self._lock:
+            self._pending.setdefault(DATABASE_PATH, {})[user_id] = stamp
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='erp-last-login', daemon=True)
+                self._thread.start()
+    
+    def flush(self) -> int:
+        """Write every buffered timestamp; returns the number of users updated"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        written = 0
+        for path, stamps in pending.items():
+            try:
+                conn = sqlite3.connect(path, timeout=30)
+                try:
+                    conn.executemany('UPDATE users SET last_login = ? WHERE user_id = ?',
+                                     [(stamp, user_id) for user_id, stamp in stamps.items()])
+                    conn.commit()
+                finally:
+                    conn.close()
+                written += len(stamps)
+            except Exception as e:
+                print(f"Error writing last_login: {e}")
+                with self._lock:
+                    # Keep them for the next flush unless a newer login replaced them
+                    retry = self._pending.setdefault(path, {})
+                    for user_id, stamp in stamps.items():
+                        retry.setdefault(user_id, stamp)
+        return written
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+last_logins = LastLoginWriter()
+atexit.register(last_logins.flush)
+
 def get_user_by_id(user_id: int) -> Optional[Dict]:
     """Get user by ID"""
     if not user_id:
@@ -450,6 +556,216 @@ def get_all_students() -> List[Dict]:
         print(f"Error getting students: {e}")
         return []
 
+# ============================================================================
+# SERVICE REQUESTS & SUPPORT TICKETS
+# ============================================================================
+
+def submit_service_request(user_id: int, title: str, description: str, 
+                          category: str, priority: str) -> bool:
+    """Submit new service request with validation"""
+    if not all([user_id, title, description, category, priority]):
+        return False
+    
+    if len(title.strip()) < 3 or len(description.strip()) < 5:
+        return False
+    
+    from modules import assignment
+    queue = assignment.get_queue()  # built before the write transaction below
+    assignee = None
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO service_requests 
+                (user_id, title, description, category, priority)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, title.strip(), description.strip(), category, priority))
+            assignee = queue.assign(conn, 'request', cursor.lastrowid, category)
+            conn.commit()
+        return True
+    except Exception as e:
+        queue.release(assignee)
+        print(f"Error submitting request: {e}")
+        return False
+
+def get_user_requests(user_id: int) -> List[Dict]:
+    """Get all requests for a user"""
+    if not user_id:
+        return []
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM service_requests WHERE user_id = ?
+                ORDER BY created_at DESC
+            ''', (user_id,))
+            requests = cursor.fetchall()
+        return [dict(req) for req in requests]
+    except Exception as e:
+        print(f"Error getting user requests: {e}")
+        return []
+
+def _filter_clause(alias: str, filters: Dict) -> Tuple[str, List]:
+    """Build the status/category/priority IN clauses shared by the admin lists"""
+    clause = ''
+    params = []
+    for column in ('status', 'category', 'priority'):
+        if filters and filters.get(column):
+            values = filters[column] if isinstance(filters[column], list) else [filters[column]]
+            placeholders = ','.join('?' * len(values))
+            clause += f' AND {alias}.{column} IN ({placeholders})'
+            params.extend(values)
+    return clause, params
+
+def get_all_requests(filters: Dict = None) -> List[Dict]:
+    """Get all requests with optional filters"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            clause, params = _filter_clause('sr', filters)
+            cursor.execute(f'''
+                SELECT sr.*, u.full_name, u.email FROM service_requests sr
+                JOIN users u ON sr.user_id = u.user_id
+                WHERE 1=1{clause}
+                ORDER BY sr.created_at DESC
+            ''', params)
+            requests = cursor.fetchall()
+        return [dict(req) for req in requests]
+    except Exception as e:
+        print(f"Error getting all requests: {e}")
+        return []
+
+def update_request_status(request_id: int, status: str) -> bool:
+    """Update request status"""
+    if not request_id or not status:
+        return False
+    
+    from modules import assignment
+    queue = assignment.get_queue()
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            previous = cursor.execute('SELECT status FROM service_requests WHERE request_id = ?',
+                                      (request_id,)).fetchone()
+            cursor.execute('''
+                UPDATE service_requests 
+                SET status = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE request_id = ?
+            ''', (status, request_id))
+            conn.commit()
+            if previous:
+                queue.status_changed(conn, 'request', request_id, previous['status'], status)
+        return True
+    except Exception as e:
+        print(f"Error updating status: {e}")
+        return False
+
+def get_request_stats() -> Dict:
+    """Get request counts per status"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT status, COUNT(*) as count FROM service_requests
+                GROUP BY status
+            ''')
+            stats = {row['status']: row['count'] for row in cursor.fetchall()}
+        return stats
+    except Exception as e:
+        print(f"Error getting stats: {e}")
+        return {}
+
+def submit_ticket(user_id: int, title: str, description: str, 
+                 category: str, priority: str) -> bool:
+    """Submit support ticket with validation"""
+    if not all([user_id, title, description, category, priority]):
+        return False
+    
+    if len(title.strip()) < 3 or len(description.strip()) < 5:
+        return False
+    
+    from modules import assignment
+    queue = assignment.get_queue()  # built before the write transaction below
+    assignee = None
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO tickets 
+                (user_id, title, description, category, priority)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, title.strip(), description.strip(), category, priority))
+            assignee = queue.assign(conn, 'ticket', cursor.lastrowid, category)
+            conn.commit()
+        return True
+    except Exception as e:
+        queue.release(assignee)
+        print(f"Error submitting ticket: {e}")
+        return False
+
+def update_ticket_status(ticket_id: int, status: str, resolved_by: int = None) -> bool:
+    """Update ticket status, stamping resolution time and resolver when it is resolved"""
+    if not ticket_id or not status:
+        return False
+    
+    from modules import assignment
+    queue = assignment.get_queue()
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            previous = cursor.execute('SELECT status FROM tickets WHERE ticket_id = ?', (ticket_id,)).fetchone()
+            cursor.execute('''
+                UPDATE tickets
+                SET status = ?,
+                    resolved_at = CASE WHEN ? IN ('Resolved', 'Closed') THEN CURRENT_TIMESTAMP END,
+                    resolved_by = CASE WHEN ? IN ('Resolved', 'Closed') THEN ? END
+                WHERE ticket_id = ?
+            ''', (status, status, status, resolved_by, ticket_id))
+            conn.commit()
+            if previous:
+                queue.status_changed(conn, 'ticket', ticket_id, previous['status'], status)
+        return True
+    except Exception as e:
+        print(f"Error updating ticket status: {e}")
+        return False
+
+def get_user_tickets(user_id: int) -> List[Dict]:
+    """Get all tickets for a user"""
+    if not user_id:
+        return []
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT * FROM tickets WHERE user_id = ?
+                ORDER BY created_at DESC
+            ''', (user_id,))
+            tickets = cursor.fetchall()
+        return [dict(ticket) for ticket in tickets]
+    except Exception as e:
+        print(f"Error getting user tickets: {e}")
+        return []
+
+def get_all_tickets(filters: Dict = None) -> List[Dict]:
+    """Get all tickets with optional filters"""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            clause, params = _filter_clause('t', filters)
+            cursor.execute(f'''
+                SELECT t.*, u.full_name, u.email FROM tickets t
+                JOIN users u ON t.user_id = u.user_id
+                WHERE 1=1{clause}
+                ORDER BY t.created_at DESC
+            ''', params)
+            tickets = cursor.fetchall()
+        return [dict(ticket) for ticket in tickets]
+    except Exception as e:
+        print(f"Error getting all tickets: {e}")
+        return []
+
 # ============================================================================
 # ACADEMIC MARKS & PERFORMANCE
 # ============================================================================
@@ -542,6 +858,21 @@ def get_student_marks(user_id: int, semester: int = None) -> List[Dict]:
         print(f"Error getting marks: {e}")
         return []
 
+def delete_student_marks(marks_id: int) -> bool:
+    """Delete a student marks record"""
+    if not marks_id:
+        return False
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM academic_marks WHERE marks_id = ?', (marks_id,))
+            conn.commit()
+        return True
+    except Exception as e:
+        print(f"Error deleting marks: {e}")
+        return False
+
 def update_student_performance_metrics(user_id: int, semester: int) -> bool:
     """Calculate and update performance metrics"""
     try:
@@ -679,27 +1010,9 @@ def update_fee_record(user_id: int, semester: int, amount_due: float, amount_pai
         return False
     
     try:
+        from modules import fee_repository
         fee_status = 'Paid' if amount_paid >= amount_due else ('Partial' if amount_paid > 0 else 'Pending')
-        
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT fee_id FROM fees WHERE user_id = ? AND semester = ?
-            ''', (user_id, semester))
-            
-            if cursor.fetchone():
-                cursor.execute('''
-                    UPDATE fees 
-                    SET amount_due = ?, amount_paid = ?, fee_status = ?
-                    WHERE user_id = ? AND semester = ?
-                ''', (amount_due, amount_paid, fee_status, user_id, semester))
-            else:
-                cursor.execute('''
-                    INSERT INTO fees (user_id, semester, amount_due, amount_paid, fee_status)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (user_id, semester, amount_due, amount_paid, fee_status))
-            
-            conn.commit()
+        fee_repository.upsert_fee(user_id, semester, amount_due, amount_paid, fee_status)
         return True
     except Exception as e:
         print(f"Error updating fees: {e}")
@@ -711,13 +1024,8 @@ def get_student_fees(user_id: int) -> List[Dict]:
         return []
     
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT * FROM fees WHERE user_id = ? ORDER BY semester
-            ''', (user_id,))
-            fees = cursor.fetchall()
-        return [dict(fee) for fee in fees]
+        from modules import fee_repository
+        return fee_repository.get_student_fees(user_id)
     except Exception as e:
         print(f"Error getting fees: {e}")
         return []
@@ -734,7 +1042,7 @@ def predict_placement_eligibility(user_id: int) -> Dict:
             
             # Get latest performance metrics
             cursor.execute('''
-                SELECT sgpa, cgpa, attendance_percentage, placement_eligible
+                SELECT sgpa, cgpa, attendance_percentage, placement_eligible, predicted_placement
                 FROM performance_metrics WHERE user_id = ?
                 ORDER BY semester DESC LIMIT 1
             ''', (user_id,))
@@ -747,6 +1055,7 @@ def predict_placement_eligibility(user_id: int) -> Dict:
                     'cgpa': metrics['cgpa'],
                     'attendance': metrics['attendance_percentage'],
                     'eligible': metrics['placement_eligible'],
+                    'predicted_placement': metrics['predicted_placement'],
                     'eligibility_score': (metrics['sgpa'] * 0.6 + metrics['attendance_percentage']/100 * 0.4) if metrics['sgpa'] else 0
                 }
             return {'eligible': False, 'eligibility_score': 0}
@@ -758,47 +1067,76 @@ def predict_placement_eligibility(user_id: int) -> Dict:
 # ANALYTICS & REPORTING
 # ============================================================================
 
-def get_departmental_analytics(department: str) -> Dict:
-    """Get analytics for a department"""
+_aggregate_cache: Dict[Tuple[str, str], Tuple[int, object]] = {}
+
+def _cached_aggregate(conn, name: str, compute):
+    """Return compute(conn), reusing the last result until a source table is written"""
+    try:
+        row = conn.execute('SELECT version FROM cache_versions WHERE name = ?', (name,)).fetchone()
+    except sqlite3.OperationalError:
+        row = None  # database created before cache_versions existed; init_database adds it
+    version = row['version'] if row else None
+    key = (DATABASE_PATH, name)
+    cached = _aggregate_cache.get(key)
+    hit = version is not None and cached is not None and cached[0] == version
+    metrics.cache_lookup(name, hit)
+    if hit:
+        return cached[1]
+    
+    value = compute(conn)
+    if version is not None:
+        _aggregate_cache[key] = (version, value)
+    return value
+
+def _department_rows(conn) -> Dict[str, Dict]:
+    """Per-department totals in one grouped query with conditional aggregation"""
+    rows = conn.execute('''
+        SELECT sp.department,
+               COUNT(*) AS total_students,
+               AVG(sp.cgpa) AS avg_cgpa,
+               COALESCE(SUM(m.total_marks), 0) AS total_marks,
+               COALESCE(SUM(m.pass_count), 0) AS pass_count
+        FROM student_profiles sp
+        LEFT JOIN (
+            SELECT user_id,
+                   COUNT(*) AS total_marks,
+                   SUM(CASE WHEN grade != 'F' THEN 1 ELSE 0 END) AS pass_count
+            FROM academic_marks
+            GROUP BY user_id
+        ) m ON m.user_id = sp.user_id
+        GROUP BY sp.department
+    ''').fetchall()
+    
+    analytics = {}
+    for row in rows:
+        pass_percentage = (row['pass_count'] / row['total_marks'] * 100) if row['total_marks'] > 0 else 0
+        analytics[row['department']] = {
+            'total_students': row['total_students'],
+            'avg_cgpa': round(row['avg_cgpa'] or 0, 2),
+            'pass_percentage': round(pass_percentage, 2),
+            'fail_percentage': round(100 - pass_percentage, 2)
+        }
+    return analytics
+
+def get_all_departments_analytics() -> Dict[str, Dict]:
+    """Total students, average CGPA, pass% and fail% for every department"""
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Total students
-            cursor.execute('''
-                SELECT COUNT(*) as count FROM student_profiles WHERE department = ?
-            ''', (department,))
-            total_students = cursor.fetchone()['count']
-            
-            # Average CGPA
-            cursor.execute('''
-                SELECT AVG(cgpa) as avg_cgpa FROM student_profiles WHERE department = ?
-            ''', (department,))
-            avg_cgpa = cursor.fetchone()['avg_cgpa'] or 0
-            
-            # Pass percentage (Grade != F)
-            cursor.execute('''
-                SELECT COUNT(*) as pass_count FROM academic_marks am
-                JOIN student_profiles sp ON am.user_id = sp.user_id
-                WHERE sp.department = ? AND am.grade != 'F'
-            ''', (department,))
-            pass_count = cursor.fetchone()['pass_count']
-            
-            cursor.execute('''
-                SELECT COUNT(*) as total_marks FROM academic_marks am
-                JOIN student_profiles sp ON am.user_id = sp.user_id
-                WHERE sp.department = ?
-            ''', (department,))
-            total_marks = cursor.fetchone()['total_marks']
-            
-            pass_percentage = (pass_count / total_marks * 100) if total_marks > 0 else 0
-            
-            return {
-                'total_students': total_students,
-                'avg_cgpa': round(avg_cgpa, 2),
-                'pass_percentage': round(pass_percentage, 2),
-                'fail_percentage': round(100 - pass_percentage, 2)
-            }
+            analytics = _cached_aggregate(conn, 'department_analytics', _department_rows)
+            return {department: dict(values) for department, values in analytics.items()}
     except Exception as e:
-        print(f"Error getting analytics: {e}")
+        print(f"Error getting department analytics: {e}")
         return {}
+
+def get_departmental_analytics(department: str) -> Dict:
+    """Get analytics for a department"""
+    from modules import snapshot
+    if snapshot.is_enabled():
+        return snapshot.departmental_analytics(department)
+    
+    return get_all_departments_analytics().get(department, {
+        'total_students': 0,
+        'avg_cgpa': 0,
+        'pass_percentage': 0,
+        'fail_percentage': 100
+    })
@@ -0,0 +1,466 @@
+"""
+Synthetic Data Generator
+Deterministic, seedable bulk data for reproducing scale problems.
+Fills every portal table with realistic distributions using vectorized
+NumPy generation and executemany inserts inside a single transaction.
+Triggers and secondary indexes on the big tables are dropped for the load
+and recreated (with the tables they maintain) before it commits.
+"""
+
+import os
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from modules import database, fee_repository
+from modules.database import get_connection, hash_password, init_database
+
+DEPARTMENTS = ['CSE', 'ECE', 'MECH', 'CIVIL', 'EEE', 'ISE', 'CHEM', 'BIOTECH']
+ADMISSION_QUOTAS = ['CET', 'COMEDK', 'Management', 'NRI']
+TICKET_CATEGORIES = ['Academic Query', 'Fee Related', 'Admission', 'Hostel', 'Library', 'Other']
+TICKET_STATUSES = ['Open', 'In Progress', 'Resolved', 'Closed']
+REQUEST_CATEGORIES = ['Academic', 'Admission', 'Exam', 'General', 'Technical Support']
+REQUEST_STATUSES = ['Submitted', 'In Progress', 'Resolved']
+PRIORITIES = ['Low', 'Medium', 'High']
+NOTIFICATION_TYPES = ['info', 'success', 'warning', 'error']
+DOCUMENT_TYPES = ['ID Proof', 'Address Proof', 'Certificate', 'Transcript', 'Other']
+WORKFLOW_STAGES = ['Received', 'Under Review', 'In Progress', 'Verification', 'Completed', 'Resolved']
+COMPANIES = ['Infosys', 'TCS', 'Wipro', 'Accenture', 'Bosch', 'Cisco', 'Deloitte', 'Google']
+
+# Named scales used by the seeding CLI and the benchmark suite
+SCALES = {
+    'small': {'students': 500, 'semesters': 8},
+    'medium': {'students': 5000, 'semesters': 8},
+    'large': {'students': 50000, 'semesters': 8},
+}
+
+DEFAULT_PASSWORDS = {'student': 'student123', 'faculty': 'faculty123', 'admin': 'admin123'}
+
+def _timestamps(rng: np.random.Generator, count: int, as_of: date, max_days: int) -> np.ndarray:
+    """Random 'YYYY-MM-DD HH:MM:SS' strings within the last max_days before as_of"""
+    end = np.datetime64(as_of.isoformat(), 's') + np.timedelta64(86399, 's')
+    offsets = rng.integers(0, max_days * 86400, size=count).astype('timedelta64[s]')
+    return np.char.replace(np.datetime_as_string(end - offsets, unit='s'), 'T', ' ')
+
+def _semester_timestamps(rng: np.random.Generator, semesters: np.ndarray, admission_year: int,
+                         as_of: date) -> np.ndarray:
+    """Timestamps in the closing weeks of each semester, capped at as_of"""
+    start = np.datetime64(f'{admission_year}-08-01T00:00:00', 's')
+    offsets = (semesters * 182 - 30).astype('timedelta64[D]') + rng.integers(0, 21 * 86400, size=len(semesters)).astype('timedelta64[s]')
+    stamps = np.minimum(start + offsets, np.datetime64(as_of.isoformat(), 's'))
+    return np.char.replace(np.datetime_as_string(stamps, unit='s'), 'T', ' ')
+
+def _choice(rng: np.random.Generator, options: List[str], count: int, p: List[float] = None) -> np.ndarray:
+    """Vectorized categorical draw returning an object array of labels"""
+    return np.asarray(options, dtype=object)[rng.choice(len(options), size=count, p=p)]
+
+def _per_owner(rng: np.random.Generator, owners: np.ndarray, mean: float) -> np.ndarray:
+    """Repeat owner ids by a Poisson count so each owner gets ~mean child rows"""
+    return np.repeat(owners, rng.poisson(mean, size=len(owners)))
+
+def _rows(*columns) -> zip:
+    """Zip NumPy columns into plain Python tuples accepted by sqlite3"""
+    return zip(*(col.tolist() if isinstance(col, np.ndarray) else col for col in columns))
+
+def _letter_grades(percentage: np.ndarray):
+    """Vectorized version of the grade bands used by add_student_marks"""
+    bands = np.digitize(percentage, [60, 70, 80, 90])
+    letters = np.array(['F', 'D', 'C', 'B', 'A'], dtype=object)[bands]
+    points = np.array([database.GRADE_SCALE[g] for g in 'FDCBA'])[bands]
+    return letters, points
+
+# SQL version of modules.exams.get_grade
+_EXAM_GRADE_SQL = """
+    CASE WHEN {pct} >= 90 THEN 'A+' WHEN {pct} >= 80 THEN 'A' WHEN {pct} >= 70 THEN 'B+'
+         WHEN {pct} >= 60 THEN 'B' WHEN {pct} >= 50 THEN 'C' ELSE 'F' END
+"""
+
+# Triggers on these tables are dropped for the load and their derived tables
+# (cache versions, fee totals and rollups) recomputed once at the end
+BULK_TRIGGER_TABLES = ('student_profiles', 'academic_marks', 'fees', 'fee_collection_log')
+# Secondary indexes on these tables are built once after the load, not row by row
+BULK_INDEX_TABLES = ('users', 'student_profiles', 'academic_marks', 'attendance', 'exam_results',
+                     'performance_metrics', 'fees', 'placement_records')
+
+def _suspend_triggers_and_indexes(cursor) -> List[str]:
+    """Drop the bulk tables' triggers and secondary indexes; returns the SQL to recreate them"""
+    triggers = ', '.join('?' * len(BULK_TRIGGER_TABLES))
+    indexes = ', '.join('?' * len(BULK_INDEX_TABLES))
+    saved = cursor.execute(f"""
+        SELECT type, name, sql FROM sqlite_master WHERE sql IS NOT NULL
+          AND ((type = 'trigger' AND tbl_name IN ({triggers})) OR (type = 'index' AND tbl_name IN ({indexes})))
+        ORDER BY type
+    """, BULK_TRIGGER_TABLES + BULK_INDEX_TABLES).fetchall()
+    for kind, name, _ in saved:
+        cursor.execute(f'DROP {kind.upper()} "{name}"')
+    return [sql for _, _, sql in saved]
+
+def init_all_tables():
+    """Create the core ERP schema plus every feature-module table"""
+    from modules.documents import init_documents_table
+    from modules.attendance import init_attendance_table
+    from modules.exams import init_exams_table
+    from modules.notifications import init_notifications_table
+    from modules.fees import init_fees_table
+    from modules.workflow import init_workflow_table
+    from modules.placement import init_placement_tables
+    from modules.sla import init_sla_tables
+    from modules.fee_sweeper import init_sweeper_tables
+
+    init_database()
+    init_documents_table()
+    init_attendance_table()
+    init_exams_table()
+    init_notifications_table()
+    init_fees_table()
+    init_workflow_table()
+    init_placement_tables()
+    init_sla_tables()
+    init_sweeper_tables()
+
+def reset_database():
+    """Delete the current database file (and its WAL side files)"""
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        path = database.DATABASE_PATH + suffix
+        if os.path.exists(path):
+            os.remove(path)
+
+def generate_dataset(students: int = 500, semesters: int = 8, subjects_per_semester: int = 5,
+                     seed: int = 42, as_of: Optional[date] = None, reset: bool = False,
+                     tickets_per_student: float = 2.0, requests_per_student: float = 2.0,
+                     notifications_per_student: float = 10.0,
+                     documents_per_student: float = 1.5) -> Dict[str, int]:
+    """Fill every table with a deterministic synthetic institution.
+
+    Every student gets a full history of ``semesters`` semesters with
+    ``subjects_per_semester`` subjects each. The same seed and ``as_of`` date
+    always produce the same rows. Returns the number of rows written per table.
+    """
+    if students < 1 or semesters < 1 or subjects_per_semester < 1:
+        raise ValueError("students, semesters and subjects_per_semester must be positive")
+    from modules.workflow import rebuild_workflow_state
+
+    as_of = as_of or date.today()
+    rng = np.random.default_rng(seed)
+
+    if reset:
+        reset_database()
+    init_all_tables()
+
+    conn = get_connection()
+    conn.isolation_level = None
+    if conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]:
+        conn.close()
+        raise ValueError("Database already contains users; pass reset=True to regenerate it")
+
+    # Bulk-load settings for this connection only
+    conn.execute('PRAGMA foreign_keys = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    conn.execute('PRAGMA journal_mode = MEMORY')
+    conn.execute('PRAGMA cache_size = -200000')
+
+    # Column defaults such as CURRENT_TIMESTAMP are supplied explicitly so
+    # that the same seed and as_of always reproduce identical rows
+    stamp = f'{as_of.isoformat()} 00:00:00'
+    admission_year = as_of.year - (semesters + 1) // 2
+
+    counts = {}
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute('BEGIN')
+    try:
+        deferred_sql = _suspend_triggers_and_indexes(cursor)
+
+        # ------------------------------------------------------------------
+        # Users: admins, faculty, students (explicit ids keep children cheap)
+        # ------------------------------------------------------------------
+        n_admins = max(1, students // 5000)
+        n_faculty = max(len(DEPARTMENTS), students // 40)
+        admin_ids = np.arange(1, n_admins + 1)
+        faculty_ids = np.arange(n_admins + 1, n_admins + n_faculty + 1)
+        student_ids = np.arange(n_admins + n_faculty + 1, n_admins + n_faculty + students + 1)
+
+        hashes = {role: hash_password(pw) for role, pw in DEFAULT_PASSWORDS.items()}
+        user_created = _timestamps(rng, n_admins + n_faculty + students, as_of, 4 * 365)
+
+        admin_emails = ['admin@example.com'] + [f'admin{i}@example.com' for i in range(2, n_admins + 1)]
+        faculty_emails = [f'faculty{i}@example.com' for i in range(1, n_faculty + 1)]
+        student_emails = [f'student{i}@example.com' for i in range(1, students + 1)]
+        phones = (9000000000 + rng.integers(0, 999999999, size=n_admins + n_faculty + students)).astype(str)
+
+        user_rows = []
+        for ids, emails, role, label in ((admin_ids, admin_emails, 'admin', 'Admin'),
+                                         (faculty_ids, faculty_emails, 'faculty', 'Faculty'),
+                                         (student_ids, student_emails, 'student', 'Student')):
+            names = [f'{label} {i}' for i in range(1, len(ids) + 1)]
+            user_rows.append(_rows(ids, emails, [hashes[role]] * len(ids), names,
+                                   phones[ids - 1], [role] * len(ids), user_created[ids - 1],
+                                   user_created[ids - 1]))
+        for rows in user_rows:
+            cursor.executemany('''
+                INSERT INTO users (user_id, email, password, full_name, phone, role, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        counts['users'] = n_admins + n_faculty + students
+
+        faculty_dept = np.arange(n_faculty) % len(DEPARTMENTS)
+        cursor.executemany('''
+            INSERT INTO faculty_profiles (user_id, employee_id, department, designation, joined_date)
+            VALUES (?, ?, ?, ?, ?)
+        ''', _rows(faculty_ids, [f'EMP{i:05d}' for i in range(1, n_faculty + 1)],
+                   np.asarray(DEPARTMENTS, dtype=object)[faculty_dept],
+                   _choice(rng, ['Assistant Professor', 'Associate Professor', 'Professor'], n_faculty),
+                   user_created[faculty_ids - 1].astype('U10')))
+        counts['faculty_profiles'] = n_faculty
+
+        # ------------------------------------------------------------------
+        # Academic history: marks, attendance and derived metrics
+        # ------------------------------------------------------------------
+        dept_idx = rng.integers(0, len(DEPARTMENTS), size=students)
+        ability = np.clip(rng.normal(72, 11, size=students), 30, 98)
+        diligence = rng.beta(8, 2, size=students)
+
+        per_student = semesters * subjects_per_semester
+        n_marks = students * per_student
+        m_user = np.repeat(student_ids, per_student)
+        m_sem = np.tile(np.repeat(np.arange(1, semesters + 1), subjects_per_semester), students)
+        m_k = np.tile(np.arange(1, subjects_per_semester + 1), students * semesters)
+        m_dept = np.repeat(dept_idx, per_student)
+        dept_codes = np.asarray(DEPARTMENTS, dtype=object)
+        subjects = dept_codes[m_dept] + (m_sem * 100 + m_k).astype(str).astype(object)
+
+        internal = np.clip(np.round(np.repeat(ability, per_student) + rng.normal(0, 8, n_marks)), 0, 100)
+        external = np.clip(np.round(np.repeat(ability, per_student) + rng.normal(0, 12, n_marks)), 0, 100)
+        total = internal + external
+        percentage = total / 200 * 100
+        grades, gpas = _letter_grades(percentage)
+        dept_faculty = [faculty_ids[faculty_dept == d] for d in range(len(DEPARTMENTS))]
+        recorded_by = np.array([dept_faculty[d][0] for d in range(len(DEPARTMENTS))])[m_dept]
+        recorded_at = _semester_timestamps(rng, m_sem, admission_year, as_of)
+
+        cursor.executemany('''
+            INSERT INTO academic_marks
+            (user_id, subject, semester, internal_marks, external_marks, total_marks,
+             percentage, grade, gpa, recorded_by, recorded_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', _rows(m_user, subjects, m_sem, internal, external, total, percentage,
+                   grades, gpas, recorded_by, recorded_at))
+        counts['academic_marks'] = n_marks
+
+        total_classes = rng.integers(40, 61, size=n_marks)
+        attended = rng.binomial(total_classes, np.repeat(diligence, per_student))
+        att_pct = np.round(attended / total_classes * 100, 2)
+        cursor.executemany('''
+            INSERT INTO attendance
+            (user_id, subject, semester, total_classes, attended_classes, attendance_percentage, recorded_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', _rows(m_user, subjects, m_sem, total_classes, attended, att_pct, recorded_at))
+        counts['attendance'] = n_marks
+
+        sgpa = gpas.reshape(students, semesters, subjects_per_semester).mean(axis=2)
+        cgpa = np.cumsum(sgpa, axis=1) / np.arange(1, semesters + 1)
+        sem_attendance = att_pct.reshape(students, semesters, subjects_per_semester).mean(axis=2)
+        eligible = (sgpa >= 2.0) & (sem_attendance >= 75.0)
+        cursor.executemany('''
+            INSERT INTO performance_metrics
+            (user_id, semester, sgpa, cgpa, attendance_percentage, placement_eligible, analysis_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', _rows(np.repeat(student_ids, semesters), np.tile(np.arange(1, semesters + 1), students),
+                   np.round(sgpa.ravel(), 3), np.round(cgpa.ravel(), 3),
+                   np.round(sem_attendance.ravel(), 2), eligible.ravel().astype(int),
+                   np.full(students * semesters, stamp, dtype=object)))
+        counts['performance_metrics'] = students * semesters
+
+        cursor.executemany('''
+            INSERT INTO student_profiles
+            (user_id, roll_number, department, semester, cgpa, phone, address, father_name,
+             mother_name, dob, admission_date, academic_status, cet_rank, admission_quota, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', _rows(student_ids,
+                   [f'{admission_year % 100:02d}{DEPARTMENTS[d]}{i:06d}' for i, d in enumerate(dept_idx.tolist(), 1)],
+                   dept_codes[dept_idx], np.full(students, semesters), np.round(cgpa[:, -1], 2),
+                   phones[student_ids - 1], [f'{i} Campus Road' for i in range(1, students + 1)],
+                   [f'Father {i}' for i in range(1, students + 1)],
+                   [f'Mother {i}' for i in range(1, students + 1)],
+                   [f'{admission_year - 18}-{m:02d}-{d:02d}' for m, d in
+                    zip(rng.integers(1, 13, students).tolist(), rng.integers(1, 29, students).tolist())],
+                   [f'{admission_year}-08-01'] * students,
+                   _choice(rng, ['Active', 'Active', 'Active', 'On Leave', 'Inactive'], students),
+                   rng.integers(1, 100000, size=students).astype(str),
+                   _choice(rng, ADMISSION_QUOTAS, students, p=[0.55, 0.2, 0.2, 0.05]),
+                   [stamp] * students))
+        counts['student_profiles'] = students
+
+        # Exam results mirror the external component of each subject, so they are
+        # copied inside SQLite rather than bound row by row from Python
+        cursor.execute(f'''
+            INSERT INTO exam_results
+            (user_id, exam_name, subject, marks_obtained, total_marks, percentage, grade, exam_date, created_at)
+            SELECT user_id, 'Semester ' || semester || ' Final', subject, external_marks, 100, external_marks,
+                   {_EXAM_GRADE_SQL.format(pct='external_marks')}, substr(recorded_at, 1, 10), recorded_at
+            FROM academic_marks ORDER BY marks_id
+        ''')
+        counts['exam_results'] = n_marks
+
+        # ------------------------------------------------------------------
+        # Fees: one record per student per semester
+        # ------------------------------------------------------------------
+        n_fees = students * semesters
+        f_user = np.repeat(student_ids, semesters)
+        f_sem = np.tile(np.arange(1, semesters + 1), students)
+        amount_due = np.repeat(rng.choice([45000, 60000, 85000, 120000], size=students), semesters).astype(float)
+        pay_roll = rng.random(n_fees)
+        latest = f_sem == semesters
+        paid_fraction = np.where(pay_roll < 0.8, 1.0, np.where(pay_roll < 0.92, rng.uniform(0.2, 0.9, n_fees), 0.0))
+        paid_fraction = np.where(latest & (pay_roll < 0.3), 0.0, paid_fraction)
+        amount_paid = np.round(amount_due * paid_fraction, 2)
+        fee_status = np.where(amount_paid >= amount_due, 'Paid', np.where(amount_paid > 0, 'Partial', 'Pending')).astype(object)
+        due_dates = np.array([f'{admission_year + s // 2}-{"08" if s % 2 else "01"}-15'
+                              for s in range(1, semesters + 1)], dtype=object)[f_sem - 1]
+        fee_status = np.where((fee_status != 'Paid') & (due_dates < as_of.isoformat()), 'Overdue', fee_status)
+        paid_date = np.where(amount_paid > 0, due_dates, None)
+        txn = np.where(amount_paid > 0, np.char.add(f'TXN{seed}-', np.arange(1, n_fees + 1).astype(str)).astype(object), None)
+        cursor.executemany('''
+            INSERT INTO fees
+            (user_id, semester, amount_due, amount_paid, fee_status, due_date, paid_date, transaction_id, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', _rows(f_user, f_sem, amount_due, amount_paid, fee_status, due_dates, paid_date, txn,
+                   np.char.add(due_dates.astype(str), ' 00:00:00').astype(object)))
+        fee_repository.fill_derived_tables(conn)
+        counts['fees'] = n_fees
+
+        # ------------------------------------------------------------------
+        # Tickets, service requests and their workflow tracking
+        # ------------------------------------------------------------------
+        staff_ids = np.concatenate([admin_ids, faculty_ids])
+
+        t_user = _per_owner(rng, student_ids, tickets_per_student)
+        n_tickets = len(t_user)
+        t_category = _choice(rng, TICKET_CATEGORIES, n_tickets)
+        t_status = _choice(rng, TICKET_STATUSES, n_tickets, p=[0.25, 0.2, 0.45, 0.1])
+        t_created = _timestamps(rng, n_tickets, as_of, 365)
+        t_done = np.isin(t_status, ['Resolved', 'Closed'])
+        resolved_at = np.where(t_done, t_created, None)
+        resolved_by = np.where(t_done, rng.choice(staff_ids, size=n_tickets), None)
+        cursor.executemany('''
+            INSERT INTO tickets
+            (ticket_id, user_id, title, description, category, priority, status, created_at, resolved_at, resolved_by)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', _rows(np.arange(1, n_tickets + 1), t_user, t_category + ' issue',
+                   t_category + ' issue reported by student', t_category,
+                   _choice(rng, PRIORITIES, n_tickets, p=[0.4, 0.4, 0.2]), t_status, t_created,
+                   resolved_at, resolved_by))
+        counts['tickets'] = n_tickets
+
+        r_user = _per_owner(rng, student_ids, requests_per_student)
+        n_requests = len(r_user)
+        r_category = _choice(rng, REQUEST_CATEGORIES, n_requests)
+        r_status = _choice(rng, REQUEST_STATUSES, n_requests, p=[0.3, 0.25, 0.45])
+        r_created = _timestamps(rng, n_requests, as_of, 365)
+        cursor.executemany('''
+            INSERT INTO service_requests
+            (request_id, user_id, title, description, category, priority, status, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', _rows(np.arange(1, n_requests + 1), r_user, r_category + ' request',
+                   r_category + ' request submitted by student', r_category,
+                   _choice(rng, PRIORITIES, n_requests, p=[0.4, 0.4, 0.2]), r_status, r_created, r_created))
+        counts['service_requests'] = n_requests
+
+        # Requests get 1-3 stages depending on how far they progressed; tickets 1-4
+        r_stages = np.array([REQUEST_STATUSES.index(s) + 1 for s in r_status.tolist()])
+        t_stages = np.array([TICKET_STATUSES.index(s) + 1 for s in t_status.tolist()])
+        w_request = np.repeat(np.arange(1, n_requests + 1), r_stages)
+        w_ticket = np.repeat(np.arange(1, n_tickets + 1), t_stages)
+        w_req_step = np.concatenate([np.arange(n) for n in r_stages]) if n_requests else np.array([], dtype=int)
+        w_tkt_step = np.concatenate([np.arange(n) for n in t_stages]) if n_tickets else np.array([], dtype=int)
+        stage_names = np.asarray(WORKFLOW_STAGES, dtype=object)
+        stage_of = np.array([0, 2, 5, 5])
+        n_workflow = len(w_request) + len(w_ticket)
+        assignees = rng.choice(staff_ids, size=n_workflow)
+        cursor.executemany('''
+            INSERT INTO workflow_events
+            (entity_type, entity_id, stage, progress_percentage, assigned_to, notes, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', _rows(np.concatenate([np.full(len(w_request), 'request'), np.full(len(w_ticket), 'ticket')]).astype(object),
+                   np.concatenate([w_request, w_ticket]),
+                   np.concatenate([stage_names[stage_of[w_req_step]], stage_names[stage_of[w_tkt_step]]]),
+                   np.concatenate([(w_req_step + 1) * 100 // 3, (w_tkt_step + 1) * 25]).clip(0, 100),
+                   assignees, np.full(n_workflow, ''),
+                   np.concatenate([np.repeat(r_created, r_stages), np.repeat(t_created, t_stages)])))
+        rebuild_workflow_state(conn)
+        counts['workflow_events'] = n_workflow
+
+        # ------------------------------------------------------------------
+        # Notifications, document metadata and placements
+        # ------------------------------------------------------------------
+        n_user = _per_owner(rng, student_ids, notifications_per_student)
+        n_notifications = len(n_user)
+        n_type = _choice(rng, NOTIFICATION_TYPES, n_notifications, p=[0.6, 0.2, 0.15, 0.05])
+        cursor.executemany('''
+            INSERT INTO notifications (user_id, title, message, type, is_read, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', _rows(n_user, 'Portal update (' + n_type + ')',
+                   np.full(n_notifications, 'Automatically generated notification', dtype=object),
+                   n_type, (rng.random(n_notifications) < 0.7).astype(int),
+                   _timestamps(rng, n_notifications, as_of, 180)))
+        counts['notifications'] = n_notifications
+
+        d_user = _per_owner(rng, student_ids, documents_per_student)
+        n_documents = len(d_user)
+        d_type = _choice(rng, DOCUMENT_TYPES, n_documents)
+        d_name = np.char.add(np.char.replace(d_type.astype(str), ' ', '_').astype(object) + '_',
+                             np.arange(1, n_documents + 1).astype(str)).astype(object) + '.pdf'
+        cursor.executemany('''
+            INSERT INTO documents (user_id, filename, file_path, doc_type, uploaded_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', _rows(d_user, d_name, 'documents/' + d_user.astype(str).astype(object) + '_' + d_name,
+                   d_type, _timestamps(rng, n_documents, as_of, 4 * 365)))
+        counts['documents'] = n_documents
+
+        # Historical placement outcomes correlate with CGPA and attendance
+        final_cgpa = cgpa[:, -1]
+        placed_prob = 1 / (1 + np.exp(-(2.2 * (final_cgpa - 2.3) + 0.05 * (sem_attendance.mean(axis=1) - 80))))
+        placed = rng.random(students) < placed_prob
+        in_drive = rng.random(students) < 0.6
+        p_ids = student_ids[in_drive]
+        n_placements = len(p_ids)
+        p_placed = placed[in_drive]
+        cursor.executemany('''
+            INSERT INTO placement_records
+            (user_id, company_name, package, position, placement_date, placement_status,
+             eligibility_criteria_met, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', _rows(p_ids, _choice(rng, COMPANIES, n_placements),
+                   np.where(p_placed, np.round(rng.uniform(3.5, 24, n_placements), 1), None),
+                   _choice(rng, ['Software Engineer', 'Analyst', 'Graduate Engineer Trainee'], n_placements),
+                   _timestamps(rng, n_placements, as_of, 365).astype('U10'),
+                   np.where(p_placed, 'Placed', 'Not Placed').astype(object),
+                   eligible[in_drive, -1].astype(int), [stamp] * n_placements))
+        counts['placement_records'] = n_placements
+
+        # Indexes first ('index' sorts before 'trigger'), then the triggers
+        for sql in deferred_sql:
+            cursor.execute(sql)
+        cursor.execute('UPDATE cache_versions SET version = version + 1')
+
+        cursor.execute('COMMIT')
+    except Exception:
+        cursor.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+    counts['elapsed_seconds'] = round(time.perf_counter() - started, 2)
+    return counts
+
+def generate_scale(scale: str, seed: int = 42, as_of: Optional[date] = None, reset: bool = True) -> Dict[str, int]:
+    """Generate one of the named SCALES ('small', 'medium', 'large')"""
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale '{scale}', expected one of {sorted(SCALES)}")
+    return generate_dataset(seed=seed, as_of=as_of, reset=reset, **SCALES[scale])
+
+def parse_as_of(value: Optional[str]) -> Optional[date]:
+    """Parse an --as-of YYYY-MM-DD argument"""
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
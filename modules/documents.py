@@ -3,6 +3,7 @@ import os
 import sqlite3
 from datetime import datetime
 from modules.database import get_db_connection
+from modules import metrics
 
 UPLOAD_FOLDER = "documents"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -32,6 +33,7 @@ def upload_document(user_id, uploaded_file, doc_type="General"):
             file_path = os.path.join(UPLOAD_FOLDER, f"{user_id}_{datetime.now().timestamp()}_{uploaded_file.name}")
             with open(file_path, "wb") as f:
                 f.write(uploaded_file.getbuffer())
+            metrics.UPLOAD_BYTES.observe(uploaded_file.size, kind='document')
             
             # Store in database
             with get_db_connection() as conn:
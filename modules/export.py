@@ -2,11 +2,12 @@ import streamlit as st
 import pandas as pd
 from io import BytesIO
 from modules.database import get_db_connection
+from modules import metrics
 
 def export_to_csv(user_id, export_type="all"):
     """Export data to CSV"""
     try:
-        with get_db_connection() as conn:
+        with metrics.EXPORT_SECONDS.time(format='csv'), get_db_connection() as conn:
             cursor = conn.cursor()
             
             data = {}
@@ -46,7 +47,7 @@ def export_to_csv(user_id, export_type="all"):
 def export_to_pdf_simple(user_id):
     """Generate simple PDF report"""
     try:
-        with get_db_connection() as conn:
+        with metrics.EXPORT_SECONDS.time(format='pdf'), get_db_connection() as conn:
             cursor = conn.cursor()
             
             cursor.execute("SELECT name, email FROM users WHERE user_id = ?", (user_id,))
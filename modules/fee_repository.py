@@ -0,0 +1,579 @@
+"""
+Fee Repository
+The one place that defines the fee schema and the SQL that reads and writes
+it. modules.fees (admin and student fee pages), database.update_fee_record /
+get_student_fees, the overdue sweeper and statement reconciliation all go
+through the statements here.
+
+Schema: fees (one row per student per semester, UNIQUE(user_id, semester)),
+the append-only fee_payments ledger, per-student fee_totals, and the finance
+rollups (monthly collections are summed from fee_collection_log). Triggers on
+fees keep the totals, log and rollups current.
+
+Databases created by the old modules/fees.py have fees(id, total_amount,
+paid_amount, status). init_fee_schema migrates them once: a copy of the old
+rows is kept in fees_legacy_backup, and rows for the same student and
+semester are merged. The fees_v1 view exposes the old column names for
+reports written against them.
+"""
+
+import uuid
+from typing import Dict, List, Optional
+
+from modules import database
+
+# ============================================================================
+# SCHEMA
+# ============================================================================
+
+FEES_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        fee_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        semester INTEGER NOT NULL,
+        amount_due REAL NOT NULL,
+        amount_paid REAL DEFAULT 0.0,
+        fee_status TEXT DEFAULT 'Pending',
+        due_date TEXT,
+        paid_date TEXT,
+        transaction_id TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(user_id),
+        UNIQUE(user_id, semester)
+    )
+"""
+
+FEE_INDEXES_SQL = [
+    # Overdue sweeper: status + due-date range seeks
+    "CREATE INDEX IF NOT EXISTS idx_fees_status_due ON fees(fee_status, due_date)",
+    # Reconciliation: transaction id lookups
+    "CREATE INDEX IF NOT EXISTS idx_fees_transaction ON fees(transaction_id)",
+]
+
+# A fee's department, for the rollup triggers
+_DEPARTMENT = ("COALESCE((SELECT department FROM student_profiles WHERE user_id = {row}.user_id), "
+               "'Unassigned')")
+
+FEE_TABLES_SQL = [
+    # Append-only: one row per payment, never updated or deleted
+    """
+    CREATE TABLE IF NOT EXISTS fee_payments (
+        payment_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fee_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        amount REAL NOT NULL CHECK (amount > 0),
+        transaction_id TEXT NOT NULL UNIQUE,
+        idempotency_key TEXT UNIQUE,
+        method TEXT DEFAULT 'Manual',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (fee_id) REFERENCES fees(fee_id),
+        FOREIGN KEY (user_id) REFERENCES users(user_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_fee_payments_fee ON fee_payments(fee_id)",
+    "CREATE INDEX IF NOT EXISTS idx_fee_payments_user ON fee_payments(user_id, created_at)",
+    """
+    CREATE TRIGGER IF NOT EXISTS fee_payments_no_update BEFORE UPDATE ON fee_payments
+    BEGIN SELECT RAISE(ABORT, 'fee_payments is append-only'); END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fee_payments_no_delete BEFORE DELETE ON fee_payments
+    BEGIN SELECT RAISE(ABORT, 'fee_payments is append-only'); END
+    """,
+    # Running totals per student, kept in step with fees by triggers
+    """
+    CREATE TABLE IF NOT EXISTS fee_totals (
+        user_id INTEGER PRIMARY KEY,
+        total_due REAL NOT NULL DEFAULT 0,
+        total_paid REAL NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fee_totals_insert AFTER INSERT ON fees
+    BEGIN
+        INSERT INTO fee_totals (user_id, total_due, total_paid)
+        VALUES (NEW.user_id, NEW.amount_due, COALESCE(NEW.amount_paid, 0))
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_due = total_due + excluded.total_due,
+            total_paid = total_paid + excluded.total_paid;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fee_totals_update AFTER UPDATE OF user_id, amount_due, amount_paid ON fees
+    BEGIN
+        UPDATE fee_totals SET total_due = total_due - OLD.amount_due,
+                              total_paid = total_paid - COALESCE(OLD.amount_paid, 0)
+        WHERE user_id = OLD.user_id;
+        INSERT INTO fee_totals (user_id, total_due, total_paid)
+        VALUES (NEW.user_id, NEW.amount_due, COALESCE(NEW.amount_paid, 0))
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_due = total_due + excluded.total_due,
+            total_paid = total_paid + excluded.total_paid;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fee_totals_delete AFTER DELETE ON fees
+    BEGIN
+        UPDATE fee_totals SET total_due = total_due - OLD.amount_due,
+                              total_paid = total_paid - COALESCE(OLD.amount_paid, 0)
+        WHERE user_id = OLD.user_id;
+    END
+    """,
+    # Institution-wide rollups for the finance dashboard, also kept by triggers
+    """
+    CREATE TABLE IF NOT EXISTS fee_rollups (
+        department TEXT NOT NULL,
+        semester INTEGER NOT NULL,
+        fee_status TEXT NOT NULL,
+        fee_count INTEGER NOT NULL DEFAULT 0,
+        amount_due REAL NOT NULL DEFAULT 0,
+        amount_paid REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (department, semester, fee_status)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS fee_collections_monthly (
+        month TEXT NOT NULL,
+        department TEXT NOT NULL,
+        amount_collected REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (month, department)
+    ) WITHOUT ROWID
+    """,
+    # Where each fee's collected amount was booked. A new fee books its amount_paid
+    # to its paid_date (or created_at) month; a later change books the difference
+    # to the month it was made; a deleted fee takes back exactly what it booked.
+    # The rows for a fee always sum to its amount_paid.
+    """
+    CREATE TABLE IF NOT EXISTS fee_collection_log (
+        entry_id INTEGER PRIMARY KEY,
+        fee_id INTEGER NOT NULL,
+        month TEXT NOT NULL,
+        department TEXT NOT NULL,
+        amount REAL NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_fee_collection_log_fee ON fee_collection_log(fee_id)",
+    """
+    CREATE TRIGGER IF NOT EXISTS fee_collection_log_insert AFTER INSERT ON fee_collection_log
+    BEGIN
+        INSERT INTO fee_collections_monthly (month, department, amount_collected)
+        VALUES (NEW.month, NEW.department, NEW.amount)
+        ON CONFLICT(month, department) DO UPDATE SET amount_collected = amount_collected + excluded.amount_collected;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS fee_collection_log_delete AFTER DELETE ON fee_collection_log
+    BEGIN
+        UPDATE fee_collections_monthly SET amount_collected = amount_collected - OLD.amount
+        WHERE month = OLD.month AND department = OLD.department;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fee_rollups_insert AFTER INSERT ON fees
+    BEGIN
+        INSERT INTO fee_rollups (department, semester, fee_status, fee_count, amount_due, amount_paid)
+        VALUES ({_DEPARTMENT.format(row='NEW')}, NEW.semester, COALESCE(NEW.fee_status, 'Pending'), 1,
+                NEW.amount_due, COALESCE(NEW.amount_paid, 0))
+        ON CONFLICT(department, semester, fee_status) DO UPDATE SET
+            fee_count = fee_count + 1,
+            amount_due = amount_due + excluded.amount_due,
+            amount_paid = amount_paid + excluded.amount_paid;
+        INSERT INTO fee_collection_log (fee_id, month, department, amount)
+        SELECT NEW.fee_id, strftime('%Y-%m', COALESCE(NEW.paid_date, NEW.created_at)),
+               {_DEPARTMENT.format(row='NEW')}, NEW.amount_paid
+        WHERE COALESCE(NEW.amount_paid, 0) != 0;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fee_rollups_update
+    AFTER UPDATE OF user_id, semester, amount_due, amount_paid, fee_status ON fees
+    BEGIN
+        UPDATE fee_rollups SET fee_count = fee_count - 1,
+                               amount_due = amount_due - OLD.amount_due,
+                               amount_paid = amount_paid - COALESCE(OLD.amount_paid, 0)
+        WHERE department = {_DEPARTMENT.format(row='OLD')} AND semester = OLD.semester
+          AND fee_status = COALESCE(OLD.fee_status, 'Pending');
+        INSERT INTO fee_rollups (department, semester, fee_status, fee_count, amount_due, amount_paid)
+        VALUES ({_DEPARTMENT.format(row='NEW')}, NEW.semester, COALESCE(NEW.fee_status, 'Pending'), 1,
+                NEW.amount_due, COALESCE(NEW.amount_paid, 0))
+        ON CONFLICT(department, semester, fee_status) DO UPDATE SET
+            fee_count = fee_count + 1,
+            amount_due = amount_due + excluded.amount_due,
+            amount_paid = amount_paid + excluded.amount_paid;
+        INSERT INTO fee_collection_log (fee_id, month, department, amount)
+        SELECT NEW.fee_id, strftime('%Y-%m', 'now'), {_DEPARTMENT.format(row='NEW')},
+               COALESCE(NEW.amount_paid, 0) - COALESCE(OLD.amount_paid, 0)
+        WHERE COALESCE(NEW.amount_paid, 0) != COALESCE(OLD.amount_paid, 0);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS fee_rollups_delete AFTER DELETE ON fees
+    BEGIN
+        UPDATE fee_rollups SET fee_count = fee_count - 1,
+                               amount_due = amount_due - OLD.amount_due,
+                               amount_paid = amount_paid - COALESCE(OLD.amount_paid, 0)
+        WHERE department = {_DEPARTMENT.format(row='OLD')} AND semester = OLD.semester
+          AND fee_status = COALESCE(OLD.fee_status, 'Pending');
+        DELETE FROM fee_collection_log WHERE fee_id = OLD.fee_id;
+    END
+    """,
+]
+
+# Triggers that booked fee_collections_monthly directly, before fee_collection_log
+_OLD_ROLLUP_TRIGGERS = ('fee_rollups_insert', 'fee_rollups_update', 'fee_rollups_delete')
+
+
+COMPAT_VIEWS_SQL = [
+    # Column names of the old modules/fees.py schema
+    """
+    CREATE VIEW IF NOT EXISTS fees_v1 AS
+    SELECT fee_id AS id, user_id, semester, amount_due AS total_amount, amount_paid AS paid_amount,
+           fee_status AS status, due_date, paid_date, created_at
+    FROM fees
+    """,
+    """
+    CREATE VIEW IF NOT EXISTS student_fee_summary AS
+    SELECT user_id, total_due, total_paid, total_due - total_paid AS outstanding FROM fee_totals
+    """,
+]
+
+# ============================================================================
+# MIGRATION
+# ============================================================================
+
+def _migrate_legacy_fees(conn) -> bool:
+    """Rebuild an old fees(id, total_amount, ...) table in the current shape; True if it ran"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(fees)")}
+    if not columns or 'fee_id' in columns:
+        return False
+    # Table rebuilds must run with foreign keys off (and outside a transaction to switch them)
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(fees)")}
+        if 'fee_id' in columns:  # another process got there first
+            conn.execute("ROLLBACK")
+            return False
+        for (name,) in conn.execute("""
+            SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'fees'
+        """).fetchall():
+            conn.execute(f'DROP TRIGGER "{name}"')
+        conn.execute("DROP VIEW IF EXISTS fees_v1")
+        conn.execute("CREATE TABLE IF NOT EXISTS fees_legacy_backup AS SELECT * FROM fees")
+        conn.execute(FEES_TABLE_SQL.format(name='fees_migrated'))
+        conn.execute("""
+            INSERT INTO fees_migrated
+            (fee_id, user_id, semester, amount_due, amount_paid, fee_status, due_date, paid_date, created_at)
+            SELECT MIN(id), user_id, COALESCE(semester, 0), SUM(COALESCE(total_amount, 0)),
+                   SUM(COALESCE(paid_amount, 0)),
+                   CASE WHEN SUM(COALESCE(paid_amount, 0)) >= SUM(COALESCE(total_amount, 0)) THEN 'Paid'
+                        WHEN MAX(status = 'Overdue') THEN 'Overdue'
+                        WHEN SUM(COALESCE(paid_amount, 0)) > 0 THEN 'Partial'
+                        ELSE 'Pending' END,
+                   MIN(due_date), MAX(paid_date), MIN(created_at)
+            FROM fees GROUP BY user_id, COALESCE(semester, 0)
+        """)
+        conn.execute("DROP TABLE fees")
+        conn.execute("ALTER TABLE fees_migrated RENAME TO fees")
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    print("Migrated legacy fees table (old rows kept in fees_legacy_backup)")
+    return True
+
+def _fill_totals(conn):
+    conn.execute("DELETE FROM fee_totals")
+    conn.execute("""
+        INSERT INTO fee_totals (user_id, total_due, total_paid)
+        SELECT user_id, SUM(amount_due), SUM(COALESCE(amount_paid, 0)) FROM fees GROUP BY user_id
+    """)
+
+_ready_path = None
+
+def init_fee_schema():
+    """Create (or migrate) the fee tables, indexes, triggers and views"""
+    global _ready_path
+    conn = database.get_connection()
+    conn.isolation_level = None
+    try:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        migrated = _migrate_legacy_fees(conn)
+        conn.execute("BEGIN")
+        if 'fee_collection_log' not in existing:
+            for name in _OLD_ROLLUP_TRIGGERS:
+                conn.execute(f'DROP TRIGGER IF EXISTS "{name}"')
+        conn.execute(FEES_TABLE_SQL.format(name='fees'))
+        for statement in FEE_INDEXES_SQL + FEE_TABLES_SQL + COMPAT_VIEWS_SQL:
+            conn.execute(statement)
+        # Derived tables are filled once, when they are new or the fees were rebuilt
+        if migrated or 'fee_totals' not in existing:
+            _fill_totals(conn)
+        if migrated or 'fee_rollups' not in existing:
+            _fill_rollups(conn)
+        if migrated or 'fee_collection_log' not in existing:
+            _fill_collection_log(conn)
+            _fill_collections(conn)
+        conn.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    _ready_path = database.DATABASE_PATH
+
+def ensure_schema():
+    """init_fee_schema once per database path in this process"""
+    if _ready_path != database.DATABASE_PATH:
+        init_fee_schema()
+
+# ============================================================================
+# STATEMENTS
+# ============================================================================
+
+# Apply one payment: (amount, amount, transaction_id, fee_id). The new total is
+# computed by SQLite, so concurrent payments cannot overwrite each other. The
+# fee keeps its first transaction id; fee_payments has all of them.
+APPLY_PAYMENT_SQL = """
+    UPDATE fees
+    SET amount_paid = COALESCE(amount_paid, 0) + ?,
+        fee_status = CASE WHEN COALESCE(amount_paid, 0) + ? >= amount_due THEN 'Paid'
+                          WHEN fee_status = 'Overdue' THEN 'Overdue' ELSE 'Partial' END,
+        paid_date = CURRENT_TIMESTAMP,
+        transaction_id = COALESCE(transaction_id, ?)
+    WHERE fee_id = ?
+"""
+
+# Its ledger entry: (amount, transaction_id, idempotency_key, method, fee_id)
+INSERT_PAYMENT_SQL = """
+    INSERT INTO fee_payments (fee_id, user_id, amount, transaction_id, idempotency_key, method)
+    SELECT fee_id, user_id, ?, ?, ?, ? FROM fees WHERE fee_id = ?
+"""
+
+STUDENT_FEES_SQL = """
+    SELECT fee_id, user_id, semester, amount_due, COALESCE(amount_paid, 0) AS amount_paid,
+           amount_due - COALESCE(amount_paid, 0) AS outstanding, fee_status,
+           due_date, paid_date, transaction_id, created_at
+    FROM fees WHERE user_id = ? ORDER BY semester
+"""
+
+FEE_SUMMARY_SQL = """
+    SELECT total_due, total_paid, total_due - total_paid AS outstanding FROM fee_totals WHERE user_id = ?
+"""
+
+PAYMENT_HISTORY_SQL = """
+    SELECT p.payment_id, f.semester, p.amount, p.transaction_id, p.method, p.created_at
+    FROM fee_payments p JOIN fees f ON f.fee_id = p.fee_id
+    WHERE p.user_id = ? ORDER BY p.created_at DESC, p.payment_id DESC
+"""
+
+STUDENT_BY_ROLL_SQL = """
+    SELECT sp.user_id, sp.roll_number, sp.department, u.full_name
+    FROM student_profiles sp JOIN users u ON u.user_id = sp.user_id
+    WHERE sp.roll_number = ?
+"""
+
+INSERT_FEE_SQL = """
+    INSERT INTO fees (user_id, semester, amount_due, due_date, fee_status) VALUES (?, ?, ?, ?, 'Pending')
+"""
+
+# (user_id, semester, amount_due, amount_paid, fee_status)
+UPSERT_FEE_SQL = """
+    INSERT INTO fees (user_id, semester, amount_due, amount_paid, fee_status) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(user_id, semester) DO UPDATE SET
+        amount_due = excluded.amount_due,
+        amount_paid = excluded.amount_paid,
+        fee_status = excluded.fee_status
+"""
+
+
+# ============================================================================
+# READS AND WRITES
+# ============================================================================
+
+def get_student_fees(user_id: int) -> List[Dict]:
+    """A student's fees, oldest semester first"""
+    ensure_schema()
+    with database.get_db_connection() as conn:
+        return [dict(row) for row in conn.execute(STUDENT_FEES_SQL, (user_id,))]
+
+def get_fee_summary(user_id: int) -> Dict:
+    """Total due, paid and outstanding for a student (one fee_totals lookup)"""
+    ensure_schema()
+    with database.get_db_connection() as conn:
+        row = conn.execute(FEE_SUMMARY_SQL, (user_id,)).fetchone()
+    return dict(row) if row else {'total_due': 0, 'total_paid': 0, 'outstanding': 0}
+
+def get_payment_history(user_id: int) -> List[Dict]:
+    """Ledger entries for a student, newest first"""
+    ensure_schema()
+    with database.get_db_connection() as conn:
+        return [dict(row) for row in conn.execute(PAYMENT_HISTORY_SQL, (user_id,))]
+
+def get_student_fee_overview(user_id: int) -> Dict:
+    """Summary, fees and payments for a fee page, on one connection"""
+    ensure_schema()
+    with database.get_db_connection() as conn:
+        summary = conn.execute(FEE_SUMMARY_SQL, (user_id,)).fetchone()
+        return {
+            'summary': dict(summary) if summary else {'total_due': 0, 'total_paid': 0, 'outstanding': 0},
+            'fees': [dict(row) for row in conn.execute(STUDENT_FEES_SQL, (user_id,))],
+            'payments': [dict(row) for row in conn.execute(PAYMENT_HISTORY_SQL, (user_id,))],
+        }
+
+def find_student(roll_number: str) -> Optional[Dict]:
+    """The student a fee lookup by roll number refers to"""
+    with database.get_db_connection() as conn:
+        row = conn.execute(STUDENT_BY_ROLL_SQL, (roll_number.strip().upper(),)).fetchone()
+    return dict(row) if row else None
+
+def add_fee(user_id: int, semester: int, amount_due: float, due_date=None) -> int:
+    """Bill a student for a semester; returns the new fee_id"""
+    ensure_schema()
+    with database.get_db_connection() as conn:
+        cursor = conn.execute(INSERT_FEE_SQL, (user_id, semester, amount_due, str(due_date) if due_date else None))
+        conn.commit()
+        return cursor.lastrowid
+
+def upsert_fee(user_id: int, semester: int, amount_due: float, amount_paid: float, fee_status: str):
+    """Create or overwrite a student's fee for a semester in one statement"""
+    ensure_schema()
+    with database.get_db_connection() as conn:
+        conn.execute(UPSERT_FEE_SQL, (user_id, semester, amount_due, amount_paid, fee_status))
+        conn.commit()
+
+def record_payment(fee_id, amount, transaction_id=None, idempotency_key=None, method='Manual'):
+    """Append a payment to the ledger and apply it to the fee in one transaction.
+
+    A repeated idempotency_key returns the original payment instead of paying
+    twice. Returns the ledger row as a dict, or None if the fee does not exist.
+    """
+    if amount is None or amount <= 0:
+        raise ValueError("Payment amount must be positive")
+    ensure_schema()
+    conn = database.get_connection()
+    conn.isolation_level = None
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        if idempotency_key:
+            existing = conn.execute('SELECT * FROM fee_payments WHERE idempotency_key = ?',
+                                    (idempotency_key,)).fetchone()
+            if existing:
+                conn.execute('COMMIT')
+                return dict(existing)
+        transaction_id = transaction_id or f"PAY-{uuid.uuid4().hex[:16].upper()}"
+        if not conn.execute(APPLY_PAYMENT_SQL, (amount, amount, transaction_id, fee_id)).rowcount:
+            conn.execute('ROLLBACK')
+            return None
+        cursor = conn.execute(INSERT_PAYMENT_SQL, (amount, transaction_id, idempotency_key, method, fee_id))
+        payment = conn.execute('SELECT * FROM fee_payments WHERE payment_id = ?', (cursor.lastrowid,)).fetchone()
+        conn.execute('COMMIT')
+        return dict(payment)
+    except Exception:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+# ============================================================================
+# FINANCE ROLLUPS
+# ============================================================================
+
+def _fill_rollups(conn):
+    conn.execute("DELETE FROM fee_rollups")
+    conn.execute(f"""
+        INSERT INTO fee_rollups (department, semester, fee_status, fee_count, amount_due, amount_paid)
+        SELECT {_DEPARTMENT.format(row='f')} AS department, f.semester, COALESCE(f.fee_status, 'Pending'),
+               COUNT(*), SUM(f.amount_due), SUM(COALESCE(f.amount_paid, 0))
+        FROM fees f GROUP BY 1, 2, 3
+    """)
+
+def _fill_collection_log(conn):
+    # Same rule as fee_rollups_insert: what a fee has collected so far, in its paid month
+    conn.execute("DELETE FROM fee_collection_log")
+    conn.execute(f"""
+        INSERT INTO fee_collection_log (fee_id, month, department, amount)
+        SELECT f.fee_id, strftime('%Y-%m', COALESCE(f.paid_date, f.created_at)),
+               {_DEPARTMENT.format(row='f')}, f.amount_paid
+        FROM fees f WHERE COALESCE(f.amount_paid, 0) != 0
+    """)
+
+def _fill_collections(conn):
+    conn.execute("DELETE FROM fee_collections_monthly")
+    conn.execute("""
+        INSERT INTO fee_collections_monthly (month, department, amount_collected)
+        SELECT month, department, SUM(amount) FROM fee_collection_log GROUP BY month, department
+    """)
+
+def fill_derived_tables(conn):
+    """Recompute fee_totals, the rollups and the collection log from fees on conn.
+
+    For bulk loads that insert fees with the fee triggers dropped; the caller commits.
+    """
+    _fill_totals(conn)
+    _fill_rollups(conn)
+    _fill_collection_log(conn)
+    _fill_collections(conn)
+
+def rebuild_fee_rollups():
+    """Recompute the finance rollups from fees (e.g. after students change department)
+
+    Monthly collections are re-summed from fee_collection_log, so they keep the
+    months payments were booked to and only move to the students' current departments.
+    """
+    ensure_schema()
+    with database.get_db_connection() as conn:
+        _fill_rollups(conn)
+        conn.execute(f"""
+            UPDATE fee_collection_log SET department = COALESCE(
+                (SELECT {_DEPARTMENT.format(row='f')} FROM fees f WHERE f.fee_id = fee_collection_log.fee_id),
+                department)
+        """)
+        _fill_collections(conn)
+        conn.commit()
+
+def get_collection_summary(group_by='department'):
+    """Collected vs outstanding per department or semester, read from the rollups"""
+    column = {'department': 'department', 'semester': 'semester'}[group_by]
+    try:
+        ensure_schema()
+        with database.get_db_connection() as conn:
+            return [dict(row) for row in conn.execute(f"""
+                SELECT {column},
+                       SUM(fee_count) AS fees,
+                       SUM(amount_due) AS amount_due,
+                       SUM(amount_paid) AS collected,
+                       SUM(amount_due - amount_paid) AS outstanding,
+                       SUM(CASE WHEN fee_status = 'Overdue' THEN fee_count ELSE 0 END) AS overdue_fees,
+                       SUM(CASE WHEN fee_status = 'Overdue' THEN amount_due - amount_paid ELSE 0 END)
+                           AS overdue_amount
+                FROM fee_rollups GROUP BY {column} HAVING SUM(fee_count) > 0 ORDER BY {column}
+            """)]
+    except Exception as e:
+        print(f"Error getting fee rollups: {e}")
+        return []
+
+def get_monthly_collections(department=None):
+    """Amount collected per month (optionally for one department)"""
+    try:
+        ensure_schema()
+        with database.get_db_connection() as conn:
+            if department:
+                rows = conn.execute("""
+                    SELECT month, amount_collected AS collected FROM fee_collections_monthly
+                    WHERE department = ? ORDER BY month
+                """, (department,))
+            else:
+                rows = conn.execute("""
+                    SELECT month, SUM(amount_collected) AS collected FROM fee_collections_monthly
+                    GROUP BY month ORDER BY month
+                """)
+            return [dict(row) for row in rows]
+    except Exception as e:
+        print(f"Error getting monthly collections: {e}")
+        return []
@@ -0,0 +1,151 @@
+"""
+Overdue Fee Sweeper
+Marks Pending and Partial fees as Overdue once their due date has passed and
+sends each student a reminder.
+
+Each run flips the newly overdue fees with one UPDATE ... RETURNING and inserts
+all reminders with one executemany, in the same transaction. Only the delta
+since the previous run is examined:
+  - fees whose due_date fell between the last run's date and today, found with
+    a range seek on idx_fees_status_due;
+  - fees created since the last run (fee_id above its watermark) that were
+    already past due when added.
+The watermarks are kept in fee_sweeps, one row per run, so nightly runs touch
+only a day's worth of fees however large the table grows. A run with an
+--as-of date before the watermark never moves either watermark forward.
+
+The sweeper runs in a background thread every ERP_FEE_SWEEP_INTERVAL seconds
+(default 3600); ERP_FEE_SWEEP=0 disables it. It can also run from cron:
+    python -m modules.fee_sweeper [--as-of YYYY-MM-DD]
+"""
+
+import argparse
+import os
+import threading
+from datetime import date
+from typing import Dict, Optional
+
+from modules import database, fee_repository, metrics
+
+OVERDUE_FROM = ('Pending', 'Partial')
+SWEEP_INTERVAL = float(os.environ.get('ERP_FEE_SWEEP_INTERVAL', '3600'))
+
+_enabled = os.environ.get('ERP_FEE_SWEEP', '1') == '1'
+_thread = None
+_thread_lock = threading.Lock()
+_stop = threading.Event()
+
+def init_sweeper_tables():
+    """Create the run log holding the watermarks (idx_fees_status_due comes with the fee schema)"""
+    from modules.notifications import init_notifications_table
+
+    init_notifications_table()
+    fee_repository.ensure_schema()
+    with database.get_db_connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS fee_sweeps (
+                sweep_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                as_of TEXT NOT NULL,
+                due_watermark TEXT NOT NULL,
+                fee_id_watermark INTEGER NOT NULL,
+                marked_overdue INTEGER NOT NULL,
+                reminders_sent INTEGER NOT NULL
+            )
+        ''')
+        conn.commit()
+
+def sweep_overdue(as_of: Optional[date] = None) -> Dict:
+    """Flip newly overdue fees and queue their reminders; returns the run's counts"""
+    today = (as_of or date.today()).isoformat()
+    placeholders = ','.join('?' * len(OVERDUE_FROM))
+    conn = database.get_connection()
+    conn.isolation_level = None
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        last = conn.execute('''
+            SELECT due_watermark, fee_id_watermark FROM fee_sweeps ORDER BY sweep_id DESC LIMIT 1
+        ''').fetchone()
+        due_mark, id_mark = (last['due_watermark'], last['fee_id_watermark']) if last else ('', 0)
+        max_fee_id = conn.execute('SELECT COALESCE(MAX(fee_id), 0) FROM fees').fetchone()[0]
+
+        overdue = conn.execute(f'''
+            UPDATE fees SET fee_status = 'Overdue'
+            WHERE fee_id IN (
+                SELECT fee_id FROM fees
+                WHERE fee_status IN ({placeholders}) AND due_date >= ? AND due_date < ?
+                UNION
+                SELECT fee_id FROM fees
+                WHERE fee_id > ? AND fee_id <= ? AND fee_status IN ({placeholders}) AND due_date < ?
+            )
+            RETURNING user_id, semester, amount_due - COALESCE(amount_paid, 0) AS outstanding, due_date
+        ''', (*OVERDUE_FROM, due_mark, today, id_mark, max_fee_id, *OVERDUE_FROM, today)).fetchall()
+
+        reminders = [(row['user_id'], 'Fee overdue',
+                      f"Your semester {row['semester']} fee of ₹{row['outstanding']:,.2f} "
+                      f"was due on {row['due_date']}. Please pay it as soon as possible.", 'warning')
+                     for row in overdue]
+        conn.executemany('''
+            INSERT INTO notifications (user_id, title, message, type) VALUES (?, ?, ?, ?)
+        ''', reminders)
+        # A backdated run skips new fees due between its date and the due watermark, so it
+        # leaves the fee_id watermark where it was for the next sweep to check them
+        new_id_mark = max(id_mark, max_fee_id) if today >= due_mark else id_mark
+        conn.execute('''
+            INSERT INTO fee_sweeps (as_of, due_watermark, fee_id_watermark, marked_overdue, reminders_sent)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (today, max(due_mark, today), new_id_mark, len(overdue), len(reminders)))
+        conn.execute('COMMIT')
+    except Exception:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+    if overdue:
+        metrics.FEES_MARKED_OVERDUE.inc(len(overdue))
+        metrics.NOTIFICATION_FANOUT.observe(len(reminders))
+    return {'as_of': today, 'marked_overdue': len(overdue), 'reminders_sent': len(reminders)}
+
+def _run():
+    while not _stop.is_set():
+        try:
+            sweep_overdue()
+        except Exception as e:
+            print(f"Overdue fee sweep failed: {e}")
+        _stop.wait(SWEEP_INTERVAL)
+
+def start_sweeper() -> Optional[threading.Thread]:
+    """Create the tables and start the sweep thread (once per process)"""
+    global _thread
+    if not _enabled:
+        return None
+    with _thread_lock:
+        if _thread is None:
+            try:
+                init_sweeper_tables()
+            except Exception as e:
+                print(f"Overdue fee sweeper not started: {e}")
+                return None
+            _stop.clear()
+            _thread = threading.Thread(target=_run, name='erp-fee-sweeper', daemon=True)
+            _thread.start()
+    return _thread
+
+def stop_sweeper():
+    global _thread
+    with _thread_lock:
+        _stop.set()
+        if _thread is not None:
+            _thread.join(timeout=5)
+            _thread = None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mark past-due fees as Overdue and send reminders")
+    parser.add_argument("--as-of", type=date.fromisoformat, help="Sweep as of this date (default: today)")
+    args = parser.parse_args()
+    init_sweeper_tables()
+    result = sweep_overdue(args.as_of)
+    print(f"{result['as_of']}: {result['marked_overdue']} fees marked overdue, "
+          f"{result['reminders_sent']} reminders sent")
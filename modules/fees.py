@@ -1,103 +1,72 @@
+"""
+Fee Management UI
+The fee page shared by admins (who can also bill a student and record a
+payment) and students, who only see their fees and payment history.
+Every query and write goes through modules.fee_repository; the functions
+below keep the names and return shapes older callers use.
+"""
+
+import uuid
+
 import streamlit as st
-from modules.database import get_db_connection
+from modules import fee_repository
+from modules.fee_repository import (
+    get_collection_summary, get_monthly_collections, get_payment_history, rebuild_fee_rollups, record_payment,
+)
 
 def init_fees_table():
-    """Initialize fees table"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS fees (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                semester INTEGER,
-                total_amount REAL,
-                paid_amount REAL DEFAULT 0,
-                status TEXT DEFAULT 'Pending',
-                due_date DATE,
-                paid_date DATE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(user_id) REFERENCES users(user_id)
-            )
-        """)
-        conn.commit()
+    """Create or migrate the fee schema"""
+    fee_repository.init_fee_schema()
 
 def add_fee_record(user_id, semester, total_amount, due_date):
     """Add a fee record"""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO fees (user_id, semester, total_amount, due_date, status)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_id, semester, total_amount, due_date, 'Pending'))
-            conn.commit()
-            return True
+        fee_repository.add_fee(user_id, semester, total_amount, due_date)
+        return True
     except Exception as e:
         st.error(f"Failed to add fee: {str(e)}")
         return False
 
-def update_fee_payment(fee_id, paid_amount):
+def update_fee_payment(fee_id, paid_amount, idempotency_key=None):
     """Update fee payment"""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get current fee details
-            cursor.execute("SELECT total_amount, paid_amount FROM fees WHERE id = ?", (fee_id,))
-            result = cursor.fetchone()
-            if not result:
-                return False
-            
-            total, current_paid = result
-            new_paid = current_paid + paid_amount
-            status = 'Paid' if new_paid >= total else 'Partial'
-            
-            cursor.execute("""
-                UPDATE fees SET paid_amount = ?, status = ?, paid_date = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (new_paid, status, fee_id))
-            conn.commit()
-            return True
+        return record_payment(fee_id, paid_amount, idempotency_key=idempotency_key) is not None
     except Exception as e:
         st.error(f"Payment failed: {str(e)}")
         return False
 
+def _fee_tuple(fee):
+    return (fee['fee_id'], fee['semester'], fee['amount_due'], fee['amount_paid'], fee['fee_status'], fee['due_date'])
+
 def get_fee_details(user_id):
     """Get fee details for student"""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, semester, total_amount, paid_amount, status, due_date FROM fees
-                WHERE user_id = ? ORDER BY semester DESC
-            """, (user_id,))
-            return cursor.fetchall()
-    except:
+        return [_fee_tuple(fee) for fee in reversed(fee_repository.get_student_fees(user_id))]
+    except Exception as e:
+        print(f"Error getting fees: {e}")
         return []
 
 def get_fee_summary(user_id):
     """Get fee summary"""
     try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    SUM(total_amount) as total_due,
-                    SUM(paid_amount) as total_paid,
-                    SUM(total_amount - paid_amount) as outstanding
-                FROM fees WHERE user_id = ?
-            """, (user_id,))
-            result = cursor.fetchone()
-            return result if result else (0, 0, 0)
-    except:
+        summary = fee_repository.get_fee_summary(user_id)
+        return summary['total_due'], summary['total_paid'], summary['outstanding']
+    except Exception as e:
+        print(f"Error getting fee summary: {e}")
         return (0, 0, 0)
 
-def show_fee_management(user_id):
+def show_fee_management(user_id, admin=False):
     """Display fee management UI"""
     st.markdown("### 💰 Fee Management")
     
-    # Fee summary
-    total_due, total_paid, outstanding = get_fee_summary(user_id)
+    # Summary, fees and payments in one round of prepared queries
+    try:
+        overview = fee_repository.get_student_fee_overview(user_id)
+    except Exception as e:
+        st.error(f"Could not load fees: {str(e)}")
+        return
+    summary = overview['summary']
+    total_due, total_paid, outstanding = summary['total_due'], summary['total_paid'], summary['outstanding']
     
     col1, col2, col3 = st.columns(3)
     col1.metric("Total Due", f"₹{total_due:.2f}")
@@ -107,7 +76,7 @@ def show_fee_management(user_id):
     st.divider()
     
     # Add fee record (for admin)
-    if st.checkbox("Add Fee Record"):
+    if admin and st.checkbox("Add Fee Record"):
         col1, col2, col3 = st.columns(3)
         with col1:
             semester = st.number_input("Semester", min_value=1, max_value=8)
@@ -123,10 +92,11 @@ def show_fee_management(user_id):
     
     st.divider()
     
-    # Payment section
-    st.subheader("Make Payment")
-    fee_details = get_fee_details(user_id)
-    if fee_details:
+    # Payment section (admin only; students pay through the bank and their payments
+    # arrive via statement reconciliation)
+    fee_details = [_fee_tuple(fee) for fee in reversed(overview['fees'])]
+    if admin and fee_details:
+        st.subheader("Make Payment")
         fee_options = [f"Sem {f[1]}: ₹{f[2]-f[3]} due" for f in fee_details if f[4] != 'Paid']
         if fee_options:
             selected_fee = st.selectbox("Select Fee", fee_options)
@@ -134,12 +104,22 @@ def show_fee_management(user_id):
             
             payment_amount = st.number_input("Payment Amount", min_value=0.0)
             
+            # One key per attempted payment, so a double click is recorded once
+            key_name = f"fee_payment_key_{fee_id}"
+            if key_name not in st.session_state:
+                st.session_state[key_name] = uuid.uuid4().hex
+            
             if st.button("Make Payment", use_container_width=True):
-                if update_fee_payment(fee_id, payment_amount):
+                if payment_amount <= 0:
+                    st.warning("⚠️ Enter an amount to pay")
+                elif update_fee_payment(fee_id, payment_amount, idempotency_key=st.session_state[key_name]):
+                    del st.session_state[key_name]
                     st.success("✅ Payment recorded!")
                     st.rerun()
         else:
             st.success("✅ All fees paid!")
+    elif not admin and outstanding > 0:
+        st.info("💡 Pay through the college bank account; payments show up here once the bank statement is reconciled.")
     
     st.divider()
     
@@ -151,3 +131,9 @@ def show_fee_management(user_id):
         st.dataframe(df, use_container_width=True)
     else:
         st.info("No fee records")
+    
+    payments = overview['payments']
+    if payments:
+        import pandas as pd
+        st.subheader("Payments")
+        st.dataframe(pd.DataFrame(payments), use_container_width=True, hide_index=True)
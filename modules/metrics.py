@@ -0,0 +1,266 @@
+"""
+Portal Metrics
+Counters, gauges and histograms for logins, page renders, DB query latency,
+cache hit rates, uploads, exports, notification fan-out and staff queue depth,
+served in the Prometheus text format from a small HTTP server running next to
+Streamlit.
+
+Enable with ERP_METRICS=1; the endpoint listens on ERP_METRICS_PORT (default 9108).
+While disabled every inc()/observe() returns immediately.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+METRICS_PORT = int(os.environ.get('ERP_METRICS_PORT', '9108'))
+METRICS_HOST = os.environ.get('ERP_METRICS_HOST', '127.0.0.1')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 16 * 1024, 128 * 1024, 1024 ** 2, 5 * 1024 ** 2, 20 * 1024 ** 2, 100 * 1024 ** 2)
+FANOUT_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+_enabled = os.environ.get('ERP_METRICS', '0') == '1'
+_server = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+def _label_key(names: Tuple[str, ...], labels: Dict) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, '')) for name in names)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        if not _enabled:
+            return
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.label_names, labels), 0)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}"
+                for key, value in items]
+
+class Gauge(Counter):
+    """Value that can go up and down, with optional labels"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        if not _enabled:
+            return
+        key = _label_key(self.label_names, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts..., +Inf], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        if not _enabled:
+            return
+        key = _label_key(self.label_names, labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the enclosed block in seconds"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(self.label_names, labels))
+        return sum(series[0]) if series else 0
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._series.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+# ============================================================================
+# REGISTRY
+# ============================================================================
+
+REGISTRY: List = []
+
+def _register(metric):
+    REGISTRY.append(metric)
+    return metric
+
+LOGINS = _register(Counter(
+    'erp_logins_total', 'Login attempts by result', ('result',)))
+PAGE_RENDERS = _register(Counter(
+    'erp_page_renders_total', 'Page renders by role and page', ('role', 'page')))
+PAGE_RENDER_SECONDS = _register(Histogram(
+    'erp_page_render_seconds', 'Page dispatch wall time', ('role', 'page')))
+DB_QUERY_SECONDS = _register(Histogram(
+    'erp_db_query_seconds', 'SQL execute() latency per statement (fetch time is in the query stats)'))
+CACHE_REQUESTS = _register(Counter(
+    'erp_cache_requests_total', 'Cache lookups by cache and result (hit/miss)', ('cache', 'result')))
+UPLOAD_BYTES = _register(Histogram(
+    'erp_upload_bytes', 'Uploaded file sizes in bytes', ('kind',), SIZE_BUCKETS))
+EXPORT_SECONDS = _register(Histogram(
+    'erp_export_seconds', 'Export job duration', ('format',)))
+NOTIFICATION_FANOUT = _register(Histogram(
+    'erp_notification_fanout', 'Recipients per notification send', (), FANOUT_BUCKETS))
+ASSIGNEE_OPEN_ITEMS = _register(Gauge(
+    'erp_assignee_open_items', 'Open tickets and requests assigned to each staff member', ('assignee', 'role')))
+PASSWORD_KDF_SECONDS = _register(Histogram(
+    'erp_password_kdf_seconds', 'Password hash/verify CPU time', ('operation',)))
+PASSWORD_KDF_WAIT_SECONDS = _register(Histogram(
+    'erp_password_kdf_wait_seconds', 'Password hash/verify time including the pool queue'))
+PASSWORD_KDF_REJECTED = _register(Counter(
+    'erp_password_kdf_rejected_total', 'Password hashes refused because the pool queue was full'))
+LOGIN_THROTTLED = _register(Counter(
+    'erp_login_throttled_total', 'Login attempts refused before any database work, by limit', ('scope',)))
+LOGIN_DELAYED = _register(Counter(
+    'erp_login_delayed_total', 'Login attempts slowed down by the per-account limit'))
+FEES_MARKED_OVERDUE = _register(Counter(
+    'erp_fees_marked_overdue_total', 'Fees flipped to Overdue by the sweeper'))
+SLA_ESCALATIONS = _register(Counter(
+    'erp_sla_escalations_total', 'SLA lapses by item type and outcome (escalated/breached)', ('entity', 'outcome')))
+
+def is_enabled() -> bool:
+    return _enabled
+
+def enable(value: bool = True):
+    """Turn collection on or off for this process"""
+    global _enabled
+    _enabled = value
+
+def reset():
+    """Clear every metric's values"""
+    for metric in REGISTRY:
+        metric.reset()
+
+def cache_lookup(cache: str, hit: bool):
+    """Record one cache hit or miss"""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+# ============================================================================
+# /metrics ENDPOINT
+# ============================================================================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> Optional[ThreadingHTTPServer]:
+    """Start the /metrics endpoint once per process; safe to call on every rerun"""
+    global _server, _server_failed
+    if not _enabled or _server_failed:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                _server_failed = True
+                print(f"Metrics endpoint not started on {host}:{port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name='erp-metrics', daemon=True).start()
+    return _server
+
+def stop_server():
+    """Shut the endpoint down (used by tests and benchmarks)"""
+    global _server, _server_failed
+    with _server_lock:
+        _server_failed = False
+        if _server is not None:
+            _server.shutdown()
+            _server.server_close()
+            _server = None
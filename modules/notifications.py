@@ -1,6 +1,7 @@
 import streamlit as st
 from datetime import datetime
 from modules.database import get_db_connection
+from modules import metrics
 
 def init_notifications_table():
     """Initialize notifications table"""
@@ -30,11 +31,30 @@ def create_notification(user_id, title, message, notif_type="info"):
                 VALUES (?, ?, ?, ?)
             """, (user_id, title, message, notif_type))
             conn.commit()
-            return True
+        metrics.NOTIFICATION_FANOUT.observe(1)
+        return True
     except Exception as e:
         print(f"Notification error: {str(e)}")
         return False
 
+def notify_users(user_ids, title, message, notif_type="info"):
+    """Send the same notification to many users in one transaction"""
+    rows = [(user_id, title, message, notif_type) for user_id in user_ids]
+    if not rows:
+        return 0
+    try:
+        with get_db_connection() as conn:
+            conn.executemany("""
+                INSERT INTO notifications (user_id, title, message, type)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+        metrics.NOTIFICATION_FANOUT.observe(len(rows))
+        return len(rows)
+    except Exception as e:
+        print(f"Notification error: {str(e)}")
+        return 0
+
 def get_unread_notifications(user_id):
     """Get unread notifications"""
     try:
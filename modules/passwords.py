@@ -0,0 +1,155 @@
+"""
+Password Service
+Salted, deliberately slow password hashing (scrypt by default, PBKDF2-SHA256 as
+an alternative) run in a bounded thread pool, so a login storm waits in a
+queue of fixed size instead of pinning every Streamlit script thread.
+hashlib's KDFs release the GIL, so the pool hashes in parallel while other
+sessions keep rendering.
+
+Stored hashes carry their parameters:
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+Legacy unsalted SHA-256 hex digests still verify and are reported as needing
+a rehash, as are hashes made with older parameters.
+
+ERP_KDF picks the algorithm (scrypt or pbkdf2_sha256). ERP_SCRYPT_N and
+ERP_PBKDF2_ITERATIONS set the cost. ERP_KDF_WORKERS sets the pool size and
+ERP_KDF_MAX_PENDING the number of hashes allowed in flight.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from modules import metrics
+
+KDF = os.environ.get('ERP_KDF', 'scrypt')
+SCRYPT_N = int(os.environ.get('ERP_SCRYPT_N', str(2 ** 14)))
+SCRYPT_R = 8
+SCRYPT_P = 1
+PBKDF2_ITERATIONS = int(os.environ.get('ERP_PBKDF2_ITERATIONS', '600000'))
+SALT_BYTES = 16
+
+WORKERS = int(os.environ.get('ERP_KDF_WORKERS', str(min(4, os.cpu_count() or 1))))
+MAX_PENDING = int(os.environ.get('ERP_KDF_MAX_PENDING', str(WORKERS * 8)))
+QUEUE_TIMEOUT = 10.0  # seconds a caller waits for a free slot
+
+class PasswordServiceBusy(RuntimeError):
+    """Raised when MAX_PENDING hashes are already queued"""
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii')
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text.encode('ascii'))
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    # maxmem must cover 128 * n * r bytes plus slack
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 1024 * 1024)
+
+def _pbkdf2(password: str, salt: bytes, iterations: int) -> bytes:
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations)
+
+def legacy_hash(password: str) -> str:
+    """The original unsalted SHA-256 scheme, kept only to verify old hashes"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+# ============================================================================
+# SYNCHRONOUS KDF
+# ============================================================================
+
+def hash_password(password: str, kdf: str = None, cost: Optional[int] = None) -> str:
+    """Salted hash with the configured KDF, including its parameters.
+
+    cost overrides scrypt's N or the PBKDF2 iteration count; hashes made at a
+    cost other than the configured one are upgraded on the next login.
+    """
+    kdf = kdf or KDF
+    salt = os.urandom(SALT_BYTES)
+    with metrics.PASSWORD_KDF_SECONDS.time(operation='hash'):
+        if kdf == 'scrypt':
+            n = cost or SCRYPT_N
+            digest = _scrypt(password, salt, n, SCRYPT_R, SCRYPT_P)
+            return f"scrypt${n}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+        if kdf == 'pbkdf2_sha256':
+            iterations = cost or PBKDF2_ITERATIONS
+            digest = _pbkdf2(password, salt, iterations)
+            return f"pbkdf2_sha256${iterations}${_b64(salt)}${_b64(digest)}"
+    raise ValueError(f"Unknown KDF '{kdf}'")
+
+def needs_rehash(stored: str) -> bool:
+    """True for legacy SHA-256 hashes and hashes made with another KDF or cost"""
+    parts = stored.split('$')
+    if KDF == 'scrypt':
+        return parts[:4] != ['scrypt', str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+    return parts[:2] != ['pbkdf2_sha256', str(PBKDF2_ITERATIONS)]
+
+def verify_password(password: str, stored: str) -> Tuple[bool, bool]:
+    """(matches, needs_rehash) for a stored hash in any supported format"""
+    if not stored:
+        return False, False
+    with metrics.PASSWORD_KDF_SECONDS.time(operation='verify'):
+        parts = stored.split('$')
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            matches = hmac.compare_digest(_scrypt(password, _unb64(parts[4]), n, r, p), _unb64(parts[5]))
+        elif parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            matches = hmac.compare_digest(_pbkdf2(password, _unb64(parts[2]), int(parts[1])), _unb64(parts[3]))
+        elif len(parts) == 1:
+            matches = hmac.compare_digest(legacy_hash(password), stored)
+        else:
+            return False, False
+    return matches, matches and needs_rehash(stored)
+
+# ============================================================================
+# THREAD POOL
+# ============================================================================
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_PENDING)
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='erp-kdf')
+        return _pool
+
+def configure(workers: Optional[int] = None, max_pending: Optional[int] = None):
+    """Resize the pool and its pending limit (waits for running hashes to finish)"""
+    global _pool, _slots, WORKERS, MAX_PENDING
+    with _pool_lock:
+        WORKERS = workers or WORKERS
+        MAX_PENDING = max_pending or WORKERS * 8
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+        _slots = threading.BoundedSemaphore(MAX_PENDING)
+
+def _submit(fn, *args, timeout: Optional[float] = None):
+    """Run fn on the pool and wait for it, holding one of MAX_PENDING slots"""
+    started = time.perf_counter()
+    slots = _slots
+    if not slots.acquire(timeout=QUEUE_TIMEOUT if timeout is None else timeout):
+        metrics.PASSWORD_KDF_REJECTED.inc()
+        raise PasswordServiceBusy(f"{MAX_PENDING} password hashes already pending")
+    try:
+        future = _executor().submit(fn, *args)
+        return future.result()
+    finally:
+        slots.release()
+        metrics.PASSWORD_KDF_WAIT_SECONDS.observe(time.perf_counter() - started)
+
+def hash_in_pool(password: str, timeout: Optional[float] = None) -> str:
+    """hash_password on the KDF pool"""
+    return _submit(hash_password, password, timeout=timeout)
+
+def verify_in_pool(password: str, stored: str, timeout: Optional[float] = None) -> Tuple[bool, bool]:
+    """verify_password on the KDF pool"""
+    return _submit(verify_password, password, stored, timeout=timeout)
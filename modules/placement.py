@@ -0,0 +1,187 @@
+"""
+Placement Shortlisting
+Batch eligibility scoring for company drives. A cohort's latest performance
+metrics are loaded into NumPy arrays once, filtered against the drive's
+criteria, ranked, and the shortlist is written to placement_records in bulk.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from modules.database import get_db_connection
+
+# CGPA is on the portal's 4-point GRADE_SCALE
+DEFAULT_CRITERIA = {
+    'min_cgpa': 2.0,
+    'min_attendance': 75.0,
+    'max_backlogs': 0,
+    'departments': None,   # None = every department
+    'limit': None,         # None = every eligible student
+}
+
+# Score = cgpa/4 * cgpa weight + attendance/100 * attendance weight - backlog penalty per backlog
+DEFAULT_WEIGHTS = {'cgpa': 0.6, 'attendance': 0.4, 'backlog_penalty': 0.05}
+
+SHORTLIST_STATUS = 'Shortlisted'
+
+def init_placement_tables():
+    """Indexes used by cohort loading and drive lookups"""
+    with get_db_connection() as conn:
+        # Partial index: backlog counts only ever read failed grades
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_academic_marks_backlogs ON academic_marks(user_id) WHERE grade = 'F'")
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_placement_records_drive
+            ON placement_records(company_name, placement_date, placement_status)
+        ''')
+        # Department filters and the distinct-department list below
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_student_profiles_department ON student_profiles(department)')
+        conn.commit()
+
+def get_filter_options() -> Dict[str, List[str]]:
+    """Departments and companies that actually occur in the data, for the drive form"""
+    try:
+        with get_db_connection() as conn:
+            departments = [row[0] for row in conn.execute('''
+                SELECT DISTINCT department FROM student_profiles
+                WHERE department IS NOT NULL AND department != '' ORDER BY department
+            ''')]
+            companies = [row[0] for row in conn.execute('''
+                SELECT DISTINCT company_name FROM placement_records
+                WHERE company_name IS NOT NULL AND company_name != '' ORDER BY company_name
+            ''')]
+        return {'departments': departments, 'companies': companies}
+    except Exception as e:
+        print(f"Error getting placement filters: {e}")
+        return {'departments': [], 'companies': []}
+
+def load_cohort(conn, departments: Optional[List[str]] = None, academic_status: str = 'Active') -> Dict[str, np.ndarray]:
+    """Latest semester metrics, department and backlog count per student as parallel arrays"""
+    sql = '''
+        SELECT sp.user_id, sp.department, pm.semester, pm.cgpa, pm.sgpa, pm.attendance_percentage,
+               COALESCE(b.backlogs, 0) AS backlogs, pm.predicted_placement
+        FROM student_profiles sp
+        JOIN (SELECT user_id, MAX(semester) AS semester FROM performance_metrics GROUP BY user_id) latest
+            ON latest.user_id = sp.user_id
+        JOIN performance_metrics pm
+            ON pm.user_id = latest.user_id AND pm.semester = latest.semester
+        LEFT JOIN (SELECT user_id, COUNT(*) AS backlogs FROM academic_marks
+                   WHERE grade = 'F' GROUP BY user_id) b
+            ON b.user_id = sp.user_id
+        WHERE sp.academic_status = ?
+    '''
+    params = [academic_status]
+    if departments:
+        sql += f" AND sp.department IN ({','.join('?' * len(departments))})"
+        params.extend(departments)
+
+    rows = conn.execute(sql, params).fetchall()
+    if not rows:
+        return {
+            'user_id': np.empty(0, dtype=np.int64), 'department': np.empty(0, dtype=object),
+            'semester': np.empty(0, dtype=np.int64), 'cgpa': np.empty(0), 'sgpa': np.empty(0), 'attendance': np.empty(0),
+            'backlogs': np.empty(0, dtype=np.int64), 'predicted': np.empty(0),
+        }
+    user_id, department, semester, cgpa, sgpa, attendance, backlogs, predicted = zip(*rows)
+    return {
+        'user_id': np.array(user_id, dtype=np.int64),
+        'department': np.array(department, dtype=object),
+        'semester': np.array(semester, dtype=np.int64),
+        'cgpa': np.array(cgpa, dtype=float),
+        'sgpa': np.array(sgpa, dtype=float),
+        'attendance': np.array(attendance, dtype=float),
+        'backlogs': np.array(backlogs, dtype=np.int64),
+        'predicted': np.array(predicted, dtype=float),  # NaN until the placement model has scored
+    }
+
+def score_cohort(cohort: Dict[str, np.ndarray], weights: Optional[Dict] = None) -> np.ndarray:
+    """Vectorized eligibility score in [0, 1] before backlog penalties"""
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    cgpa = np.nan_to_num(cohort['cgpa'])
+    attendance = np.nan_to_num(cohort['attendance'])
+    return (cgpa / 4.0 * weights['cgpa']
+            + attendance / 100.0 * weights['attendance']
+            - cohort['backlogs'] * weights['backlog_penalty'])
+
+def eligible_mask(cohort: Dict[str, np.ndarray], criteria: Dict) -> np.ndarray:
+    """Boolean mask of students meeting every criterion"""
+    mask = ((np.nan_to_num(cohort['cgpa']) >= criteria['min_cgpa'])
+            & (np.nan_to_num(cohort['attendance']) >= criteria['min_attendance'])
+            & (cohort['backlogs'] <= criteria['max_backlogs']))
+    if criteria.get('departments'):
+        mask &= np.isin(cohort['department'], list(criteria['departments']))
+    return mask
+
+def rank_shortlist(cohort: Dict[str, np.ndarray], criteria: Dict, weights: Optional[Dict] = None) -> List[Dict]:
+    """Eligible students ordered by score (ties broken by CGPA, then user id)"""
+    scores = score_cohort(cohort, weights)
+    idx = np.flatnonzero(eligible_mask(cohort, criteria))
+    order = idx[np.lexsort((cohort['user_id'][idx], -cohort['cgpa'][idx], -scores[idx]))]
+    if criteria.get('limit'):
+        order = order[:criteria['limit']]
+
+    return [{
+        'rank': rank,
+        'user_id': int(cohort['user_id'][i]),
+        'department': cohort['department'][i],
+        'cgpa': float(cohort['cgpa'][i]),
+        'attendance': float(cohort['attendance'][i]),
+        'backlogs': int(cohort['backlogs'][i]),
+        'score': round(float(scores[i]), 4),
+        'predicted_placement': None if np.isnan(cohort['predicted'][i]) else float(cohort['predicted'][i]),
+    } for rank, i in enumerate(order, start=1)]
+
+def generate_shortlist(company: str, criteria: Optional[Dict] = None, weights: Optional[Dict] = None,
+                       position: Optional[str] = None, package: Optional[float] = None,
+                       drive_date: Optional[str] = None, persist: bool = True) -> List[Dict]:
+    """Rank the active cohort for a company drive and store the shortlist in placement_records"""
+    criteria = {**DEFAULT_CRITERIA, **(criteria or {})}
+    drive_date = drive_date or date.today().isoformat()
+    try:
+        with get_db_connection() as conn:
+            cohort = load_cohort(conn, criteria.get('departments'))
+            shortlist = rank_shortlist(cohort, criteria, weights)
+
+            if persist:
+                # Re-running a drive replaces its previous shortlist
+                conn.execute('''
+                    DELETE FROM placement_records
+                    WHERE company_name = ? AND placement_date = ? AND placement_status = ?
+                ''', (company, drive_date, SHORTLIST_STATUS))
+                conn.executemany('''
+                    INSERT INTO placement_records
+                    (user_id, company_name, package, position, placement_date,
+                     placement_status, eligibility_criteria_met)
+                    VALUES (?, ?, ?, ?, ?, ?, 1)
+                ''', [(s['user_id'], company, package, position, drive_date, SHORTLIST_STATUS)
+                      for s in shortlist])
+                conn.commit()
+            return shortlist
+    except Exception as e:
+        print(f"Error generating shortlist: {e}")
+        return []
+
+def get_shortlist(company: str, drive_date: Optional[str] = None) -> List[Dict]:
+    """Stored shortlist for a company drive, most recent drive if no date is given"""
+    try:
+        with get_db_connection() as conn:
+            if drive_date is None:
+                row = conn.execute('''
+                    SELECT MAX(placement_date) AS drive_date FROM placement_records
+                    WHERE company_name = ? AND placement_status = ?
+                ''', (company, SHORTLIST_STATUS)).fetchone()
+                drive_date = row['drive_date']
+            rows = conn.execute('''
+                SELECT pr.user_id, u.full_name, sp.roll_number, sp.department, pr.position,
+                       pr.package, pr.placement_date
+                FROM placement_records pr
+                JOIN users u ON u.user_id = pr.user_id
+                JOIN student_profiles sp ON sp.user_id = pr.user_id
+                WHERE pr.company_name = ? AND pr.placement_date = ? AND pr.placement_status = ?
+                ORDER BY pr.placement_id
+            ''', (company, drive_date, SHORTLIST_STATUS)).fetchall()
+            return [dict(row) for row in rows]
+    except Exception as e:
+        print(f"Error getting shortlist: {e}")
+        return []
@@ -0,0 +1,160 @@
+"""
+Placement Prediction Model
+Logistic regression fitted offline on historical placement outcomes, stored
+as JSON and applied in vectorized batches to fill
+performance_metrics.predicted_placement for every active student.
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from modules.database import DATA_DIR, get_db_connection
+from modules.placement import load_cohort
+
+MODEL_PATH = os.environ.get('ERP_PLACEMENT_MODEL', os.path.join(DATA_DIR, 'models', 'placement_model.json'))
+FEATURES = ['cgpa', 'sgpa', 'attendance', 'backlogs']
+OUTCOMES = {'Placed': 1.0, 'Not Placed': 0.0}
+SCORE_BATCH_SIZE = 10000
+
+# ============================================================================
+# TRAINING
+# ============================================================================
+
+def load_training_data(conn) -> Tuple[np.ndarray, np.ndarray]:
+    """Feature matrix from each student's latest metrics and the 0/1 outcome of their drives"""
+    rows = conn.execute(f'''
+        SELECT pm.cgpa, pm.sgpa, pm.attendance_percentage,
+               COALESCE(b.backlogs, 0) AS backlogs,
+               pr.placement_status
+        FROM placement_records pr
+        JOIN (SELECT user_id, MAX(semester) AS semester FROM performance_metrics GROUP BY user_id) latest
+            ON latest.user_id = pr.user_id
+        JOIN performance_metrics pm
+            ON pm.user_id = latest.user_id AND pm.semester = latest.semester
+        LEFT JOIN (SELECT user_id, COUNT(*) AS backlogs FROM academic_marks
+                   WHERE grade = 'F' GROUP BY user_id) b
+            ON b.user_id = pr.user_id
+        WHERE pr.placement_status IN ({','.join('?' * len(OUTCOMES))})
+    ''', list(OUTCOMES)).fetchall()
+    if not rows:
+        return np.empty((0, len(FEATURES))), np.empty(0)
+    data = np.array([tuple(r)[:4] for r in rows], dtype=float)
+    labels = np.array([OUTCOMES[r['placement_status']] for r in rows])
+    return np.nan_to_num(data), labels
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -35, 35)))
+
+def fit_logistic(X: np.ndarray, y: np.ndarray, l2: float = 1e-2, max_iter: int = 50, tol: float = 1e-8) -> Dict:
+    """L2-regularised logistic regression by Newton's method on standardized features"""
+    mean = X.mean(axis=0)
+    std = X.std(axis=0)
+    std[std == 0] = 1.0
+    Z = np.hstack([np.ones((len(X), 1)), (X - mean) / std])
+
+    weights = np.zeros(Z.shape[1])
+    penalty = np.full(Z.shape[1], l2)
+    penalty[0] = 0.0  # intercept is not regularised
+    for _ in range(max_iter):
+        p = _sigmoid(Z @ weights)
+        gradient = Z.T @ (p - y) + penalty * weights
+        hessian = (Z * (p * (1 - p))[:, None]).T @ Z + np.diag(penalty)
+        step = np.linalg.solve(hessian, gradient)
+        weights -= step
+        if np.abs(step).max() < tol:
+            break
+
+    return {'mean': mean.tolist(), 'std': std.tolist(), 'intercept': float(weights[0]),
+            'coefficients': weights[1:].tolist()}
+
+def predict_proba(model: Dict, X: np.ndarray) -> np.ndarray:
+    """Placement probability for each row of X (columns in model['features'] order)"""
+    Z = (np.nan_to_num(X) - np.asarray(model['mean'])) / np.asarray(model['std'])
+    return _sigmoid(model['intercept'] + Z @ np.asarray(model['coefficients']))
+
+def _evaluate(model: Dict, X: np.ndarray, y: np.ndarray) -> Dict:
+    p = np.clip(predict_proba(model, X), 1e-12, 1 - 1e-12)
+    # AUC via the rank-sum statistic
+    ranks = np.empty(len(p))
+    ranks[np.argsort(p, kind='stable')] = np.arange(1, len(p) + 1)
+    positives = y.sum()
+    negatives = len(y) - positives
+    auc = ((ranks[y == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives)
+           if positives and negatives else None)
+    return {
+        'samples': int(len(y)),
+        'placed_rate': round(float(y.mean()), 4),
+        'accuracy': round(float(((p >= 0.5) == y).mean()), 4),
+        'log_loss': round(float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))), 4),
+        'auc': round(float(auc), 4) if auc is not None else None,
+    }
+
+def train_model(path: str = MODEL_PATH, l2: float = 1e-2, holdout: float = 0.2, seed: int = 42) -> Dict:
+    """Fit on historical outcomes, report holdout metrics, refit on everything and save"""
+    with get_db_connection() as conn:
+        X, y = load_training_data(conn)
+    if len(y) < 10 or y.min() == y.max():
+        raise ValueError(f"Need placed and not-placed outcomes to train on (found {len(y)} records)")
+
+    order = np.random.default_rng(seed).permutation(len(y))
+    cut = int(len(y) * (1 - holdout))
+    train_idx, test_idx = order[:cut], order[cut:]
+    evaluation = _evaluate(fit_logistic(X[train_idx], y[train_idx], l2), X[test_idx], y[test_idx])
+
+    model = fit_logistic(X, y, l2)
+    model.update({
+        'features': FEATURES,
+        'samples': int(len(y)),
+        'l2': l2,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+        'holdout': evaluation,
+    })
+    save_model(model, path)
+    return model
+
+def save_model(model: Dict, path: str = MODEL_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(model, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def load_model(path: str = MODEL_PATH) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            model = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if model.get('features') != FEATURES:
+        print(f"Placement model at {path} was trained on different features; retrain it")
+        return None
+    return model
+
+# ============================================================================
+# BULK SCORING
+# ============================================================================
+
+def score_active_students(model: Optional[Dict] = None, batch_size: int = SCORE_BATCH_SIZE) -> int:
+    """Write predicted_placement on every active student's latest metrics row; returns rows updated"""
+    model = model or load_model()
+    if model is None:
+        raise ValueError("No placement model found; run train_placement_model.py first")
+
+    with get_db_connection() as conn:
+        cohort = load_cohort(conn)
+        X = np.column_stack([cohort[name] for name in FEATURES]) if len(cohort['user_id']) else np.empty((0, len(FEATURES)))
+        updated = 0
+        for start in range(0, len(X), batch_size):
+            stop = start + batch_size
+            probabilities = np.round(predict_proba(model, X[start:stop]), 4)
+            conn.executemany('''
+                UPDATE performance_metrics SET predicted_placement = ?
+                WHERE user_id = ? AND semester = ?
+            ''', zip(probabilities.tolist(), cohort['user_id'][start:stop].tolist(),
+                     cohort['semester'][start:stop].tolist()))
+            updated += min(stop, len(X)) - start
+        conn.commit()
+    return updated
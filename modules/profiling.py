@@ -0,0 +1,177 @@
+"""
+Per-Rerun Page Profiling
+Opt-in cProfile + stack-sampling capture around a page dispatch.
+Each capture stores a .prof file (snakeviz / pstats), a .folded flamegraph
+(speedscope / flamegraph.pl) and a JSON summary that attributes time to
+modules.* / pages.* functions and to SQL, pandas, Plotly and Streamlit.
+
+Enable for every rerun with ERP_PROFILE=1, or per request as an admin with ?profile=1.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+PROFILE_DIR = os.environ.get('ERP_PROFILE_DIR', os.path.join(os.path.dirname(__file__), '..', 'data', 'profiles'))
+SAMPLE_INTERVAL = float(os.environ.get('ERP_PROFILE_INTERVAL_MS', '2')) / 1000
+MAX_PROFILES = 50
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Where time goes, matched against the file path or builtin description of each function
+CATEGORIES = [
+    ('SQL', ('sqlite3',)),
+    ('pandas', ('pandas', 'numpy')),
+    ('Plotly', ('plotly',)),
+    ('Streamlit', ('streamlit',)),
+    ('App code', (os.path.join(ROOT, 'modules'), os.path.join(ROOT, 'pages'))),
+]
+
+def requested(user: Dict, query_params=None) -> bool:
+    """Profiling is on for everyone via ERP_PROFILE=1, or for admins via ?profile=1"""
+    if os.environ.get('ERP_PROFILE', '0') == '1':
+        return True
+    if query_params is None or user.get('role') != 'admin':
+        return False
+    return query_params.get('profile') == '1'
+
+class StackSampler(threading.Thread):
+    """Samples another thread's Python stack to build folded flamegraph stacks"""
+
+    def __init__(self, target_thread_id: int, stop_frame, interval: float = SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.target = target_thread_id
+        self.stop_frame = stop_frame
+        self.interval = interval
+        self.stacks = Counter()
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            stack = []
+            while frame is not None and frame is not self.stop_frame:
+                module = frame.f_globals.get('__name__', '?')
+                stack.append(f"{module}.{frame.f_code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+def _category(filename: str, funcname: str) -> str:
+    where = filename if filename != '~' else funcname
+    for name, markers in CATEGORIES:
+        if any(marker in where for marker in markers):
+            return name
+    return 'Other'
+
+def _app_function(filename: str) -> Optional[str]:
+    """modules.x / pages.x for functions defined in this repository"""
+    path = os.path.abspath(filename)
+    for package in ('modules', 'pages'):
+        prefix = os.path.join(ROOT, package) + os.sep
+        if path.startswith(prefix):
+            return f"{package}.{os.path.splitext(path[len(prefix):])[0].replace(os.sep, '.')}"
+    return None
+
+def summarize(stats: pstats.Stats, wall_seconds: float, limit: int = 25) -> Dict:
+    """Self-time per category plus the heaviest modules.* / pages.* functions"""
+    categories = Counter()
+    functions = []
+    for (filename, line, funcname), (cc, nc, tottime, cumtime, callers) in stats.stats.items():
+        categories[_category(filename, funcname)] += tottime
+        module = _app_function(filename)
+        if module:
+            functions.append({
+                'function': f"{module}.{funcname}",
+                'line': line,
+                'calls': nc,
+                'self_ms': round(tottime * 1000, 3),
+                'cumulative_ms': round(cumtime * 1000, 3),
+            })
+    functions.sort(key=lambda f: f['cumulative_ms'], reverse=True)
+    return {
+        'wall_ms': round(wall_seconds * 1000, 2),
+        'categories_ms': {name: round(seconds * 1000, 2) for name, seconds in categories.most_common()},
+        'functions': functions[:limit],
+    }
+
+def _prune():
+    """Keep only the newest MAX_PROFILES captures"""
+    captures = list_profiles()
+    for old in captures[MAX_PROFILES:]:
+        for path in old['files'].values():
+            if os.path.exists(path):
+                os.remove(path)
+
+@contextmanager
+def profile_page(page: str, enabled: bool = True):
+    """Profile the enclosed page dispatch and store the capture on disk"""
+    if not enabled:
+        yield None
+        return
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), sys._getframe(2))
+    sampler.start()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        wall = time.perf_counter() - started
+        sampler.stop()
+        try:
+            save_profile(page, profiler, sampler.stacks, wall)
+        except OSError as e:
+            print(f"Error saving profile: {e}")
+
+def save_profile(page: str, profiler: cProfile.Profile, stacks: Counter, wall_seconds: float) -> str:
+    """Write .prof, .folded and .json files for one capture; returns the capture id"""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    slug = ''.join(c if c.isalnum() else '_' for c in page).strip('_').lower() or 'page'
+    capture_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{slug}"
+    base = os.path.join(PROFILE_DIR, capture_id)
+
+    profiler.dump_stats(base + '.prof')
+    with open(base + '.folded', 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    summary = summarize(pstats.Stats(profiler), wall_seconds)
+    summary.update({'id': capture_id, 'page': page, 'captured_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    'samples': sum(stacks.values())})
+    with open(base + '.json', 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    _prune()
+    return capture_id
+
+def list_profiles() -> List[Dict]:
+    """Stored captures, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    captures = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if not name.endswith('.json'):
+            continue
+        base = os.path.join(PROFILE_DIR, name[:-5])
+        try:
+            with open(base + '.json') as f:
+                summary = json.load(f)
+        except (OSError, ValueError):
+            continue
+        summary['files'] = {ext: base + '.' + ext for ext in ('json', 'prof', 'folded')}
+        captures.append(summary)
+    return captures
@@ -0,0 +1,275 @@
+"""
+SQL Query Instrumentation
+Per-statement timing, counts and rows for every connection opened through
+modules.database, plus a slow-query log and per-rerun N+1 detection.
+Enable with ERP_QUERY_STATS=1 (or enable()); disabled connections are untouched.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from modules import metrics
+
+LOG_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+SLOW_QUERY_MS = float(os.environ.get('ERP_SLOW_QUERY_MS', '100'))
+SLOW_QUERY_LOG = os.environ.get('ERP_SLOW_QUERY_LOG', os.path.join(LOG_DIR, 'slow_queries.log'))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get('ERP_N_PLUS_ONE_THRESHOLD', '10'))
+SAMPLE_SIZE = 1000  # per-statement durations kept for percentiles
+RECENT_RERUNS = 50
+
+_enabled = os.environ.get('ERP_QUERY_STATS', '0') == '1'
+_lock = threading.Lock()
+_stats: Dict[str, 'StatementStats'] = {}
+_reruns = deque(maxlen=RECENT_RERUNS)
+_local = threading.local()
+_slow_logger = None
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_sql(sql: str) -> str:
+    """Collapse literals, IN lists and whitespace so equivalent statements aggregate"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+class StatementStats:
+    """Aggregates for one normalized statement"""
+
+    __slots__ = ('sql', 'calls', 'executions', 'total_ms', 'max_ms', 'rows', 'samples')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.calls = 0
+        self.executions = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+    def add(self, elapsed_ms: float, rows: int, executions: int):
+        self.calls += 1
+        self.executions += executions
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.samples.append(elapsed_ms)
+
+    def add_fetch(self, elapsed_ms: float, rows: int):
+        self.total_ms += elapsed_ms
+        self.rows += rows
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+    def as_dict(self) -> Dict:
+        return {
+            'sql': self.sql,
+            'calls': self.calls,
+            'executions': self.executions,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.calls, 3) if self.calls else 0.0,
+            'p95_ms': round(self.percentile(95), 3),
+            'max_ms': round(self.max_ms, 3),
+            'rows': self.rows,
+        }
+
+def _slow_log() -> logging.Logger:
+    global _slow_logger
+    if _slow_logger is None:
+        logger = logging.getLogger('erp.slow_queries')
+        logger.propagate = False
+        if not logger.handlers:
+            os.makedirs(os.path.dirname(os.path.abspath(SLOW_QUERY_LOG)), exist_ok=True)
+            handler = logging.FileHandler(SLOW_QUERY_LOG)
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        _slow_logger = logger
+    return _slow_logger
+
+def _record(sql: str, elapsed_ms: float, executions: int):
+    """Fold one execute()/executemany() into the global and per-rerun aggregates"""
+    with _lock:
+        entry = _stats.get(sql)
+        if entry is None:
+            entry = _stats[sql] = StatementStats(sql)
+        entry.add(elapsed_ms, 0, executions)
+    metrics.DB_QUERY_SECONDS.observe(elapsed_ms / 1000)
+
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is not None:
+        rerun['queries'] += 1
+        rerun['total_ms'] += elapsed_ms
+        rerun['counts'][sql] = rerun['counts'].get(sql, 0) + 1
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        page = rerun['page'] if rerun else '-'
+        _slow_log().info('%.1fms page=%s %s', elapsed_ms, page, sql)
+
+def _record_fetch(sql: str, elapsed_ms: float, rows: int):
+    """Add one fetch's time and rows to the statement that produced them"""
+    with _lock:
+        entry = _stats.get(sql)
+        if entry is not None:
+            entry.add_fetch(elapsed_ms, rows)
+
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is not None:
+        rerun['total_ms'] += elapsed_ms
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        page = rerun['page'] if rerun else '-'
+        _slow_log().info('%.1fms fetch rows=%d page=%s %s', elapsed_ms, rows, page, sql)
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Records each statement when execute returns, and each fetch as it happens.
+
+    Nothing waits for the cursor to be closed or exhausted, so throwaway
+    cursors (conn.execute(...).fetchone(), a bare UPDATE) are counted too.
+    """
+
+    def __init__(self, conn):
+        super().__init__(conn)
+        self._sql = None
+
+    def _run(self, method, sql, params):
+        conn = self.connection
+        conn._trace_count = 0
+        started = time.perf_counter()
+        try:
+            return method(sql, params)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._sql = normalize_sql(sql)
+            _record(self._sql, elapsed * 1000, max(conn._trace_count, 1))
+
+    def execute(self, sql, params=()):
+        return self._run(super().execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self._run(super().executemany, sql, seq_of_params)
+
+    def _timed_fetch(self, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        if self._sql is not None:
+            rows = len(result) if isinstance(result, list) else int(result is not None)
+            _record_fetch(self._sql, (time.perf_counter() - started) * 1000, rows)
+        return result
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, size if size is not None else self.arraysize)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors are instrumented and whose trace callback counts executions"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._trace_count = 0
+        self.set_trace_callback(self._on_trace)
+
+    def _on_trace(self, statement):
+        self._trace_count += 1
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # The C implementations bypass Cursor.execute, so route through cursor()
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+def is_enabled() -> bool:
+    return _enabled
+
+def enable(value: bool = True):
+    """Turn instrumentation on or off for connections opened from now on"""
+    global _enabled
+    _enabled = value
+
+def connect(path: str) -> sqlite3.Connection:
+    """Open an instrumented connection"""
+    return sqlite3.connect(path, factory=InstrumentedConnection)
+
+def reset():
+    """Clear all collected statistics"""
+    with _lock:
+        _stats.clear()
+        _reruns.clear()
+
+def top_statements(limit: int = 20, order_by: str = 'total_ms') -> List[Dict]:
+    """Heaviest normalized statements, by total time unless order_by says otherwise"""
+    with _lock:
+        rows = [entry.as_dict() for entry in _stats.values()]
+    return sorted(rows, key=lambda r: r[order_by], reverse=True)[:limit]
+
+def recent_reruns() -> List[Dict]:
+    """Summaries of the most recent reruns, newest first"""
+    with _lock:
+        return list(reversed(_reruns))
+
+def begin_rerun(page: str = ''):
+    """Start collecting per-rerun query counts on this thread"""
+    if _enabled:
+        _local.rerun = {'page': page, 'queries': 0, 'total_ms': 0.0, 'counts': {},
+                        'started': time.perf_counter()}
+
+def end_rerun() -> Optional[Dict]:
+    """Finish the current rerun, flag N+1 patterns and keep its summary"""
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is None:
+        return None
+    _local.rerun = None
+    summary = {
+        'page': rerun['page'],
+        'at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'queries': rerun['queries'],
+        'sql_ms': round(rerun['total_ms'], 2),
+        'wall_ms': round((time.perf_counter() - rerun['started']) * 1000, 2),
+        'n_plus_one': sorted(
+            ({'sql': sql, 'count': count} for sql, count in rerun['counts'].items()
+             if count >= N_PLUS_ONE_THRESHOLD),
+            key=lambda r: r['count'], reverse=True),
+    }
+    with _lock:
+        _reruns.append(summary)
+    return summary
+
+@contextmanager
+def track_rerun(page: str = ''):
+    """Context manager form of begin_rerun/end_rerun"""
+    begin_rerun(page)
+    try:
+        yield
+    finally:
+        end_rerun()
+
+def label_rerun(page: str):
+    """Name the page being rendered by the current rerun"""
+    rerun = getattr(_local, 'rerun', None)
+    if rerun is not None:
+        rerun['page'] = page
@@ -0,0 +1,211 @@
+"""
+Fee Reconciliation
+Matches bank or UPI statement lines against fee payments and applies the
+matched ones in bulk.
+
+The statement is read row by row. Column names vary between banks, so each
+field accepts several headers (see COLUMN_ALIASES). Every credit line goes
+through these checks in order:
+  1. Its transaction id is looked up (chunked IN queries on the unique
+     fee_payments.transaction_id and the idx_fees_transaction index) in a
+     dict. A line that is already recorded is confirmed, or reported if the
+     amounts differ.
+  2. Otherwise the student is found from a roll number column, or from a
+     roll number token in the narration, using a dict of students with open
+     fees.
+  3. The line pays the student's open fee whose outstanding amount equals it,
+     else the oldest open fee that can absorb it.
+
+The matched payments go into the ledger and onto their fees with executemany
+in one transaction. Every line that could not be applied is returned as an
+exception with its reason.
+"""
+
+import csv
+import os
+import re
+import time
+from typing import Dict, Iterable, List
+
+from modules import database, fee_repository
+from modules.roster import text_stream
+
+COLUMN_ALIASES = {
+    'transaction_id': ('transaction_id', 'transaction id', 'txn_id', 'txn id', 'utr', 'utr no', 'utr number',
+                       'reference', 'reference no', 'ref no', 'ref_no', 'chq/ref no'),
+    'amount': ('amount', 'credit', 'credit amount', 'credit_amount', 'deposit', 'deposit amount', 'cr'),
+    'date': ('date', 'txn date', 'transaction date', 'value date', 'value_date'),
+    'roll_number': ('roll_number', 'roll number', 'roll no', 'student id'),
+    'narration': ('narration', 'description', 'remarks', 'particulars', 'details'),
+}
+LOOKUP_CHUNK = 500
+ROLL_TOKEN = re.compile(r'[A-Za-z0-9]{5,}')
+AMOUNT_TOLERANCE = 0.005
+
+def _columns(fieldnames: List[str]) -> Dict[str, str]:
+    """Map our field names to the statement's headers"""
+    headers = {name.strip().lower(): name for name in fieldnames or []}
+    mapped = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in headers:
+                mapped[field] = headers[alias]
+                break
+    missing = [field for field in ('transaction_id', 'amount') if field not in mapped]
+    if missing:
+        raise ValueError(f"Statement is missing columns: {', '.join(missing)}")
+    return mapped
+
+def parse_statement(lines: Iterable[str]):
+    """Yield (line number, line dict, error) for every statement row"""
+    reader = csv.DictReader(lines)
+    columns = _columns(reader.fieldnames)
+    for row in reader:
+        line = {field: (row.get(header) or '').strip() for field, header in columns.items()}
+        try:
+            line['amount'] = round(float(line['amount'].replace(',', '') or 0), 2)
+        except ValueError:
+            yield reader.line_num, line, f"Invalid amount '{line['amount']}'"
+            continue
+        if not line['transaction_id']:
+            yield reader.line_num, line, "Missing transaction id"
+        elif line['amount'] <= 0:
+            yield reader.line_num, line, "Not a credit"
+        else:
+            yield reader.line_num, line, None
+
+def _recorded(conn, transaction_ids: List[str]) -> Dict[str, float]:
+    """Amount already recorded under each transaction id"""
+    found = {}
+    for start in range(0, len(transaction_ids), LOOKUP_CHUNK):
+        chunk = transaction_ids[start:start + LOOKUP_CHUNK]
+        marks = ','.join('?' * len(chunk))
+        # Payments recorded on the fee before the ledger existed: whatever the ledger does not explain
+        for row in conn.execute(f'''
+            SELECT f.transaction_id, COALESCE(f.amount_paid, 0)
+                   - COALESCE((SELECT SUM(p.amount) FROM fee_payments p WHERE p.fee_id = f.fee_id), 0)
+            FROM fees f WHERE f.transaction_id IN ({marks})
+        ''', chunk):
+            found[row[0]] = row[1]
+        for row in conn.execute(f'''
+            SELECT transaction_id, amount FROM fee_payments WHERE transaction_id IN ({marks})
+        ''', chunk):
+            found[row[0]] = row[1]
+    return found
+
+def _open_fees(conn) -> Dict[str, List[list]]:
+    """Roll number -> [fee_id, outstanding] of the student's open fees, oldest first"""
+    by_roll = {}
+    for row in conn.execute('''
+        SELECT sp.roll_number, f.fee_id, f.amount_due - COALESCE(f.amount_paid, 0) AS outstanding
+        FROM fees f JOIN student_profiles sp ON sp.user_id = f.user_id
+        WHERE f.fee_status != 'Paid' AND f.amount_due > COALESCE(f.amount_paid, 0)
+        ORDER BY f.user_id, f.semester
+    '''):
+        by_roll.setdefault(row['roll_number'].upper(), []).append([row['fee_id'], row['outstanding']])
+    return by_roll
+
+def _student_fees(line: Dict, by_roll: Dict[str, List[list]]):
+    if line.get('roll_number'):
+        return by_roll.get(line['roll_number'].upper())
+    for token in ROLL_TOKEN.findall(line.get('narration', '')):
+        if token.upper() in by_roll:
+            return by_roll[token.upper()]
+    return None
+
+def _pick_fee(open_fees: List[list], amount: float):
+    """Exact outstanding match first, then the oldest fee the amount fits in"""
+    for fee in open_fees:
+        if abs(fee[1] - amount) < AMOUNT_TOLERANCE:
+            return fee
+    for fee in open_fees:
+        if fee[1] - amount > -AMOUNT_TOLERANCE:
+            return fee
+    return None
+
+def reconcile_statement(source, method: str = 'Bank', apply: bool = True) -> Dict:
+    """Match a statement CSV against fees and apply the matched payments.
+
+    source is a path, a text stream or a binary upload. With apply=False the
+    matching runs but nothing is written.
+    """
+    started = time.perf_counter()
+    exceptions = []
+    credits = []
+    seen = set()
+    total = 0
+
+    stream = text_stream(source)
+    try:
+        for line_no, line, error in parse_statement(stream):
+            total += 1
+            if error is None and line['transaction_id'] in seen:
+                error = "Duplicate transaction id in statement"
+            if error:
+                exceptions.append({'row': line_no, 'transaction_id': line.get('transaction_id', ''),
+                                   'amount': line.get('amount'), 'reason': error})
+                continue
+            seen.add(line['transaction_id'])
+            credits.append((line_no, line))
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            stream.close()
+
+    fee_repository.ensure_schema()
+    conn = database.get_connection()
+    conn.isolation_level = None
+    matched = []
+    confirmed = 0
+    try:
+        # The write lock keeps the recorded ids and outstanding amounts current until commit
+        conn.execute('BEGIN IMMEDIATE')
+        recorded = _recorded(conn, [line['transaction_id'] for _, line in credits])
+        by_roll = _open_fees(conn)
+
+        for line_no, line in credits:
+            txn, amount = line['transaction_id'], line['amount']
+            reason = None
+            if txn in recorded:
+                if abs(recorded[txn] - amount) < AMOUNT_TOLERANCE:
+                    confirmed += 1
+                    continue
+                reason = f"Already recorded with amount {recorded[txn]:.2f}"
+            else:
+                open_fees = _student_fees(line, by_roll)
+                fee = _pick_fee(open_fees, amount) if open_fees else None
+                if open_fees is None:
+                    reason = "No student with an open fee found"
+                elif fee is None:
+                    reason = (f"No single open fee covers it ({len(open_fees)} open, "
+                              f"{sum(f[1] for f in open_fees):.2f} outstanding)")
+                else:
+                    fee[1] = round(fee[1] - amount, 2)
+                    matched.append((line_no, fee[0], amount, txn))
+                    continue
+            exceptions.append({'row': line_no, 'transaction_id': txn, 'amount': amount, 'reason': reason})
+
+        if apply and matched:
+            conn.executemany(fee_repository.APPLY_PAYMENT_SQL,
+                             [(amount, amount, txn, fee_id) for _, fee_id, amount, txn in matched])
+            conn.executemany(fee_repository.INSERT_PAYMENT_SQL,
+                             [(amount, txn, f"statement:{txn}", method, fee_id) for _, fee_id, amount, txn in matched])
+            conn.execute('COMMIT')
+        else:
+            conn.execute('ROLLBACK')
+    except Exception:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+    exceptions.sort(key=lambda e: e['row'])
+    return {
+        'lines': total,
+        'matched': len(matched),
+        'applied': len(matched) if apply else 0,
+        'applied_amount': round(sum(m[2] for m in matched), 2) if apply else 0,
+        'confirmed': confirmed,
+        'exceptions': exceptions,
+        'elapsed_seconds': round(time.perf_counter() - started, 2),
+    }
@@ -0,0 +1,189 @@
+"""
+Roster Import
+Bulk student provisioning from an admission roster CSV.
+
+The file is read row by row and validated. Passwords are hashed in a process
+pool, and all users plus their student_profiles rows are inserted with
+executemany in one transaction. Rows with problems (missing fields, bad
+values, or an email or roll number that already exists or repeats in the file)
+are reported back with their line number and skipped. The rest of the batch
+still goes in.
+
+Initial passwords are hashed at PROVISIONING_COST, which is cheaper than the
+login cost, so an intake of thousands of accounts takes seconds. Each hash is
+upgraded to the full cost on the student's first login (see
+passwords.needs_rehash).
+"""
+
+import csv
+import io
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Dict, Iterable, List
+
+from modules import passwords
+from modules.database import SEMESTERS, get_connection
+
+REQUIRED_COLUMNS = ['email', 'full_name', 'roll_number', 'department']
+OPTIONAL_COLUMNS = ['phone', 'semester', 'password', 'address', 'father_name', 'mother_name',
+                    'dob', 'admission_date', 'cet_rank', 'admission_quota']
+
+# scrypt N / PBKDF2 iterations for initial passwords
+PROVISIONING_COST = int(os.environ.get('ERP_ROSTER_HASH_COST', '0')) or {
+    'scrypt': 2 ** 10,
+    'pbkdf2_sha256': 20000,
+}.get(passwords.KDF)
+WORKERS = int(os.environ.get('ERP_ROSTER_WORKERS', str(os.cpu_count() or 1)))
+PARALLEL_THRESHOLD = 200  # smaller rosters are hashed in-process
+LOOKUP_CHUNK = 500
+
+def _hash_initial(password: str) -> str:
+    return passwords.hash_password(password, cost=PROVISIONING_COST)
+
+def hash_passwords(plain: List[str], workers: int = WORKERS) -> List[str]:
+    """Hash many passwords, fanning out to worker processes for large batches"""
+    if workers <= 1 or len(plain) < PARALLEL_THRESHOLD:
+        return [_hash_initial(p) for p in plain]
+    # spawn: forking the multi-threaded Streamlit server is not safe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+        return list(pool.map(_hash_initial, plain, chunksize=max(1, len(plain) // (workers * 4))))
+
+def text_stream(source):
+    """Text reader over a path, a text stream or a binary upload"""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, newline='', encoding='utf-8-sig')
+    if isinstance(source.read(0), bytes):
+        return io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+    return source
+
+def parse_roster(lines: Iterable[str]):
+    """Yield (line number, cleaned row, error) for every data row"""
+    reader = csv.DictReader(lines)
+    columns = [c.strip().lower() for c in (reader.fieldnames or [])]
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"Roster is missing columns: {', '.join(missing)}")
+    reader.fieldnames = columns
+
+    for row in reader:
+        line = reader.line_num
+        row = {k: (v or '').strip() for k, v in row.items() if k in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+        blank = [c for c in REQUIRED_COLUMNS if not row.get(c)]
+        if blank:
+            yield line, row, f"Missing {', '.join(blank)}"
+            continue
+        if '@' not in row['email']:
+            yield line, row, "Invalid email"
+            continue
+        row['email'] = row['email'].lower()
+        try:
+            row['semester'] = int(row.get('semester') or 1)
+        except ValueError:
+            yield line, row, f"Invalid semester '{row['semester']}'"
+            continue
+        if row['semester'] not in SEMESTERS:
+            yield line, row, f"Semester must be between {SEMESTERS[0]} and {SEMESTERS[-1]}"
+            continue
+        yield line, row, None
+
+def _existing(conn, sql: str, values: List[str]) -> set:
+    found = set()
+    for start in range(0, len(values), LOOKUP_CHUNK):
+        chunk = values[start:start + LOOKUP_CHUNK]
+        found.update(r[0] for r in conn.execute(sql.format(','.join('?' * len(chunk))), chunk))
+    return found
+
+def import_roster(source, workers: int = WORKERS) -> Dict:
+    """Create student accounts and profiles from a roster CSV.
+
+    Returns counts, per-row errors and the generated initial passwords for
+    rows that did not supply one.
+    """
+    started = time.perf_counter()
+    errors = []
+    accepted = []
+    seen_emails, seen_rolls = set(), set()
+
+    stream = text_stream(source)
+    try:
+        for line, row, error in parse_roster(stream):
+            if error is None and row['email'] in seen_emails:
+                error = "Duplicate email in roster"
+            elif error is None and row['roll_number'] in seen_rolls:
+                error = "Duplicate roll number in roster"
+            if error:
+                errors.append({'row': line, 'email': row.get('email', ''), 'error': error})
+                continue
+            seen_emails.add(row['email'])
+            seen_rolls.add(row['roll_number'])
+            accepted.append((line, row))
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            stream.close()
+
+    generated = {}
+    plain = []
+    for _, row in accepted:
+        if not row.get('password'):
+            generated[row['email']] = secrets.token_urlsafe(9)
+        plain.append(row.get('password') or generated[row['email']])
+    hashes = hash_passwords(plain, workers) if plain else []
+
+    conn = get_connection()
+    conn.isolation_level = None
+    try:
+        # Hold the write lock from the duplicate check through the inserts
+        conn.execute('BEGIN IMMEDIATE')
+        emails = [row['email'] for _, row in accepted]
+        taken_emails = _existing(conn, 'SELECT lower(email) FROM users WHERE email COLLATE NOCASE IN ({})', emails)
+        taken_rolls = _existing(conn, 'SELECT roll_number FROM student_profiles WHERE roll_number IN ({})',
+                                [row['roll_number'] for _, row in accepted])
+
+        next_id = conn.execute('SELECT COALESCE(MAX(user_id), 0) FROM users').fetchone()[0] + 1
+        users, profiles = [], []
+        for (line, row), hashed in zip(accepted, hashes):
+            if row['email'] in taken_emails:
+                errors.append({'row': line, 'email': row['email'], 'error': "Email already registered"})
+                continue
+            if row['roll_number'] in taken_rolls:
+                errors.append({'row': line, 'email': row['email'], 'error': "Roll number already exists"})
+                continue
+            users.append((next_id, row['email'], hashed, row['full_name'], row.get('phone') or None))
+            profiles.append((next_id, row['roll_number'], row['department'], row['semester'],
+                             row.get('phone') or None, row.get('address') or None,
+                             row.get('father_name') or None, row.get('mother_name') or None,
+                             row.get('dob') or None, row.get('admission_date') or None,
+                             row.get('cet_rank') or None, row.get('admission_quota') or None))
+            next_id += 1
+
+        conn.executemany('''
+            INSERT INTO users (user_id, email, password, full_name, role, phone)
+            VALUES (?, ?, ?, ?, 'student', ?)
+        ''', users)
+        conn.executemany('''
+            INSERT INTO student_profiles
+            (user_id, roll_number, department, semester, phone, address, father_name, mother_name,
+             dob, admission_date, academic_status, cet_rank, admission_quota)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'Active', ?, ?)
+        ''', profiles)
+        conn.execute('COMMIT')
+    except Exception:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+    created = {user[1] for user in users}
+    errors.sort(key=lambda e: e['row'])
+    return {
+        'created': len(users),
+        'failed': len(errors),
+        'errors': errors,
+        'credentials': [{'email': row['email'], 'roll_number': row['roll_number'], 'password': generated[row['email']]}
+                        for _, row in accepted if row['email'] in generated and row['email'] in created],
+        'elapsed_seconds': round(time.perf_counter() - started, 2),
+    }
@@ -0,0 +1,247 @@
+"""
+Session Store
+Server-side login sessions shared by every Streamlit process that uses the
+same database, so the portal can run several workers behind a reverse proxy
+without sticky sessions.
+
+A login creates a row in sessions and a signed token "<session id>.<hmac>".
+The browser receives the token only as an HttpOnly cookie (see
+modules.auth_routes): the page is sent to a route with a single-use handoff
+code, and the route trades the code for the cookie. The signature is checked
+before any lookup, so a forged or mangled token never reaches SQLite. Each process keeps a small
+read-through cache of resolved tokens: a rerun costs a dict lookup, and the
+store is read again only after CACHE_SECONDS, which bounds how long a logout
+or deactivation in another process takes to apply here.
+
+ERP_SESSION_TTL sets the session lifetime in seconds (default 8 hours) and
+ERP_SESSION_CACHE the cache freshness. ERP_SESSION_SECRET sets the signing
+key; without it a random key is generated once and kept in the database,
+where every process sharing that database reads it.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from modules import database, metrics
+
+SESSION_TTL = int(os.environ.get('ERP_SESSION_TTL', str(8 * 3600)))
+CACHE_SECONDS = float(os.environ.get('ERP_SESSION_CACHE', '30'))
+CACHE_SIZE = 4096
+PURGE_INTERVAL = 3600  # seconds between deletes of expired rows
+HANDOFF_SECONDS = 60   # lifetime of a login handoff code
+
+_lock = threading.Lock()
+_ready_path = None
+_secret: Optional[bytes] = None
+_cache: 'OrderedDict[str, tuple]' = OrderedDict()  # session id -> (user, expires_at, fresh_until)
+_last_purge = 0.0
+
+def init_sessions_table(conn):
+    """Create the session and signing key tables"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            expires_at INTEGER NOT NULL,
+            revoked INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_handoffs (
+            code TEXT PRIMARY KEY,
+            token TEXT NOT NULL,
+            expires_at INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS session_keys (
+            key_id INTEGER PRIMARY KEY CHECK (key_id = 1),
+            secret TEXT NOT NULL
+        )
+    ''')
+
+def _ensure_store():
+    """Create the tables and load the signing key once per database path"""
+    global _ready_path, _secret
+    with _lock:
+        if _ready_path == database.DATABASE_PATH:
+            return
+        with database.get_db_connection() as conn:
+            init_sessions_table(conn)
+            secret = os.environ.get('ERP_SESSION_SECRET')
+            if not secret:
+                # The first process to get here picks the key; the rest read it
+                conn.execute('INSERT OR IGNORE INTO session_keys (key_id, secret) VALUES (1, ?)',
+                             (secrets.token_hex(32),))
+                secret = conn.execute('SELECT secret FROM session_keys WHERE key_id = 1').fetchone()[0]
+            conn.commit()
+        _secret = secret.encode()
+        _cache.clear()
+        _ready_path = database.DATABASE_PATH
+
+def _sign(session_id: str) -> str:
+    digest = hmac.new(_secret, session_id.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode('ascii')
+
+def _session_id(token: Optional[str]) -> Optional[str]:
+    """The session id of a correctly signed token, else None"""
+    if not token or token.count('.') != 1:
+        return None
+    session_id, signature = token.split('.')
+    if not hmac.compare_digest(_sign(session_id), signature):
+        return None
+    return session_id
+
+def _remember(session_id: str, user: Dict, expires_at: int):
+    with _lock:
+        _cache[session_id] = (user, expires_at, time.time() + CACHE_SECONDS)
+        _cache.move_to_end(session_id)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def _purge_expired(conn, now: int):
+    global _last_purge
+    if now - _last_purge < PURGE_INTERVAL:
+        return
+    _last_purge = now
+    conn.execute('DELETE FROM sessions WHERE expires_at <= ? OR revoked = 1', (now,))
+    conn.execute('DELETE FROM session_handoffs WHERE expires_at <= ?', (now,))
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+def create_session(user: Dict) -> Optional[str]:
+    """Store a session for an authenticated user and return its signed token"""
+    try:
+        _ensure_store()
+        now = int(time.time())
+        session_id = secrets.token_urlsafe(24)
+        with database.get_db_connection() as conn:
+            _purge_expired(conn, now)
+            conn.execute('''
+                INSERT INTO sessions (session_id, user_id, created_at, expires_at) VALUES (?, ?, ?, ?)
+            ''', (session_id, user['user_id'], now, now + SESSION_TTL))
+            conn.commit()
+    except Exception as e:
+        print(f"Error creating session: {e}")
+        return None
+    _remember(session_id, {'user_id': user['user_id'], 'email': user['email'],
+                           'role': user['role'], 'full_name': user['full_name']}, now + SESSION_TTL)
+    return f"{session_id}.{_sign(session_id)}"
+
+def create_handoff(token: str) -> Optional[str]:
+    """Single-use code that the session or logout route exchanges for token within HANDOFF_SECONDS"""
+    try:
+        _ensure_store()
+        code = secrets.token_urlsafe(24)
+        with database.get_db_connection() as conn:
+            conn.execute('INSERT INTO session_handoffs (code, token, expires_at) VALUES (?, ?, ?)',
+                         (code, token, int(time.time()) + HANDOFF_SECONDS))
+            conn.commit()
+        return code
+    except Exception as e:
+        print(f"Error creating session handoff: {e}")
+        return None
+
+def redeem_handoff(code: Optional[str]) -> Optional[str]:
+    """The token for a handoff code; the code is deleted, so a second redeem gets None"""
+    if not code:
+        return None
+    try:
+        _ensure_store()
+        with database.get_db_connection() as conn:
+            row = conn.execute('DELETE FROM session_handoffs WHERE code = ? RETURNING token, expires_at',
+                               (code,)).fetchone()
+            conn.commit()
+    except Exception as e:
+        print(f"Error redeeming session handoff: {e}")
+        return None
+    if row is None or row['expires_at'] <= time.time():
+        return None
+    return row['token']
+
+def resolve(token: Optional[str]) -> Optional[Dict]:
+    """User dict for a live session token, from the local cache when fresh"""
+    if not token:
+        return None
+    try:
+        _ensure_store()
+    except Exception as e:
+        print(f"Error opening session store: {e}")
+        return None
+    session_id = _session_id(token)
+    if session_id is None:
+        return None
+
+    now = time.time()
+    with _lock:
+        cached = _cache.get(session_id)
+    if cached and now < cached[2]:
+        metrics.cache_lookup('sessions', True)
+        return cached[0] if now < cached[1] else None
+    metrics.cache_lookup('sessions', False)
+
+    try:
+        with database.get_db_connection() as conn:
+            row = conn.execute('''
+                SELECT s.expires_at, u.user_id, u.email, u.role, u.full_name
+                FROM sessions s JOIN users u ON u.user_id = s.user_id
+                WHERE s.session_id = ? AND s.revoked = 0 AND s.expires_at > ? AND u.is_active = 1
+            ''', (session_id, int(now))).fetchone()
+    except Exception as e:
+        print(f"Error resolving session: {e}")
+        return None
+    if row is None:
+        with _lock:
+            _cache.pop(session_id, None)
+        return None
+    user = {'user_id': row['user_id'], 'email': row['email'], 'role': row['role'], 'full_name': row['full_name']}
+    _remember(session_id, user, row['expires_at'])
+    return user
+
+def revoke(token: Optional[str]) -> bool:
+    """End a session in every process (others notice within CACHE_SECONDS)"""
+    try:
+        _ensure_store()
+        session_id = _session_id(token)
+        if session_id is None:
+            return False
+        with _lock:
+            _cache.pop(session_id, None)
+        with database.get_db_connection() as conn:
+            conn.execute('UPDATE sessions SET revoked = 1 WHERE session_id = ?', (session_id,))
+            conn.commit()
+        return True
+    except Exception as e:
+        print(f"Error revoking session: {e}")
+        return False
+
+def revoke_user_sessions(user_id: int) -> int:
+    """End every session of a user, e.g. after a password change or deactivation"""
+    try:
+        _ensure_store()
+        with database.get_db_connection() as conn:
+            ids = [row[0] for row in conn.execute('''
+                SELECT session_id FROM sessions WHERE user_id = ? AND revoked = 0
+            ''', (user_id,))]
+            conn.execute('UPDATE sessions SET revoked = 1 WHERE user_id = ?', (user_id,))
+            conn.commit()
+    except Exception as e:
+        print(f"Error revoking sessions: {e}")
+        return 0
+    with _lock:
+        for session_id in ids:
+            _cache.pop(session_id, None)
+    return len(ids)
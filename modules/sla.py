@@ -0,0 +1,286 @@
+"""
+SLA Timers
+Tracks how long service requests wait in Submitted and tickets wait in Open.
+
+Triggers on service_requests and tickets keep one row per waiting item in
+sla_timers with its due_at. A scheduler thread holds the pending timers in a
+heap ordered by due_at. Each tick pops only the timers that are due, plus any
+timers created since the last tick (found by timer_id above a watermark), so
+open items that are not yet due are never rescanned.
+
+When a timer lapses, the item's priority is bumped (Low -> Medium -> High) and
+the timer is re-armed with the SLA for the new priority. A lapse at High marks
+the item as breached. Admins get one summary notification per tick. Timers
+that lapsed while the app was down fire on the first tick after a restart.
+
+Set ERP_SLA=0 to disable the scheduler; ERP_SLA_POLL sets the longest sleep
+between ticks in seconds (default 30).
+"""
+
+import heapq
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from modules import metrics
+from modules.database import get_db_connection
+
+# Hours an item may wait in its waiting status, by priority
+SLA_POLICIES = {
+    'request': {'table': 'service_requests', 'key': 'request_id', 'status': 'Submitted',
+                'hours': {'High': 24, 'Medium': 72, 'Low': 120}},
+    'ticket': {'table': 'tickets', 'key': 'ticket_id', 'status': 'Open',
+               'hours': {'High': 8, 'Medium': 24, 'Low': 72}},
+}
+PRIORITY_ESCALATION = {'Low': 'Medium', 'Medium': 'High'}
+
+POLL_INTERVAL = float(os.environ.get('ERP_SLA_POLL', '30'))
+MAX_FIRE_BATCH = 1000  # timers escalated per transaction
+
+_enabled = os.environ.get('ERP_SLA', '1') == '1'
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def _timestamp(moment: datetime) -> str:
+    """SQLite CURRENT_TIMESTAMP format (UTC)"""
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def due_at(entity_type: str, priority: str, start: datetime) -> str:
+    """Deadline for an item of this priority that started waiting at start"""
+    hours = SLA_POLICIES[entity_type]['hours']
+    return _timestamp(start + timedelta(hours=hours.get(priority, max(hours.values()))))
+
+# ============================================================================
+# TIMER TABLE
+# ============================================================================
+
+def _hours_modifier(entity_type: str, row: str) -> str:
+    """SQL CASE giving the datetime() modifier for row.priority ('+24 hours')"""
+    hours = SLA_POLICIES[entity_type]['hours']
+    cases = ' '.join(f"WHEN '{priority}' THEN '+{h} hours'" for priority, h in hours.items())
+    return f"CASE {row}.priority {cases} ELSE '+{max(hours.values())} hours' END"
+
+def init_sla_tables():
+    """Create sla_timers, (re)create its triggers and arm timers for waiting items"""
+    with get_db_connection() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sla_timers (
+                timer_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                entity_type TEXT NOT NULL,
+                entity_id INTEGER NOT NULL,
+                due_at TIMESTAMP,
+                escalation_level INTEGER DEFAULT 0,
+                escalated_at TIMESTAMP,
+                breached_at TIMESTAMP,
+                UNIQUE (entity_type, entity_id)
+            )
+        ''')
+        # Only armed timers are indexed; breached ones keep due_at NULL
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_sla_timers_due ON sla_timers(due_at) WHERE due_at IS NOT NULL')
+
+        for entity_type, policy in SLA_POLICIES.items():
+            table, key, status = policy['table'], policy['key'], policy['status']
+            # Triggers are rebuilt so edited SLA_POLICIES apply on the next start
+            for suffix in ('insert', 'status', 'delete'):
+                conn.execute(f'DROP TRIGGER IF EXISTS sla_{entity_type}_{suffix}')
+            conn.execute(f'''
+                CREATE TRIGGER sla_{entity_type}_insert AFTER INSERT ON {table}
+                WHEN NEW.status = '{status}'
+                BEGIN
+                    INSERT OR REPLACE INTO sla_timers (entity_type, entity_id, due_at)
+                    VALUES ('{entity_type}', NEW.{key},
+                            datetime(COALESCE(NEW.created_at, CURRENT_TIMESTAMP), {_hours_modifier(entity_type, 'NEW')}));
+                END
+            ''')
+            # Leaving the waiting status cancels the timer; returning to it re-arms from now
+            conn.execute(f'''
+                CREATE TRIGGER sla_{entity_type}_status AFTER UPDATE OF status ON {table}
+                WHEN NEW.status IS NOT OLD.status
+                BEGIN
+                    DELETE FROM sla_timers
+                    WHERE entity_type = '{entity_type}' AND entity_id = NEW.{key} AND NEW.status != '{status}';
+                    INSERT OR REPLACE INTO sla_timers (entity_type, entity_id, due_at)
+                    SELECT '{entity_type}', NEW.{key}, datetime('now', {_hours_modifier(entity_type, 'NEW')})
+                    WHERE NEW.status = '{status}';
+                END
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER sla_{entity_type}_delete AFTER DELETE ON {table}
+                BEGIN
+                    DELETE FROM sla_timers WHERE entity_type = '{entity_type}' AND entity_id = OLD.{key};
+                END
+            ''')
+            # Items written before the triggers existed
+            conn.execute(f'''
+                INSERT OR IGNORE INTO sla_timers (entity_type, entity_id, due_at)
+                SELECT '{entity_type}', t.{key},
+                       datetime(COALESCE(t.created_at, CURRENT_TIMESTAMP), {_hours_modifier(entity_type, 't')})
+                FROM {table} t WHERE t.status = '{status}'
+            ''')
+        conn.commit()
+
+def get_sla_summary() -> Dict[str, Dict[str, int]]:
+    """Waiting, overdue, escalated and breached counts per item type"""
+    try:
+        with get_db_connection() as conn:
+            rows = conn.execute('''
+                SELECT entity_type,
+                       COUNT(*) AS waiting,
+                       SUM(due_at IS NOT NULL AND due_at <= ?) AS overdue,
+                       SUM(escalation_level > 0) AS escalated,
+                       SUM(breached_at IS NOT NULL) AS breached
+                FROM sla_timers GROUP BY entity_type
+            ''', (_timestamp(_now()),)).fetchall()
+            return {row['entity_type']: {k: row[k] or 0 for k in ('waiting', 'overdue', 'escalated', 'breached')}
+                    for row in rows}
+    except Exception as e:
+        print(f"Error getting SLA summary: {e}")
+        return {}
+
+# ============================================================================
+# SCHEDULER
+# ============================================================================
+
+class SlaScheduler:
+    """Heap of armed timers; fires lapsed ones in batches"""
+
+    def __init__(self):
+        self._heap: List[tuple] = []  # (due_at, timer_id)
+        self._watermark = 0  # highest timer_id loaded into the heap
+        self._lock = threading.Lock()
+        self._halt = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def _load_new(self, conn):
+        """Push timers created since the last load (everything on the first call)"""
+        rows = conn.execute('''
+            SELECT timer_id, due_at FROM sla_timers WHERE timer_id > ? ORDER BY timer_id
+        ''', (self._watermark,)).fetchall()
+        for row in rows:
+            if row['due_at'] is not None:
+                heapq.heappush(self._heap, (row['due_at'], row['timer_id']))
+        if rows:
+            self._watermark = rows[-1]['timer_id']
+
+    def tick(self, now: Optional[datetime] = None) -> int:
+        """Escalate every lapsed timer; returns how many fired"""
+        now = now or _now()
+        stamp = _timestamp(now)
+        fired = []
+        with self._lock, get_db_connection() as conn:
+            self._load_new(conn)
+            while self._heap and self._heap[0][0] <= stamp:
+                due = []
+                while self._heap and self._heap[0][0] <= stamp and len(due) < MAX_FIRE_BATCH:
+                    due.append(heapq.heappop(self._heap))
+                fired.extend(self._fire(conn, due, now))
+                conn.commit()
+        if fired:
+            self._notify(fired)
+        return len(fired)
+
+    def _fire(self, conn, due: List[tuple], now: datetime) -> List[Dict]:
+        """Escalate one batch; heap entries whose timer was cancelled or re-armed are dropped"""
+        stamp = _timestamp(now)
+        fired = []
+        for due_at_value, timer_id in due:
+            timer = conn.execute('''
+                SELECT t.entity_type, t.entity_id, COALESCE(r.priority, k.priority) AS priority
+                FROM sla_timers t
+                LEFT JOIN service_requests r ON t.entity_type = 'request' AND r.request_id = t.entity_id
+                LEFT JOIN tickets k ON t.entity_type = 'ticket' AND k.ticket_id = t.entity_id
+                WHERE t.timer_id = ? AND t.due_at = ?
+            ''', (timer_id, due_at_value)).fetchone()
+            if timer is None:
+                continue
+
+            policy = SLA_POLICIES[timer['entity_type']]
+            priority = PRIORITY_ESCALATION.get(timer['priority'])
+            if priority:
+                conn.execute(f"UPDATE {policy['table']} SET priority = ? WHERE {policy['key']} = ?",
+                             (priority, timer['entity_id']))
+                next_due = due_at(timer['entity_type'], priority, now)
+                conn.execute('''
+                    UPDATE sla_timers SET due_at = ?, escalation_level = escalation_level + 1, escalated_at = ?
+                    WHERE timer_id = ?
+                ''', (next_due, stamp, timer_id))
+                heapq.heappush(self._heap, (next_due, timer_id))
+            else:
+                conn.execute('''
+                    UPDATE sla_timers SET due_at = NULL, escalation_level = escalation_level + 1,
+                                          escalated_at = ?, breached_at = ?
+                    WHERE timer_id = ?
+                ''', (stamp, stamp, timer_id))
+
+            outcome = 'escalated' if priority else 'breached'
+            metrics.SLA_ESCALATIONS.inc(entity=timer['entity_type'], outcome=outcome)
+            fired.append({'entity_type': timer['entity_type'], 'entity_id': timer['entity_id'],
+                          'priority': priority or timer['priority'], 'outcome': outcome})
+        return fired
+
+    def _notify(self, fired: List[Dict]):
+        """One summary notification to every admin for this tick's lapses"""
+        from modules.notifications import notify_users
+
+        counts = {}
+        for item in fired:
+            key = (item['entity_type'], item['outcome'])
+            counts[key] = counts.get(key, 0) + 1
+        message = ', '.join(f"{n} {entity}{'s' if n != 1 else ''} {outcome}"
+                            for (entity, outcome), n in sorted(counts.items()))
+        try:
+            with get_db_connection() as conn:
+                admins = [row[0] for row in conn.execute("SELECT user_id FROM users WHERE role = 'admin'")]
+        except Exception as e:
+            print(f"SLA notification error: {e}")
+            return
+        notify_users(admins, "⏰ SLA lapsed", message, "warning")
+
+    def seconds_until_next(self, now: Optional[datetime] = None) -> float:
+        """Sleep until the earliest timer, but at most POLL_INTERVAL to pick up new ones"""
+        with self._lock:
+            if not self._heap:
+                return POLL_INTERVAL
+            earliest = datetime.strptime(self._heap[0][0], '%Y-%m-%d %H:%M:%S')
+        wait = (earliest - (now or _now())).total_seconds()
+        return min(max(wait, 0.0), POLL_INTERVAL)
+
+    def start(self):
+        def run():
+            while not self._halt.is_set():
+                try:
+                    self.tick()
+                except Exception as e:
+                    print(f"SLA scheduler error: {e}")
+                self._halt.wait(max(self.seconds_until_next(), 1.0))
+
+        self._thread = threading.Thread(target=run, name='erp-sla', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._halt.set()
+        if self._thread is not None:
+            self._thread.join()
+
+def start_scheduler() -> Optional[SlaScheduler]:
+    """Create the timer table and start the scheduler thread (once per process)"""
+    global _scheduler
+    if not _enabled:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            try:
+                init_sla_tables()
+            except Exception as e:
+                print(f"SLA scheduler not started: {e}")
+                return None
+            _scheduler = SlaScheduler()
+            _scheduler.start()
+    return _scheduler
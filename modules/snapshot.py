@@ -0,0 +1,329 @@
+"""
+Columnar Analytics Snapshot
+Exports the heavy reporting tables to Parquet so department and institution
+analytics scan columnar files with pandas instead of the transactional SQLite
+database that students are writing to.
+
+Each refresh appends one part file per table holding
+  - rows inserted since the last refresh (rowid above the stored watermark), and
+  - rows updated or deleted since then, taken from a trigger-fed change log.
+Readers merge parts by rowid (last write wins, deletions are tombstones) and
+only read parts they have not seen yet. Parts are compacted periodically.
+
+Enable with ERP_SNAPSHOTS=1; ERP_SNAPSHOT_INTERVAL (seconds, default 300) sets
+the background refresh period.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from modules import database
+
+# pandas and pyarrow load only when a snapshot is actually refreshed or read,
+# so importing this module (e.g. for is_enabled()) stays cheap
+if TYPE_CHECKING:
+    import pandas as pd
+
+SNAPSHOT_ROOT = os.environ.get('ERP_SNAPSHOT_DIR', os.path.join(database.DATA_DIR, 'snapshots'))
+REFRESH_INTERVAL = float(os.environ.get('ERP_SNAPSHOT_INTERVAL', '300'))
+MAX_PARTS = 8  # parts per table before they are compacted into one
+
+# Tables exported to the snapshot; student_profiles carries department and CGPA
+SNAPSHOT_TABLES = ['academic_marks', 'attendance', 'fees', 'tickets', 'service_requests', 'student_profiles']
+
+_enabled = os.environ.get('ERP_SNAPSHOTS', '0') == '1'
+_lock = threading.RLock()
+_frames: Dict[str, tuple] = {}  # table -> (snapshot dir, parts loaded, DataFrame)
+_refresher = None
+
+def is_enabled() -> bool:
+    return _enabled
+
+def enable(value: bool = True):
+    """Serve analytics from the snapshot (True) or from SQLite (False)"""
+    global _enabled
+    _enabled = value
+
+def snapshot_dir() -> str:
+    """Snapshot directory for the database currently configured in modules.database"""
+    name = os.path.splitext(os.path.basename(database.DATABASE_PATH))[0]
+    return os.path.join(SNAPSHOT_ROOT, name)
+
+# ============================================================================
+# CHANGE TRACKING
+# ============================================================================
+
+def init_snapshot_tables(conn=None):
+    """Create the change log and the update/delete triggers that feed it"""
+    def create(conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS snapshot_changes (
+                change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_id INTEGER NOT NULL
+            )
+        ''')
+        for table in SNAPSHOT_TABLES:
+            if not _table_exists(conn, table):
+                continue
+            for event in ('UPDATE', 'DELETE'):
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS snapshot_{table}_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        INSERT INTO snapshot_changes (table_name, row_id) VALUES ('{table}', OLD.rowid);
+                    END
+                ''')
+        conn.commit()
+
+    if conn is not None:
+        create(conn)
+    else:
+        with database.get_db_connection() as conn:
+            create(conn)
+
+def _table_exists(conn, table: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (table,)).fetchone() is not None
+
+# ============================================================================
+# MANIFEST
+# ============================================================================
+
+def _manifest_path(directory: str) -> str:
+    return os.path.join(directory, 'manifest.json')
+
+def load_manifest(directory: Optional[str] = None) -> Dict:
+    directory = directory or snapshot_dir()
+    try:
+        with open(_manifest_path(directory)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'database': None, 'change_id': 0, 'tables': {}}
+    return manifest
+
+def _save_manifest(directory: str, manifest: Dict):
+    path = _manifest_path(directory)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+# ============================================================================
+# EXPORT
+# ============================================================================
+
+def _write_part(directory: str, table: str, frame: 'pd.DataFrame', sequence: int) -> str:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.join(directory, table), exist_ok=True)
+    name = f"part-{sequence:06d}.parquet"
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False),
+                   os.path.join(directory, table, name), compression='zstd')
+    return name
+
+def _export_table(conn, table: str, state: Dict, change_from: int, change_to: int) -> Optional['pd.DataFrame']:
+    """New rows plus changed/deleted rows for one table, or None when nothing changed"""
+    import pandas as pd
+
+    watermark = state.get('rowid', 0)
+    inserted = pd.read_sql_query(f'SELECT rowid AS _rowid, * FROM {table} WHERE rowid > ? ORDER BY rowid',
+                                 conn, params=(watermark,))
+    changed = pd.read_sql_query(f'''
+        SELECT c.row_id AS _rowid, t.*, t.rowid IS NULL AS _deleted
+        FROM (SELECT DISTINCT row_id FROM snapshot_changes
+              WHERE table_name = ? AND change_id > ? AND change_id <= ? AND row_id <= ?) c
+        LEFT JOIN {table} t ON t.rowid = c.row_id
+    ''', conn, params=(table, change_from, change_to, watermark))
+
+    if inserted.empty and changed.empty:
+        return None
+    inserted['_deleted'] = False
+    changed['_deleted'] = changed['_deleted'].astype(bool)
+    frames = [f for f in (changed, inserted) if not f.empty]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+def refresh(full: bool = False) -> Dict[str, int]:
+    """Export new and changed rows to Parquet; returns rows written per table"""
+    directory = snapshot_dir()
+    written = {}
+    with _lock:
+        manifest = load_manifest(directory)
+        if full or manifest.get('database') != os.path.abspath(database.DATABASE_PATH):
+            _remove_parts(directory, manifest)
+            manifest = {'database': os.path.abspath(database.DATABASE_PATH), 'change_id': 0, 'tables': {}}
+        os.makedirs(directory, exist_ok=True)
+
+        with database.get_db_connection() as conn:
+            # Triggers first, so nothing changed during the export is missed next time
+            init_snapshot_tables(conn)
+            conn.execute('BEGIN')
+            try:
+                change_to = conn.execute('SELECT COALESCE(MAX(change_id), 0) FROM snapshot_changes').fetchone()[0]
+                for table in SNAPSHOT_TABLES:
+                    if not _table_exists(conn, table):
+                        continue
+                    state = manifest['tables'].setdefault(table, {'rowid': 0, 'parts': [], 'sequence': 0})
+                    frame = _export_table(conn, table, state, manifest['change_id'], change_to)
+                    if frame is None:
+                        continue
+                    state['sequence'] += 1
+                    state['parts'].append(_write_part(directory, table, frame, state['sequence']))
+                    state['rowid'] = max(state['rowid'], int(frame['_rowid'].max()))
+                    written[table] = len(frame)
+            finally:
+                conn.execute('COMMIT')
+
+            conn.execute('DELETE FROM snapshot_changes WHERE change_id <= ?', (change_to,))
+            conn.commit()
+
+        manifest['change_id'] = change_to
+        manifest['refreshed_at'] = datetime.now().isoformat(timespec='seconds')
+        for table, state in manifest['tables'].items():
+            if len(state['parts']) > MAX_PARTS:
+                _compact(directory, table, state)
+        _save_manifest(directory, manifest)
+    return written
+
+def _compact(directory: str, table: str, state: Dict):
+    """Rewrite a table's parts as a single part holding only live rows"""
+    merged = _read_parts(directory, table, state['parts'])
+    old_parts = state['parts']
+    state['sequence'] += 1
+    merged['_deleted'] = False
+    state['parts'] = [_write_part(directory, table, merged, state['sequence'])]
+    for part in old_parts:
+        os.remove(os.path.join(directory, table, part))
+
+def _remove_parts(directory: str, manifest: Dict):
+    for table, state in manifest.get('tables', {}).items():
+        for part in state.get('parts', []):
+            path = os.path.join(directory, table, part)
+            if os.path.exists(path):
+                os.remove(path)
+    _frames.clear()
+
+# ============================================================================
+# READ
+# ============================================================================
+
+def _merge(frames: List['pd.DataFrame']) -> 'pd.DataFrame':
+    """Last version of every rowid, tombstones removed"""
+    import pandas as pd
+
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    merged = merged.drop_duplicates('_rowid', keep='last')
+    return merged[~merged['_deleted']].reset_index(drop=True)
+
+def _read_parts(directory: str, table: str, parts: List[str], base: Optional['pd.DataFrame'] = None) -> 'pd.DataFrame':
+    import pyarrow.parquet as pq
+
+    frames = [] if base is None else [base.assign(_deleted=False)]
+    frames += [pq.read_table(os.path.join(directory, table, part)).to_pandas() for part in parts]
+    return _merge(frames)
+
+def _age_seconds(manifest: Dict) -> float:
+    refreshed = manifest.get('refreshed_at')
+    if not refreshed:
+        return float('inf')
+    return (datetime.now() - datetime.fromisoformat(refreshed)).total_seconds()
+
+def table(name: str) -> 'pd.DataFrame':
+    """Current snapshot of one table, reading only parts not already loaded"""
+    with _lock:
+        directory = snapshot_dir()
+        manifest = load_manifest(directory)
+        if not manifest['tables'] or manifest.get('database') != os.path.abspath(database.DATABASE_PATH) \
+                or (_refresher is None and _age_seconds(manifest) > REFRESH_INTERVAL):
+            refresh()
+            manifest = load_manifest(directory)
+
+        parts = manifest['tables'].get(name, {}).get('parts', [])
+        cached = _frames.get(name)
+        if cached and cached[0] == directory and parts[:len(cached[1])] == cached[1]:
+            new_parts = parts[len(cached[1]):]
+            frame = _read_parts(directory, name, new_parts, cached[2]) if new_parts else cached[2]
+        else:
+            frame = _read_parts(directory, name, parts)
+        _frames[name] = (directory, list(parts), frame)
+        return frame
+
+def start_refresher(interval: float = REFRESH_INTERVAL):
+    """Refresh the snapshot in a daemon thread every interval seconds (once per process)"""
+    global _refresher
+    if not _enabled or _refresher is not None:
+        return
+
+    def run():
+        while True:
+            try:
+                refresh()
+            except Exception as e:
+                print(f"Snapshot refresh error: {e}")
+            time.sleep(interval)
+
+    _refresher = threading.Thread(target=run, name='erp-snapshot', daemon=True)
+    _refresher.start()
+
+# ============================================================================
+# ANALYTICS ON THE SNAPSHOT
+# ============================================================================
+
+def departmental_analytics(department: str) -> Dict:
+    """Snapshot-backed equivalent of database.get_departmental_analytics"""
+    import pandas as pd
+
+    profiles = table('student_profiles')
+    if profiles.empty:
+        return {'total_students': 0, 'avg_cgpa': 0, 'pass_percentage': 0, 'fail_percentage': 100}
+    dept = profiles[profiles['department'] == department]
+    marks = table('academic_marks')
+    grades = marks.loc[marks['user_id'].isin(dept['user_id']), 'grade'] if not marks.empty else pd.Series(dtype=object)
+
+    total_marks = len(grades)
+    pass_percentage = (grades.ne('F').sum() / total_marks * 100) if total_marks else 0
+    avg_cgpa = dept['cgpa'].mean() if len(dept) else 0
+    return {
+        'total_students': len(dept),
+        'avg_cgpa': round(float(avg_cgpa) if pd.notna(avg_cgpa) else 0, 2),
+        'pass_percentage': round(float(pass_percentage), 2),
+        'fail_percentage': round(100 - float(pass_percentage), 2),
+    }
+
+def analytics_data(days: int = 30) -> Dict[str, 'pd.DataFrame']:
+    """Snapshot-backed equivalent of analytics.get_analytics_data"""
+    import pandas as pd
+
+    # SQLite's datetime('now') is UTC and timestamps are stored as 'YYYY-MM-DD HH:MM:SS'
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+
+    requests = table('service_requests')
+    if requests.empty:
+        requests = pd.DataFrame(columns=['created_at', 'status'])
+    recent = requests[requests['created_at'] >= since]
+    requests_trend = (recent.assign(date=recent['created_at'].str[:10])
+                      .groupby(['date', 'status']).size().reset_index(name='count')
+                      [['date', 'count', 'status']].sort_values('date', kind='stable').reset_index(drop=True))
+
+    tickets = table('tickets')
+    if tickets.empty:
+        tickets = pd.DataFrame(columns=['created_at', 'category', 'status'])
+    recent_tickets = tickets[tickets['created_at'] >= since]
+    tickets_by_category = (recent_tickets.assign(resolved=recent_tickets['status'].eq('Resolved') * 100.0)
+                           .groupby('category')
+                           .agg(count=('status', 'size'), resolution_rate=('resolved', 'mean'))
+                           .reset_index())
+
+    status_distribution = requests.groupby('status').size().reset_index(name='count')
+    return {
+        'requests_trend': requests_trend,
+        'tickets_by_category': tickets_by_category,
+        'status_distribution': status_distribution,
+    }
@@ -0,0 +1,404 @@
+"""
+Portal Theme
+DayNight Admin inspired design system. The stylesheet is minified once per
+process and the same <style> tag is re-emitted on every rerun.
+"""
+
+import re
+from functools import lru_cache
+
+CSS = """
+@import url('https://fonts.googleapis.com/css2?family=Inter:wght@400;500;600;700&display=swap');
+
+/* ===== DARK THEME VARIABLES ===== */
+:root {
+    --accent: #6366f1;
+    --accent-hover: #818cf8;
+    --success: #10b981;
+    --warning: #f59e0b;
+    --danger: #ef4444;
+    --info: #06b6d4;
+
+    --background: #0f172a;
+    --surface: #1e293b;
+    --surface-hover: #334155;
+
+    --text-primary: #f1f5f9;
+    --text-secondary: #cbd5e1;
+    --text-tertiary: #94a3b8;
+
+    --border: #334155;
+    --border-light: #475569;
+
+    --shadow-sm: 0 1px 2px 0 rgba(0, 0, 0, 0.5);
+    --shadow: 0 4px 6px -1px rgba(0, 0, 0, 0.5), 0 2px 4px -2px rgba(0, 0, 0, 0.5);
+    --shadow-md: 0 10px 15px -3px rgba(0, 0, 0, 0.5), 0 4px 6px -4px rgba(0, 0, 0, 0.5);
+    --shadow-lg: 0 20px 25px -5px rgba(0, 0, 0, 0.7), 0 8px 10px -6px rgba(0, 0, 0, 0.7);
+    --shadow-xl: 0 25px 50px -12px rgba(0, 0, 0, 0.9);
+
+    --radius-sm: 0.375rem;
+    --radius: 0.5rem;
+    --radius-md: 0.75rem;
+    --radius-lg: 1rem;
+}
+
+/* ===== Base Styles ===== */
+* {
+    font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
+}
+
+.main {
+    background: var(--background);
+    padding: 1.5rem;
+}
+
+.block-container {
+    padding: 2rem 3rem;
+    max-width: 1400px;
+}
+
+/* ===== Typography ===== */
+h1, h2, h3 {
+    color: var(--text-primary) !important;
+    font-weight: 700 !important;
+    letter-spacing: -0.025em !important;
+}
+
+h1 {
+    font-size: 2.25rem !important;
+    margin-bottom: 0.5rem !important;
+}
+
+h2 {
+    font-size: 1.875rem !important;
+    margin-bottom: 1rem !important;
+}
+
+h3 {
+    font-size: 1.5rem !important;
+    margin-bottom: 0.75rem !important;
+}
+
+p, div, span {
+    color: var(--text-secondary);
+}
+
+/* ===== Stat Cards (Metrics) ===== */
+.stMetric {
+    background: var(--surface);
+    padding: 1.5rem;
+    border-radius: var(--radius-lg);
+    border: 1px solid var(--border);
+    box-shadow: var(--shadow);
+    transition: all 0.2s ease;
+}
+
+.stMetric:hover {
+    box-shadow: var(--shadow-md);
+    transform: translateY(-2px);
+}
+
+.stMetric label {
+    color: var(--text-secondary) !important;
+    font-weight: 600 !important;
+    font-size: 0.875rem !important;
+    text-transform: uppercase;
+    letter-spacing: 0.05em;
+}
+
+.stMetric [data-testid="stMetricValue"] {
+    color: var(--text-primary) !important;
+    font-size: 2.25rem !important;
+    font-weight: 700 !important;
+    line-height: 1.2 !important;
+}
+
+.stMetric [data-testid="stMetricDelta"] {
+    font-size: 0.875rem !important;
+}
+
+/* ===== Cards ===== */
+.card, [data-testid="stVerticalBlock"] > div {
+    background: var(--surface);
+    border: 1px solid var(--border);
+    border-radius: var(--radius-lg);
+    padding: 1.5rem;
+    box-shadow: var(--shadow);
+    transition: all 0.2s ease;
+}
+
+.card:hover {
+    box-shadow: var(--shadow-md);
+}
+
+/* ===== Buttons ===== */
+.stButton > button {
+    background: linear-gradient(135deg, var(--accent) 0%, var(--accent-hover) 100%);
+    color: white;
+    border: none;
+    border-radius: var(--radius);
+    padding: 0.625rem 1.25rem;
+    font-weight: 600;
+    font-size: 0.875rem;
+    box-shadow: var(--shadow);
+    transition: all 0.2s ease;
+    cursor: pointer;
+}
+
+.stButton > button:hover {
+    background: linear-gradient(135deg, var(--accent-hover) 0%, #4338ca 100%);
+    box-shadow: var(--shadow-md);
+    transform: translateY(-1px);
+}
+
+.stButton > button:active {
+    transform: translateY(0);
+}
+
+/* Secondary Button */
+.stButton > button[kind="secondary"] {
+    background: var(--surface);
+    color: var(--text-primary);
+    border: 1px solid var(--border);
+}
+
+.stButton > button[kind="secondary"]:hover {
+    background: var(--surface-hover);
+}
+
+/* ===== Form Inputs ===== */
+.stTextInput > div > div > input,
+.stNumberInput > div > div > input,
+.stSelectbox > div > div > select,
+.stTextArea > div > div > textarea,
+.stDateInput > div > div > input,
+.stTimeInput > div > div > input {
+    background: var(--surface) !important;
+    border: 1px solid var(--border) !important;
+    border-radius: var(--radius) !important;
+    padding: 0.625rem 0.875rem !important;
+    color: var(--text-primary) !important;
+    font-size: 0.875rem !important;
+    transition: all 0.2s ease !important;
+}
+
+.stTextInput > div > div > input:focus,
+.stNumberInput > div > div > input:focus,
+.stSelectbox > div > div > select:focus,
+.stTextArea > div > div > textarea:focus {
+    border-color: var(--accent) !important;
+    box-shadow: 0 0 0 3px rgba(99, 102, 241, 0.1) !important;
+    outline: none !important;
+}
+
+.stTextInput label,
+.stNumberInput label,
+.stSelectbox label,
+.stTextArea label {
+    color: var(--text-secondary) !important;
+    font-weight: 600 !important;
+    font-size: 0.875rem !important;
+    margin-bottom: 0.5rem !important;
+}
+
+/* ===== Sidebar ===== */
+[data-testid="stSidebar"] {
+    background: var(--surface);
+    border-right: 1px solid var(--border);
+    padding: 1.5rem 1rem;
+}
+
+[data-testid="stSidebar"] [data-testid="stMarkdownContainer"] p {
+    color: var(--text-primary);
+    font-weight: 600;
+    font-size: 0.875rem;
+    text-transform: uppercase;
+    letter-spacing: 0.05em;
+    margin-bottom: 1rem;
+}
+
+[data-testid="stSidebar"] .stRadio > label {
+    background: var(--surface);
+    border: 1px solid var(--border);
+    border-radius: var(--radius);
+    padding: 0.75rem 1rem;
+    margin: 0.25rem 0;
+    transition: all 0.2s ease;
+    cursor: pointer;
+}
+
+[data-testid="stSidebar"] .stRadio > label:hover {
+    background: var(--surface-hover);
+    border-color: var(--accent);
+}
+
+[data-testid="stSidebar"] .stRadio [data-baseweb="radio"] > div:first-child {
+    background-color: var(--accent) !important;
+}
+
+/* ===== Tabs ===== */
+.stTabs [data-baseweb="tab-list"] {
+    gap: 0.5rem;
+    background: var(--surface);
+    padding: 0.5rem;
+    border-radius: var(--radius);
+    border: 1px solid var(--border);
+}
+
+.stTabs [data-baseweb="tab"] {
+    background: transparent;
+    border: none;
+    border-radius: var(--radius-sm);
+    padding: 0.625rem 1rem;
+    color: var(--text-secondary);
+    font-weight: 600;
+    font-size: 0.875rem;
+    transition: all 0.2s ease;
+}
+
+.stTabs [data-baseweb="tab"]:hover {
+    background: var(--surface-hover);
+    color: var(--text-primary);
+}
+
+.stTabs [aria-selected="true"] {
+    background: var(--accent) !important;
+    color: white !important;
+}
+
+/* ===== Expanders ===== */
+.streamlit-expanderHeader {
+    background: var(--surface) !important;
+    border: 1px solid var(--border) !important;
+    border-radius: var(--radius) !important;
+    padding: 1rem !important;
+    font-weight: 600 !important;
+    color: var(--text-primary) !important;
+    transition: all 0.2s ease !important;
+}
+
+.streamlit-expanderHeader:hover {
+    background: var(--surface-hover) !important;
+    border-color: var(--accent) !important;
+}
+
+.streamlit-expanderContent {
+    background: var(--surface) !important;
+    border: 1px solid var(--border) !important;
+    border-top: none !important;
+    border-radius: 0 0 var(--radius) var(--radius) !important;
+    padding: 1rem !important;
+}
+
+/* ===== Alerts & Messages ===== */
+.stAlert {
+    border-radius: var(--radius) !important;
+    border: 1px solid var(--border) !important;
+    padding: 1rem !important;
+    box-shadow: var(--shadow-sm) !important;
+}
+
+.stSuccess {
+    background: #f0fdf4 !important;
+    border-left: 4px solid var(--success) !important;
+    color: #166534 !important;
+}
+
+.stInfo {
+    background: #eff6ff !important;
+    border-left: 4px solid var(--info) !important;
+    color: #1e40af !important;
+}
+
+.stWarning {
+    background: #fffbeb !important;
+    border-left: 4px solid var(--warning) !important;
+    color: #92400e !important;
+}
+
+.stError {
+    background: #fef2f2 !important;
+    border-left: 4px solid var(--danger) !important;
+    color: #991b1b !important;
+}
+
+/* ===== Progress Bar ===== */
+.stProgress > div > div > div {
+    background: var(--accent) !important;
+}
+
+/* ===== Data Tables ===== */
+.dataframe {
+    border: 1px solid var(--border) !important;
+    border-radius: var(--radius) !important;
+}
+
+.dataframe thead tr {
+    background: var(--surface-hover) !important;
+}
+
+.dataframe thead th {
+    color: var(--text-primary) !important;
+    font-weight: 600 !important;
+    text-transform: uppercase;
+    font-size: 0.75rem !important;
+    letter-spacing: 0.05em;
+    padding: 0.75rem !important;
+}
+
+.dataframe tbody td {
+    padding: 0.75rem !important;
+    color: var(--text-secondary) !important;
+}
+
+/* ===== Status Badges ===== */
+.status-badge {
+    padding: 0.25rem 0.75rem;
+    border-radius: 9999px;
+    font-size: 0.75rem;
+    font-weight: 600;
+}
+
+/* ===== Custom Scrollbar ===== */
+::-webkit-scrollbar {
+    width: 8px;
+    height: 8px;
+}
+
+::-webkit-scrollbar-track {
+    background: var(--surface-hover);
+}
+
+::-webkit-scrollbar-thumb {
+    background: var(--border);
+    border-radius: var(--radius);
+}
+
+/* ===== File Uploader ===== */
+[data-testid="stFileUploader"] {
+    background: var(--surface);
+    border: 2px dashed var(--border);
+    border-radius: var(--radius-lg);
+    padding: 2rem;
+}
+
+[data-testid="stFileUploader"]:hover {
+    border-color: var(--accent);
+}
+"""
+
+_COMMENTS = re.compile(r"/\*.*?\*/", re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+
+def minify(css: str) -> str:
+    """Strip comments and insignificant whitespace"""
+    css = _COMMENTS.sub('', css)
+    css = _WHITESPACE.sub(' ', css)
+    css = _PUNCTUATION.sub(r'\1', css)
+    return css.replace(';}', '}').strip()
+
+@lru_cache(maxsize=1)
+def style_tag() -> str:
+    """The minified stylesheet wrapped in a <style> tag, built on first use"""
+    return f"<style>{minify(CSS)}</style>"
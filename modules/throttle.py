@@ -0,0 +1,265 @@
+"""
+Login Throttling
+In-memory limits consulted by auth.login before any database or KDF work, so
+a script hammering the login form is turned away in microseconds.
+
+Every attempt takes a token from two buckets: one for the client IP, and one
+for the email address as tried from that IP. Buckets refill at a steady rate
+up to their burst size. Failed logins are also counted per (email, IP) in a
+sliding window (the current fixed window plus a weighted share of the
+previous one). A pair with MAX_FAILURES failures in that window is locked
+until the count decays. The email limits are per IP on purpose: someone who
+knows a victim's address cannot lock the victim out, because the victim's own
+IP has its own bucket and window. The per-IP bucket stays the global guard.
+
+An account as a whole has one more bucket, keyed by the email alone, so
+spreading a brute force over many IPs does not multiply its rate. It never
+refuses: once it is empty, check returns a delay (up to ACCOUNT_MAX_DELAY)
+that auth.login sleeps before checking the password. Everyone trying that
+account is slowed to its refill rate, but the owner is never locked out.
+
+Idle buckets and expired windows are swept every SWEEP_INTERVAL seconds, or
+sooner when a table passes twice MAX_KEYS; a sweep that leaves more than
+MAX_KEYS entries drops the least recently used.
+
+Limits come from ERP_LOGIN_IP_BURST / ERP_LOGIN_IP_RATE (tokens per second),
+ERP_LOGIN_EMAIL_BURST / ERP_LOGIN_EMAIL_RATE, ERP_LOGIN_ACCOUNT_BURST /
+ERP_LOGIN_ACCOUNT_RATE / ERP_LOGIN_ACCOUNT_MAX_DELAY, ERP_LOGIN_MAX_FAILURES
+and ERP_LOGIN_FAILURE_WINDOW (seconds). Set ERP_THROTTLE_PERSIST=1 to save the
+state to the login_throttle table at shutdown and load it at startup, so a
+restart does not reset the limits.
+"""
+
+import atexit
+import heapq
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from modules import metrics
+
+IP_BURST = float(os.environ.get('ERP_LOGIN_IP_BURST', '50'))
+IP_RATE = float(os.environ.get('ERP_LOGIN_IP_RATE', '2'))
+EMAIL_BURST = float(os.environ.get('ERP_LOGIN_EMAIL_BURST', '5'))
+EMAIL_RATE = float(os.environ.get('ERP_LOGIN_EMAIL_RATE', str(1 / 30)))
+ACCOUNT_BURST = float(os.environ.get('ERP_LOGIN_ACCOUNT_BURST', '20'))
+ACCOUNT_RATE = float(os.environ.get('ERP_LOGIN_ACCOUNT_RATE', str(1 / 10)))
+ACCOUNT_MAX_DELAY = float(os.environ.get('ERP_LOGIN_ACCOUNT_MAX_DELAY', '5'))
+MAX_FAILURES = int(os.environ.get('ERP_LOGIN_MAX_FAILURES', '10'))
+FAILURE_WINDOW = float(os.environ.get('ERP_LOGIN_FAILURE_WINDOW', '900'))
+PERSIST = os.environ.get('ERP_THROTTLE_PERSIST', '0') == '1'
+
+MAX_KEYS = 100000      # entries per table kept by a sweep
+SWEEP_INTERVAL = 60.0  # seconds between sweeps
+
+# scope -> (burst, rate)
+_LIMITS = {'ip': (IP_BURST, IP_RATE), 'email': (EMAIL_BURST, EMAIL_RATE),
+           'account': (ACCOUNT_BURST, ACCOUNT_RATE)}
+
+class LoginThrottled(Exception):
+    """Raised by auth.login when a limit is hit; retry_after is in seconds"""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Too many login attempts ({scope})")
+        self.scope = scope
+        self.retry_after = retry_after
+
+def _email_key(email: str, ip: Optional[str]) -> str:
+    """Key of the email scopes: the address as tried from one client IP"""
+    email = email.strip().lower()
+    return f"{email}|{ip}" if ip else email
+
+class LoginLimiter:
+    """Token buckets per IP, per (email, IP) and per account plus a sliding failure window per (email, IP)"""
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], list] = {}  # (scope, key) -> [tokens, updated_at]
+        self._failures: Dict[str, list] = {}             # email key -> [window_start, current, previous]
+        self._lock = threading.Lock()
+        self._next_sweep = None
+
+    def _take(self, scope: str, key: str, burst: float, rate: float, now: float) -> float:
+        """Take one token; returns 0 on success or the seconds until one is available"""
+        bucket = self._buckets.get((scope, key))
+        if bucket is None:
+            self._buckets[(scope, key)] = [burst - 1, now]
+            return 0.0
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            return (1 - tokens) / rate
+        bucket[0] = tokens - 1
+        return 0.0
+
+    def _failure_count(self, email: str, now: float) -> float:
+        entry = self._failures.get(email)
+        if entry is None:
+            return 0.0
+        window_start, current, previous = entry
+        elapsed = now - window_start
+        if elapsed >= 2 * FAILURE_WINDOW:
+            return 0.0
+        if elapsed >= FAILURE_WINDOW:
+            previous, current, elapsed = current, 0, elapsed - FAILURE_WINDOW
+        return current + previous * (1 - elapsed / FAILURE_WINDOW)
+
+    def _delay(self, account: str, now: float) -> float:
+        """Take a token from the account bucket; returns how long the attempt should wait.
+
+        Tokens keep being taken while the bucket is empty, down to the debt that
+        ACCOUNT_MAX_DELAY allows, so a flood keeps the delay at its maximum.
+        """
+        bucket = self._buckets.setdefault(('account', account), [ACCOUNT_BURST, now])
+        tokens = min(ACCOUNT_BURST, bucket[0] + (now - bucket[1]) * ACCOUNT_RATE) - 1
+        bucket[:] = [max(tokens, -ACCOUNT_MAX_DELAY * ACCOUNT_RATE), now]
+        return min(-tokens / ACCOUNT_RATE, ACCOUNT_MAX_DELAY) if tokens < 0 else 0.0
+
+    def _maybe_sweep(self, now: float):
+        if self._next_sweep is None:
+            self._next_sweep = now + SWEEP_INTERVAL
+        elif now >= self._next_sweep or max(len(self._buckets), len(self._failures)) > 2 * MAX_KEYS:
+            self._sweep(now)
+            self._next_sweep = now + SWEEP_INTERVAL
+
+    def check(self, ip: Optional[str], email: str, now: float = None) -> float:
+        """Admit one login attempt or raise LoginThrottled; returns seconds to delay it"""
+        now = time.monotonic() if now is None else now
+        account = email.strip().lower()
+        email = _email_key(email, ip)
+        with self._lock:
+            self._maybe_sweep(now)
+            if self._failure_count(email, now) >= MAX_FAILURES:
+                metrics.LOGIN_THROTTLED.inc(scope='failures')
+                raise LoginThrottled('failures', FAILURE_WINDOW)
+            if ip:
+                wait = self._take('ip', ip, IP_BURST, IP_RATE, now)
+                if wait:
+                    metrics.LOGIN_THROTTLED.inc(scope='ip')
+                    raise LoginThrottled('ip', wait)
+            wait = self._take('email', email, EMAIL_BURST, EMAIL_RATE, now)
+            if wait:
+                metrics.LOGIN_THROTTLED.inc(scope='email')
+                raise LoginThrottled('email', wait)
+            delay = self._delay(account, now)
+        if delay:
+            metrics.LOGIN_DELAYED.inc()
+        return delay
+
+    def record_failure(self, email: str, ip: Optional[str] = None, now: float = None):
+        now = time.monotonic() if now is None else now
+        email = _email_key(email, ip)
+        with self._lock:
+            self._maybe_sweep(now)
+            entry = self._failures.setdefault(email, [now, 0, 0])
+            elapsed = now - entry[0]
+            if elapsed >= 2 * FAILURE_WINDOW:
+                entry[:] = [now, 0, 0]
+            elif elapsed >= FAILURE_WINDOW:
+                entry[:] = [entry[0] + FAILURE_WINDOW, 0, entry[1]]
+            entry[1] += 1
+
+    def record_success(self, email: str, ip: Optional[str] = None):
+        """A correct password clears the failures and refills the bucket of its (email, IP)"""
+        email = _email_key(email, ip)
+        with self._lock:
+            self._failures.pop(email, None)
+            self._buckets.pop(('email', email), None)
+
+    def _sweep(self, now: float):
+        """Forget buckets that have refilled and failure windows that have expired,
+        then the least recently used entries of a table still over MAX_KEYS"""
+        for (scope, key), (tokens, updated_at) in list(self._buckets.items()):
+            burst, rate = _LIMITS[scope]
+            if tokens + (now - updated_at) * rate >= burst:
+                del self._buckets[(scope, key)]
+        for email in [e for e in self._failures if self._failure_count(e, now) == 0]:
+            del self._failures[email]
+        for table in (self._buckets, self._failures):
+            excess = len(table) - MAX_KEYS
+            if excess > 0:
+                # buckets are [tokens, updated_at], windows [window_start, ...]
+                stamp = 1 if table is self._buckets else 0
+                for key in heapq.nsmallest(excess, table, key=lambda k: table[k][stamp]):
+                    del table[key]
+
+    # ------------------------------------------------------------------
+    # Optional persistence. Stored times are wall-clock; in memory they
+    # are monotonic.
+    # ------------------------------------------------------------------
+
+    def save(self, conn):
+        offset = time.time() - time.monotonic()
+        with self._lock:
+            self._sweep(time.monotonic())
+            rows = [(scope, key, tokens, updated_at + offset, None)
+                    for (scope, key), (tokens, updated_at) in self._buckets.items()]
+            rows += [('failures', email, current, window_start + offset, previous)
+                     for email, (window_start, current, previous) in self._failures.items()]
+        conn.execute('DELETE FROM login_throttle')
+        conn.executemany('''
+            INSERT INTO login_throttle (scope, key, value, stamp, previous) VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+
+    def load(self, conn):
+        offset = time.time() - time.monotonic()
+        with self._lock:
+            for row in conn.execute('SELECT scope, key, value, stamp, previous FROM login_throttle'):
+                if row['scope'] == 'failures':
+                    self._failures[row['key']] = [row['stamp'] - offset, row['value'], row['previous'] or 0]
+                else:
+                    self._buckets[(row['scope'], row['key'])] = [row['value'], row['stamp'] - offset]
+
+def init_throttle_table(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS login_throttle (
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value REAL NOT NULL,
+            stamp REAL NOT NULL,
+            previous REAL,
+            PRIMARY KEY (scope, key)
+        ) WITHOUT ROWID
+    ''')
+
+limiter = LoginLimiter()
+_loaded = False
+_load_lock = threading.Lock()
+
+def _persisted() -> LoginLimiter:
+    """The limiter, loaded from the database on first use when ERP_THROTTLE_PERSIST=1"""
+    global _loaded
+    if PERSIST and not _loaded:
+        with _load_lock:
+            if not _loaded:
+                _loaded = True
+                try:
+                    from modules.database import get_db_connection
+                    with get_db_connection() as conn:
+                        init_throttle_table(conn)
+                        limiter.load(conn)
+                except Exception as e:
+                    print(f"Error loading login throttle state: {e}")
+                atexit.register(save)
+    return limiter
+
+def save():
+    """Write the limiter state to login_throttle"""
+    try:
+        from modules.database import get_db_connection
+        with get_db_connection() as conn:
+            init_throttle_table(conn)
+            limiter.save(conn)
+    except Exception as e:
+        print(f"Error saving login throttle state: {e}")
+
+def check(ip: Optional[str], email: str) -> float:
+    return _persisted().check(ip, email)
+
+def record_failure(email: str, ip: Optional[str] = None):
+    limiter.record_failure(email, ip)
+
+def record_success(email: str, ip: Optional[str] = None):
+    limiter.record_success(email, ip)
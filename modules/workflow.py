@@ -1,37 +1,121 @@
 import streamlit as st
-from datetime import datetime
 from modules.database import get_db_connection
 
+WORKFLOW_STAGES = ['Received', 'Under Review', 'In Progress', 'Verification', 'Completed', 'Resolved']
+
+# Every stage change is appended to workflow_events; workflow_state holds the
+# latest event per request/ticket and is updated in the same transaction
 def init_workflow_table():
-    """Initialize workflow tracking table"""
+    """Initialize the workflow event log and current-state tables"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS workflow_tracking (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                request_id INTEGER,
-                ticket_id INTEGER,
-                current_stage TEXT,
+            CREATE TABLE IF NOT EXISTS workflow_events (
+                event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                entity_type TEXT NOT NULL CHECK (entity_type IN ('request', 'ticket')),
+                entity_id INTEGER NOT NULL,
+                stage TEXT NOT NULL,
                 progress_percentage INTEGER DEFAULT 0,
-                assigned_to TEXT,
+                assigned_to INTEGER,
                 notes TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY(request_id) REFERENCES service_requests(id),
-                FOREIGN KEY(ticket_id) REFERENCES tickets(id)
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_state (
+                entity_type TEXT NOT NULL,
+                entity_id INTEGER NOT NULL,
+                current_stage TEXT NOT NULL,
+                progress_percentage INTEGER DEFAULT 0,
+                assigned_to INTEGER,
+                notes TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_event_id INTEGER NOT NULL,
+                PRIMARY KEY (entity_type, entity_id)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_events_entity ON workflow_events(entity_type, entity_id, event_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_events_time ON workflow_events(created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_state_stage ON workflow_state(current_stage, updated_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_workflow_state_assignee ON workflow_state(assigned_to, current_stage)")
+        _migrate_legacy_tracking(conn)
         conn.commit()
 
-def update_workflow_stage(request_id=None, ticket_id=None, stage='', progress=0, notes=''):
+def _migrate_legacy_tracking(conn):
+    """Replay rows of the old append-only workflow_tracking table into the event log once"""
+    legacy = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'workflow_tracking'").fetchone()
+    if not legacy or conn.execute("SELECT 1 FROM workflow_events LIMIT 1").fetchone():
+        return
+    conn.execute("""
+        INSERT INTO workflow_events (entity_type, entity_id, stage, progress_percentage, assigned_to, notes, created_at)
+        SELECT CASE WHEN request_id IS NOT NULL THEN 'request' ELSE 'ticket' END,
+               COALESCE(request_id, ticket_id), COALESCE(current_stage, ''), progress_percentage,
+               CAST(NULLIF(assigned_to, '') AS INTEGER), notes, updated_at
+        FROM workflow_tracking
+        WHERE COALESCE(request_id, ticket_id) IS NOT NULL
+        ORDER BY updated_at, id
+    """)
+    rebuild_workflow_state(conn)
+
+def rebuild_workflow_state(conn):
+    """Recompute workflow_state from the newest event of every request and ticket"""
+    conn.execute("DELETE FROM workflow_state")
+    conn.execute("""
+        INSERT INTO workflow_state
+        (entity_type, entity_id, current_stage, progress_percentage, assigned_to, notes, updated_at, last_event_id)
+        SELECT e.entity_type, e.entity_id, e.stage, e.progress_percentage,
+               COALESCE(e.assigned_to, (SELECT a.assigned_to FROM workflow_events a
+                                        WHERE a.entity_type = e.entity_type AND a.entity_id = e.entity_id
+                                          AND a.assigned_to IS NOT NULL
+                                        ORDER BY a.event_id DESC LIMIT 1)),
+               e.notes, e.created_at, e.event_id
+        FROM workflow_events e
+        JOIN (SELECT MAX(event_id) AS event_id FROM workflow_events GROUP BY entity_type, entity_id) latest
+            ON latest.event_id = e.event_id
+    """)
+
+def _entity(request_id=None, ticket_id=None):
+    return ('request', request_id) if request_id else ('ticket', ticket_id)
+
+def record_workflow_event(conn, request_id=None, ticket_id=None, stage='', progress=0, notes='', assigned_to=None):
+    """Append an event and move the current state on an open connection; the caller commits"""
+    entity_type, entity_id = _entity(request_id, ticket_id)
+    cursor = conn.execute("""
+        INSERT INTO workflow_events (entity_type, entity_id, stage, progress_percentage, assigned_to, notes)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (entity_type, entity_id, stage, progress, assigned_to, notes))
+    # An event without an assignee keeps the current one
+    conn.execute("""
+        INSERT INTO workflow_state
+        (entity_type, entity_id, current_stage, progress_percentage, assigned_to, notes, updated_at, last_event_id)
+        SELECT entity_type, entity_id, stage, progress_percentage, assigned_to, notes, created_at, event_id
+        FROM workflow_events WHERE event_id = ?
+        ON CONFLICT (entity_type, entity_id) DO UPDATE SET
+            current_stage = excluded.current_stage,
+            progress_percentage = excluded.progress_percentage,
+            assigned_to = COALESCE(excluded.assigned_to, workflow_state.assigned_to),
+            notes = excluded.notes,
+            updated_at = excluded.updated_at,
+            last_event_id = excluded.last_event_id
+    """, (cursor.lastrowid,))
+    return cursor.lastrowid
+
+def update_workflow_stage(request_id=None, ticket_id=None, stage='', progress=0, notes='', assigned_to=None):
     """Update workflow stage"""
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO workflow_tracking (request_id, ticket_id, current_stage, progress_percentage, notes)
-                VALUES (?, ?, ?, ?, ?)
-            """, (request_id, ticket_id, stage, progress, notes))
+            entity = _entity(request_id, ticket_id)
+            previous = None
+            if assigned_to is not None:
+                row = conn.execute("""
+                    SELECT assigned_to FROM workflow_state WHERE entity_type = ? AND entity_id = ?
+                """, entity).fetchone()
+                previous = row['assigned_to'] if row else None
+            record_workflow_event(conn, request_id, ticket_id, stage, progress, notes, assigned_to)
             conn.commit()
+            if assigned_to is not None and assigned_to != previous:
+                from modules import assignment
+                assignment.item_reassigned(conn, *entity, previous, assigned_to)
             return True
     except Exception as e:
         st.error(f"Workflow update failed: {str(e)}")
@@ -41,40 +125,63 @@ def get_workflow_status(request_id=None, ticket_id=None):
     """Get current workflow status"""
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            if request_id:
-                cursor.execute("""
-                    SELECT current_stage, progress_percentage, notes, updated_at FROM workflow_tracking
-                    WHERE request_id = ? ORDER BY updated_at DESC LIMIT 1
-                """, (request_id,))
-            else:
-                cursor.execute("""
-                    SELECT current_stage, progress_percentage, notes, updated_at FROM workflow_tracking
-                    WHERE ticket_id = ? ORDER BY updated_at DESC LIMIT 1
-                """, (ticket_id,))
-            return cursor.fetchone()
-    except:
+            return conn.execute("""
+                SELECT current_stage, progress_percentage, notes, updated_at FROM workflow_state
+                WHERE entity_type = ? AND entity_id = ?
+            """, _entity(request_id, ticket_id)).fetchone()
+    except Exception as e:
+        print(f"Error getting workflow status: {e}")
         return None
 
 def get_workflow_history(request_id=None, ticket_id=None):
     """Get workflow history"""
     try:
         with get_db_connection() as conn:
-            cursor = conn.cursor()
-            if request_id:
-                cursor.execute("""
-                    SELECT current_stage, progress_percentage, notes, updated_at FROM workflow_tracking
-                    WHERE request_id = ? ORDER BY updated_at DESC
-                """, (request_id,))
-            else:
-                cursor.execute("""
-                    SELECT current_stage, progress_percentage, notes, updated_at FROM workflow_tracking
-                    WHERE ticket_id = ? ORDER BY updated_at DESC
-                """, (ticket_id,))
-            return cursor.fetchall()
-    except:
+            return conn.execute("""
+                SELECT stage, progress_percentage, notes, created_at FROM workflow_events
+                WHERE entity_type = ? AND entity_id = ?
+                ORDER BY event_id DESC
+            """, _entity(request_id, ticket_id)).fetchall()
+    except Exception as e:
+        print(f"Error getting workflow history: {e}")
         return []
 
+def get_items_in_stage(stage, entity_type=None, limit=None):
+    """Requests and tickets currently in a stage, oldest first"""
+    sql = """
+        SELECT entity_type, entity_id, current_stage, progress_percentage, assigned_to, notes, updated_at
+        FROM workflow_state WHERE current_stage = ?
+    """
+    params = [stage]
+    if entity_type:
+        sql += " AND entity_type = ?"
+        params.append(entity_type)
+    sql += " ORDER BY updated_at"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+    try:
+        with get_db_connection() as conn:
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+    except Exception as e:
+        print(f"Error getting workflow queue: {e}")
+        return []
+
+def get_stage_counts(entity_type=None):
+    """Number of requests/tickets per current stage"""
+    sql = "SELECT current_stage, COUNT(*) AS items FROM workflow_state"
+    params = []
+    if entity_type:
+        sql += " WHERE entity_type = ?"
+        params.append(entity_type)
+    sql += " GROUP BY current_stage"
+    try:
+        with get_db_connection() as conn:
+            return {row['current_stage']: row['items'] for row in conn.execute(sql, params).fetchall()}
+    except Exception as e:
+        print(f"Error getting workflow stage counts: {e}")
+        return {}
+
 def show_workflow_automation(request_id=None, ticket_id=None):
     """Display workflow automation UI"""
     st.markdown("### ⚙️ Workflow Automation")
@@ -104,14 +211,7 @@ def show_workflow_automation(request_id=None, ticket_id=None):
     
     col1, col2 = st.columns(2)
     with col1:
-        stage = st.selectbox("Select Stage", [
-            "Received",
-            "Under Review",
-            "In Progress",
-            "Verification",
-            "Completed",
-            "Resolved"
-        ])
+        stage = st.selectbox("Select Stage", WORKFLOW_STAGES)
     with col2:
         progress = st.slider("Progress %", 0, 100, value=workflow_status[1] if workflow_status else 0)
     
@@ -1,25 +1,48 @@
+import os
 import streamlit as st
-import pandas as pd
 from datetime import datetime, timedelta
 from modules.database import (
     get_all_requests, get_all_tickets, 
-    update_request_status, get_request_stats,
-    get_all_students, add_student_marks, get_student_marks, delete_student_marks
+    update_request_status, update_ticket_status, get_request_stats,
+    get_all_students, add_student_marks, get_student_marks, delete_student_marks,
+    get_all_departments_analytics
 )
-import plotly.graph_objects as go
-import plotly.express as px
+from modules import metrics
 
-def show_admin_page(page):
+# pandas and plotly are imported inside the pages that use them to keep
+# admin pages without charts (and the module import itself) light
+
+# Pages that create accounts, move money or expose SQL and profiles: admins only,
+# never shown to (or routed for) faculty
+ADMIN_ONLY_PAGES = {"Roster Import", "Finance", "Fee Reconciliation", "Placements", "Query Stats", "Profiles"}
+
+def show_admin_page(page, role):
     """Display admin dashboard based on selected page"""
     
+    if page in ADMIN_ONLY_PAGES and role != 'admin':
+        st.error("⛔ This page is only available to administrators")
+        return
+    
     if page == "Dashboard":
         show_admin_dashboard()
     elif page == "Student Marks":
         show_student_marks_management()
+    elif page == "Roster Import":
+        show_roster_import()
+    elif page == "Finance":
+        show_finance_dashboard()
+    elif page == "Fee Reconciliation":
+        show_fee_reconciliation()
     elif page == "Tickets":
         show_tickets()
     elif page == "Complaints":
         show_tickets()  # Tickets serve as complaints
+    elif page == "Placements":
+        show_placements()
+    elif page == "Query Stats":
+        show_query_stats()
+    elif page == "Profiles":
+        show_profiles()
     elif "Attendance" in page:
         from modules.attendance import show_attendance_tracker, init_attendance_table
         st.markdown("## 📋 Attendance Management (Admin)")
@@ -31,6 +54,8 @@ def show_admin_page(page):
             uploaded_file = st.file_uploader("Choose CSV file", type=['csv'], label_visibility="collapsed")
             submitted = st.form_submit_button("Upload Attendance")
             if submitted and uploaded_file:
+                import pandas as pd
+                metrics.UPLOAD_BYTES.observe(uploaded_file.size, kind='attendance_csv')
                 try:
                     df = pd.read_csv(uploaded_file)
                     st.success(f"✅ Uploaded {len(df)} attendance records")
@@ -52,6 +77,8 @@ def show_admin_page(page):
 
 def show_admin_dashboard():
     """Show admin dashboard overview"""
+    import pandas as pd
+    import plotly.graph_objects as go
     st.markdown("## 📊 Admin Dashboard")
     
     try:
@@ -74,6 +101,17 @@ def show_admin_dashboard():
             resolved = stats.get('Resolved', 0)
             st.metric("Resolved", resolved)
         
+        from modules.sla import get_sla_summary
+        sla = get_sla_summary()
+        if sla:
+            requests_sla = sla.get('request', {})
+            tickets_sla = sla.get('ticket', {})
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Requests Past SLA", requests_sla.get('overdue', 0))
+            col2.metric("Tickets Past SLA", tickets_sla.get('overdue', 0))
+            col3.metric("Escalated", requests_sla.get('escalated', 0) + tickets_sla.get('escalated', 0))
+            col4.metric("SLA Breached", requests_sla.get('breached', 0) + tickets_sla.get('breached', 0))
+        
         st.divider()
         
         col1, col2 = st.columns(2)
@@ -113,6 +151,37 @@ def show_admin_dashboard():
             st.dataframe(df, use_container_width=True, hide_index=True)
         else:
             st.info("No requests")
+        
+        st.divider()
+        
+        st.markdown("### Department Overview")
+        departments = get_all_departments_analytics()
+        if departments:
+            df = pd.DataFrame([{
+                'Department': department,
+                'Students': values['total_students'],
+                'Avg CGPA': values['avg_cgpa'],
+                'Pass %': values['pass_percentage'],
+                'Fail %': values['fail_percentage']
+            } for department, values in sorted(departments.items())])
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No department data available")
+        
+        st.divider()
+        
+        st.markdown("### Staff Workload")
+        from modules.assignment import get_queue_depths
+        workload = get_queue_depths()
+        if workload:
+            df = pd.DataFrame([{
+                'Staff': w['name'],
+                'Role': w['role'].title(),
+                'Open Items': w['open_items']
+            } for w in workload[:15]])
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No staff accounts to assign work to")
     except Exception as e:
         st.error(f"❌ Error loading admin dashboard: {str(e)}")
         print(f"Admin dashboard error: {e}")
@@ -302,8 +371,11 @@ def show_tickets():
                         
                         if new_status != ticket_status:
                             if st.button("✅ Update", key=f"ticket_update_{ticket_id}", use_container_width=True):
-                                st.success(f"✅ Status updated to {new_status}")
-                                st.rerun()
+                                if update_ticket_status(ticket_id, new_status, st.session_state.get('user_id')):
+                                    st.success(f"✅ Status updated to {new_status}")
+                                    st.rerun()
+                                else:
+                                    st.error("Failed to update status")
         else:
             st.info("No tickets match the selected filters")
     except Exception as e:
@@ -326,6 +398,7 @@ def show_admission_requests():
 
 def show_student_marks_management():
     """Show student marks management interface"""
+    import pandas as pd
     st.markdown("## 📝 Student Marks Management")
     
     try:
@@ -491,6 +564,9 @@ def show_student_marks_management():
 
 def show_analytics():
     """Show analytics and reports"""
+    import pandas as pd
+    import plotly.express as px
+    from modules.charts import cached_figure, downsample_timeline
     st.markdown("## 📈 Analytics & Reports")
     
     try:
@@ -508,12 +584,12 @@ def show_analytics():
                     } for r in requests])
                     category_counts = df.groupby('Category').size()
                     
-                    fig = px.bar(
+                    fig = cached_figure('admin.requests_by_category', category_counts.to_frame(), lambda: px.bar(
                         x=category_counts.index,
                         y=category_counts.values,
                         labels={'x': 'Category', 'y': 'Count'},
                         title="Requests by Category"
-                    )
+                    ))
                     st.plotly_chart(fig, use_container_width=True)
                 except Exception as e:
                     st.error(f"Error generating category chart: {e}")
@@ -527,11 +603,11 @@ def show_analytics():
                     } for r in requests])
                     priority_counts = df.groupby('Priority').size()
                     
-                    fig = px.pie(
+                    fig = cached_figure('admin.requests_by_priority', priority_counts.to_frame(), lambda: px.pie(
                         values=priority_counts.values,
                         names=priority_counts.index,
                         title="Requests by Priority"
-                    )
+                    ))
                     st.plotly_chart(fig, use_container_width=True)
                 except Exception as e:
                     st.error(f"Error generating priority chart: {e}")
@@ -548,15 +624,17 @@ def show_analytics():
                     df = df[df['Date'] != 'Unknown']
                 
                 if not df.empty:
-                    timeline = df.groupby('Date').size()
+                    timeline = df.groupby('Date').size().reset_index(name='Count')
+                    timeline = downsample_timeline(timeline, x='Date', y='Count')
                     
-                    fig = px.line(
-                        x=timeline.index,
-                        y=timeline.values,
-                        labels={'x': 'Date', 'y': 'Number of Requests'},
+                    fig = cached_figure('admin.requests_timeline', timeline, lambda: px.line(
+                        timeline,
+                        x='Date',
+                        y='Count',
+                        labels={'Count': 'Number of Requests'},
                         title="Requests Over Time",
                         markers=True
-                    )
+                    ))
                     st.plotly_chart(fig, use_container_width=True)
                 else:
                     st.info("No valid date data for timeline")
@@ -567,3 +645,327 @@ def show_analytics():
     except Exception as e:
         st.error(f"❌ Error loading analytics: {str(e)}")
         print(f"Analytics error: {e}")
+
+def show_roster_import():
+    """Provision student accounts in bulk from an admission roster CSV"""
+    import pandas as pd
+    from modules import roster
+    
+    st.markdown("## 👥 Roster Import")
+    st.caption(f"Required columns: {', '.join(roster.REQUIRED_COLUMNS)}. "
+               f"Optional: {', '.join(roster.OPTIONAL_COLUMNS)}. "
+               "Rows without a password get a generated one.")
+    
+    with st.form("roster_import_form"):
+        uploaded_file = st.file_uploader("Roster CSV", type=['csv'], label_visibility="collapsed")
+        submitted = st.form_submit_button("Import Students", use_container_width=True)
+    
+    if submitted and uploaded_file:
+        metrics.UPLOAD_BYTES.observe(uploaded_file.size, kind='roster_csv')
+        try:
+            with st.spinner("Creating accounts..."):
+                result = roster.import_roster(uploaded_file)
+        except Exception as e:
+            st.error(f"❌ Import failed: {str(e)}")
+            return
+        
+        st.success(f"✅ Created {result['created']} student accounts in {result['elapsed_seconds']}s")
+        if result['errors']:
+            st.warning(f"⚠️ {result['failed']} rows were skipped")
+            st.dataframe(pd.DataFrame(result['errors']), use_container_width=True, hide_index=True)
+        if result['credentials']:
+            st.download_button(
+                "⬇️ Download initial passwords",
+                pd.DataFrame(result['credentials']).to_csv(index=False),
+                file_name="roster_credentials.csv",
+                mime="text/csv"
+            )
+
+def show_finance_dashboard():
+    """Institution-wide fee collection, read from the fee rollup tables"""
+    import pandas as pd
+    import plotly.express as px
+    from modules import fee_repository, fees
+    from modules.charts import cached_figure
+    
+    st.markdown("## 💰 Fee Collection")
+    
+    by_department = pd.DataFrame(fees.get_collection_summary('department'))
+    if by_department.empty:
+        st.info("No fee records yet")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Billed", f"₹{by_department['amount_due'].sum():,.0f}")
+    col2.metric("Collected", f"₹{by_department['collected'].sum():,.0f}")
+    col3.metric("Outstanding", f"₹{by_department['outstanding'].sum():,.0f}")
+    col4.metric("Overdue Fees", f"{int(by_department['overdue_fees'].sum()):,}")
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["By Department", "By Semester", "By Month", "Student"])
+    
+    with tab1:
+        chart = by_department.melt(id_vars='department', value_vars=['collected', 'outstanding'],
+                                   var_name='Type', value_name='Amount')
+        fig = cached_figure('admin.fees_by_department', chart, lambda: px.bar(
+            chart, x='department', y='Amount', color='Type', barmode='stack',
+            labels={'department': 'Department', 'Amount': 'Amount (₹)'},
+            title="Collected vs Outstanding by Department"
+        ))
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(by_department, use_container_width=True, hide_index=True)
+    
+    with tab2:
+        by_semester = pd.DataFrame(fees.get_collection_summary('semester'))
+        chart = by_semester.melt(id_vars='semester', value_vars=['collected', 'outstanding'],
+                                 var_name='Type', value_name='Amount')
+        fig = cached_figure('admin.fees_by_semester', chart, lambda: px.bar(
+            chart, x='semester', y='Amount', color='Type', barmode='stack',
+            labels={'semester': 'Semester', 'Amount': 'Amount (₹)'},
+            title="Collected vs Outstanding by Semester"
+        ))
+        st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(by_semester, use_container_width=True, hide_index=True)
+    
+    with tab3:
+        department = st.selectbox("Department", ["All"] + by_department['department'].tolist(),
+                                  key="finance_department")
+        monthly = pd.DataFrame(fees.get_monthly_collections(None if department == "All" else department))
+        if monthly.empty:
+            st.info("No collections recorded")
+        else:
+            fig = cached_figure('admin.fees_by_month', monthly, lambda: px.bar(
+                monthly, x='month', y='collected',
+                labels={'month': 'Month', 'collected': 'Collected (₹)'},
+                title="Collections by Month"
+            ))
+            st.plotly_chart(fig, use_container_width=True)
+    
+    with tab4:
+        roll_number = st.text_input("Roll Number", key="finance_roll_number")
+        if roll_number:
+            student = fee_repository.find_student(roll_number)
+            if student is None:
+                st.warning("⚠️ No student with that roll number")
+            else:
+                st.markdown(f"**{student['full_name']}** · {student['roll_number']} · {student['department']}")
+                # The same page and queries the student sees, plus billing
+                fees.show_fee_management(student['user_id'], admin=True)
+    
+    st.caption("Totals come from rollup tables kept current on every fee change. "
+               "Run `fees.rebuild_fee_rollups()` after moving students between departments.")
+
+def show_fee_reconciliation():
+    """Apply fee payments from a bank or UPI statement and list what did not match"""
+    import pandas as pd
+    from modules import reconciliation
+    
+    st.markdown("## 🏦 Fee Reconciliation")
+    st.caption("Upload a bank or UPI statement CSV with a transaction id / UTR column and a credit amount. "
+               "Students are matched by a roll number column or a roll number in the narration.")
+    
+    with st.form("reconciliation_form"):
+        uploaded_file = st.file_uploader("Statement CSV", type=['csv'], label_visibility="collapsed")
+        col1, col2 = st.columns(2)
+        with col1:
+            method = st.selectbox("Payment Channel", ["Bank", "UPI"])
+        with col2:
+            dry_run = st.checkbox("Dry run (match only, record nothing)")
+        submitted = st.form_submit_button("Reconcile", use_container_width=True)
+    
+    if submitted and uploaded_file:
+        metrics.UPLOAD_BYTES.observe(uploaded_file.size, kind='statement_csv')
+        try:
+            with st.spinner("Matching statement..."):
+                result = reconciliation.reconcile_statement(uploaded_file, method=method, apply=not dry_run)
+        except Exception as e:
+            st.error(f"❌ Reconciliation failed: {str(e)}")
+            return
+        
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Statement Lines", f"{result['lines']:,}")
+        col2.metric("Matched", f"{result['matched']:,}")
+        col3.metric("Already Recorded", f"{result['confirmed']:,}")
+        col4.metric("Exceptions", f"{len(result['exceptions']):,}")
+        
+        if dry_run:
+            st.info(f"Dry run: {result['matched']} payments would be recorded")
+        else:
+            st.success(f"✅ Recorded {result['applied']} payments totalling ₹{result['applied_amount']:,.2f} "
+                       f"in {result['elapsed_seconds']}s")
+        if result['exceptions']:
+            exceptions = pd.DataFrame(result['exceptions'])
+            st.dataframe(exceptions, use_container_width=True, hide_index=True)
+            st.download_button(
+                "⬇️ Download exceptions report",
+                exceptions.to_csv(index=False),
+                file_name="reconciliation_exceptions.csv",
+                mime="text/csv"
+            )
+
+def show_placements():
+    """Generate ranked shortlists for company placement drives"""
+    import pandas as pd
+    from modules import placement
+    from modules.placement_model import load_model
+    
+    st.markdown("## 🎯 Placement Drives")
+    placement.init_placement_tables()
+    options = placement.get_filter_options()
+    
+    model = load_model()
+    if model:
+        st.caption(f"Predicted placement from the model trained {model['trained_at']} "
+                   f"(holdout AUC {model['holdout']['auc']}). Retrain and rescore with "
+                   f"`python train_placement_model.py`.")
+    else:
+        st.caption("No placement model yet: run `python train_placement_model.py` to fill predictions.")
+    
+    with st.form("shortlist_form"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            company = st.selectbox("Company", options['companies'], index=0 if options['companies'] else None,
+                                   accept_new_options=True, placeholder="Type a company name")
+            position = st.text_input("Position", value="Graduate Engineer Trainee")
+        with col2:
+            min_cgpa = st.number_input("Minimum CGPA", 0.0, 4.0, placement.DEFAULT_CRITERIA['min_cgpa'], 0.1)
+            min_attendance = st.number_input("Minimum Attendance %", 0.0, 100.0,
+                                             placement.DEFAULT_CRITERIA['min_attendance'], 1.0)
+        with col3:
+            max_backlogs = st.number_input("Maximum Backlogs", 0, 20, placement.DEFAULT_CRITERIA['max_backlogs'])
+            limit = st.number_input("Shortlist Size (0 = all eligible)", 0, 100000, 100)
+        departments = st.multiselect("Departments (empty = all)", options['departments'])
+        package = st.number_input("Package (LPA)", 0.0, 100.0, 6.0, 0.5)
+        submitted = st.form_submit_button("Generate Shortlist", use_container_width=True)
+    
+    if submitted and company and company.strip():
+        shortlist = placement.generate_shortlist(company.strip(), {
+            'min_cgpa': min_cgpa,
+            'min_attendance': min_attendance,
+            'max_backlogs': int(max_backlogs),
+            'departments': departments or None,
+            'limit': int(limit) or None,
+        }, position=position, package=package)
+        
+        if shortlist:
+            st.success(f"✅ Shortlisted {len(shortlist)} students for {company}")
+            st.dataframe(pd.DataFrame(shortlist), use_container_width=True, hide_index=True)
+        else:
+            st.info("No students meet these criteria")
+
+def show_query_stats():
+    """Show the slowest SQL statements and N+1 patterns seen by this process"""
+    import pandas as pd
+    from modules import querystats
+    
+    st.markdown("## 🐢 SQL Query Stats")
+    
+    if not querystats.is_enabled():
+        st.info("Query instrumentation is off. Start the app with `ERP_QUERY_STATS=1` to collect statistics.")
+        return
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        order_by = st.selectbox(
+            "Rank statements by",
+            ["total_ms", "p95_ms", "calls", "rows"],
+            format_func=lambda c: {"total_ms": "Total time", "p95_ms": "p95 time",
+                                   "calls": "Call count", "rows": "Rows returned"}[c]
+        )
+    with col2:
+        if st.button("🔄 Reset Stats", use_container_width=True):
+            querystats.reset()
+            st.rerun()
+    
+    top = querystats.top_statements(limit=25, order_by=order_by)
+    st.markdown("### Top Offenders")
+    if top:
+        st.dataframe(pd.DataFrame([{
+            'Statement': r['sql'],
+            'Calls': r['calls'],
+            'Total ms': r['total_ms'],
+            'Mean ms': r['mean_ms'],
+            'p95 ms': r['p95_ms'],
+            'Max ms': r['max_ms'],
+            'Rows': r['rows']
+        } for r in top]), use_container_width=True, hide_index=True)
+    else:
+        st.info("No queries recorded yet")
+    
+    st.markdown("### Recent Reruns")
+    reruns = querystats.recent_reruns()
+    if reruns:
+        st.dataframe(pd.DataFrame([{
+            'Time': r['at'],
+            'Page': r['page'],
+            'Queries': r['queries'],
+            'SQL ms': r['sql_ms'],
+            'Wall ms': r['wall_ms'],
+            'N+1 Suspects': len(r['n_plus_one'])
+        } for r in reruns]), use_container_width=True, hide_index=True)
+        
+        flagged = [(r, hit) for r in reruns for hit in r['n_plus_one']]
+        if flagged:
+            st.markdown(f"### ⚠️ N+1 Patterns (≥ {querystats.N_PLUS_ONE_THRESHOLD} calls per rerun)")
+            for rerun, hit in flagged[:20]:
+                st.warning(f"**{rerun['page'] or 'Unknown'}** ran {hit['count']}×: `{hit['sql'][:200]}`")
+    else:
+        st.info("No reruns recorded yet")
+    
+    if os.path.exists(querystats.SLOW_QUERY_LOG):
+        with open(querystats.SLOW_QUERY_LOG, 'rb') as f:
+            st.download_button(
+                f"📥 Download slow-query log (≥ {querystats.SLOW_QUERY_MS:.0f} ms)",
+                data=f.read(),
+                file_name="slow_queries.log",
+                mime="text/plain"
+            )
+
+def show_profiles():
+    """Browse and download per-rerun page profiles"""
+    import pandas as pd
+    import plotly.express as px
+    from modules import profiling
+    
+    st.markdown("## 🔥 Page Profiles")
+    st.caption("Add `?profile=1` to the URL to profile your own reruns, or start the app with "
+               "`ERP_PROFILE=1` to profile every rerun.")
+    
+    captures = profiling.list_profiles()
+    if not captures:
+        st.info("No profiles captured yet")
+        return
+    
+    st.dataframe(pd.DataFrame([{
+        'Captured': c['captured_at'],
+        'Page': c['page'],
+        'Wall ms': c['wall_ms'],
+        **{f"{name} ms": c['categories_ms'].get(name, 0.0)
+           for name in ('SQL', 'pandas', 'Plotly', 'Streamlit', 'App code')}
+    } for c in captures]), use_container_width=True, hide_index=True)
+    
+    labels = {f"{c['captured_at']} · {c['page']} ({c['wall_ms']:.0f} ms)": c for c in captures}
+    capture = labels[st.selectbox("Inspect profile", list(labels.keys()))]
+    
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        st.markdown("### Time by Layer")
+        categories = capture['categories_ms']
+        fig = px.pie(values=list(categories.values()), names=list(categories.keys()))
+        fig.update_layout(height=300, margin=dict(t=10, b=10, l=10, r=10))
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        st.markdown("### modules.* / pages.* Functions")
+        if capture['functions']:
+            st.dataframe(pd.DataFrame(capture['functions']), use_container_width=True, hide_index=True)
+        else:
+            st.info("No application functions were sampled")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        with open(capture['files']['prof'], 'rb') as f:
+            st.download_button("📥 Download .prof (snakeviz / pstats)", data=f.read(),
+                               file_name=f"{capture['id']}.prof", use_container_width=True)
+    with col2:
+        with open(capture['files']['folded'], 'rb') as f:
+            st.download_button("📥 Download flamegraph (.folded for speedscope)", data=f.read(),
+                               file_name=f"{capture['id']}.folded", use_container_width=True)
@@ -1,5 +1,6 @@
 import streamlit as st
 from modules.auth import login, register, is_authenticated
+from modules.throttle import LoginThrottled
 import re
 
 def validate_email(email: str) -> bool:
@@ -36,11 +37,17 @@ def show_auth_page():
                     st.warning("⚠️ Please enter email and password")
                 elif not validate_email(email):
                     st.error("❌ Please enter a valid email address")
-                elif login(email, password):
-                    st.success("✅ Login successful!")
-                    st.rerun()
                 else:
-                    st.error("❌ Invalid email or password")
+                    try:
+                        logged_in = login(email, password)
+                    except LoginThrottled as e:
+                        st.error(f"❌ Too many login attempts. Please try again in {max(1, round(e.retry_after))} seconds.")
+                    else:
+                        if logged_in:
+                            st.success("✅ Login successful!")
+                            st.rerun()
+                        else:
+                            st.error("❌ Invalid email or password")
             
             # Demo credentials
             with st.expander("Demo Credentials"):
@@ -20,6 +20,11 @@ def show_student_page(page, user_id):
         st.markdown("## 📝 My Exam Results")
         st.markdown("<p style='color: var(--text-secondary); margin-bottom: 2rem;'>Check your exam scores and performance</p>", unsafe_allow_html=True)
         show_exam_results(user_id)
+    elif page == "Fees":
+        from modules.fees import show_fee_management
+        st.markdown("## 💳 My Fees")
+        st.markdown("<p style='color: var(--text-secondary); margin-bottom: 2rem;'>See what you owe and the payments received</p>", unsafe_allow_html=True)
+        show_fee_management(user_id)
     elif page == "Tickets":
         show_student_tickets(user_id)
     elif page == "Complaints":
@@ -0,0 +1,53 @@
+"""
+Seed the database with a large deterministic synthetic institution
+Usage: python seed_data.py --scale large
+       python seed_data.py --students 50000 --semesters 8 --seed 7 --db data/bench.db
+"""
+import argparse
+import os
+import sys
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic portal data at scale")
+    parser.add_argument("--scale", choices=["small", "medium", "large"],
+                        help="Named scale preset (overrides --students/--semesters)")
+    parser.add_argument("--students", type=int, default=500, help="Number of students")
+    parser.add_argument("--semesters", type=int, default=8, help="Semesters of history per student")
+    parser.add_argument("--subjects", type=int, default=5, help="Subjects per semester")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--as-of", help="Reference date YYYY-MM-DD (default: today)")
+    parser.add_argument("--db", help="Database file to write (default: data/erp_system.db)")
+    parser.add_argument("--keep-file", action="store_true",
+                        help="Generate into the existing database file instead of recreating it; "
+                             "it must not contain any users yet")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.db:
+        # Must be set before modules.database is imported
+        os.environ["ERP_DATABASE_PATH"] = os.path.abspath(args.db)
+
+    from modules.datagen import SCALES, generate_dataset, parse_as_of
+
+    options = dict(students=args.students, semesters=args.semesters)
+    if args.scale:
+        options.update(SCALES[args.scale])
+
+    print(f"Generating {options['students']} students x {options['semesters']} semesters (seed={args.seed})...")
+    try:
+        counts = generate_dataset(subjects_per_semester=args.subjects, seed=args.seed,
+                                  as_of=parse_as_of(args.as_of), reset=not args.keep_file, **options)
+    except ValueError as e:
+        print(f"❌ {e}")
+        if args.keep_file:
+            print("   --keep-file only works on a database without users; drop it to recreate the file")
+        sys.exit(1)
+
+    elapsed = counts.pop("elapsed_seconds")
+    for table, count in counts.items():
+        print(f"  {table:<22} {count:>10,}")
+    print(f"✅ Inserted {sum(counts.values()):,} rows in {elapsed:.1f}s")
+
+if __name__ == "__main__":
+    main()
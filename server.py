@@ -0,0 +1,15 @@
+"""
+Production entry point: the portal plus the session cookie routes.
+Run with `streamlit run server.py` (or `uvicorn server:app`). Starting
+app.py directly still works, but logins then last only for the browser tab.
+"""
+import os
+
+# Tells modules.auth that the cookie routes below are mounted
+os.environ['ERP_SESSION_COOKIES'] = '1'
+
+import streamlit as st
+
+from modules.auth_routes import ROUTES
+
+app = st.App(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py'), routes=ROUTES)
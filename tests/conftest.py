@@ -0,0 +1,22 @@
+"""
+Test fixtures: a fresh, empty ERP database per test
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+@pytest.fixture
+def db(tmp_path):
+    """Point modules.database at a new database with the core schema"""
+    from modules import database
+
+    previous = database.DATABASE_PATH
+    database.DATABASE_PATH = str(tmp_path / 'erp.db')
+    database.init_database()
+    yield database.DATABASE_PATH
+    database.DATABASE_PATH = previous
@@ -0,0 +1,44 @@
+import os
+
+from streamlit.testing.v1 import AppTest
+
+from modules import database
+from pages.admin_dashboard import ADMIN_ONLY_PAGES
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+def _logged_in(role):
+    assert database.add_user(f'{role}@example.com', 'secret123', role.title(), role)
+    with database.get_db_connection() as conn:
+        user_id = conn.execute('SELECT user_id FROM users WHERE email = ?', (f'{role}@example.com',)).fetchone()[0]
+    app = AppTest.from_file(APP, default_timeout=30)
+    app.session_state['user_id'] = user_id
+    app.session_state['user_email'] = f'{role}@example.com'
+    app.session_state['user_role'] = role
+    app.session_state['user_name'] = role.title()
+    app.session_state['logged_in'] = True
+    return app.run()
+
+def _menu(app):
+    return {option.split(' ', 1)[-1] for option in app.radio(key='admin_nav').options}
+
+def test_faculty_menu_leaves_out_admin_pages(db):
+    app = _logged_in('faculty')
+    assert not app.exception
+    assert 'Tickets' in _menu(app)
+    assert not _menu(app) & ADMIN_ONLY_PAGES
+
+def test_admin_menu_has_admin_pages(db):
+    app = _logged_in('admin')
+    assert not app.exception
+    assert ADMIN_ONLY_PAGES <= _menu(app)
+
+def test_admin_pages_refuse_other_roles(db):
+    def page(name):
+        from pages.admin_dashboard import show_admin_page
+        show_admin_page(name, 'faculty')
+
+    for name in sorted(ADMIN_ONLY_PAGES):
+        app = AppTest.from_function(page, args=(name,)).run()
+        assert not app.exception
+        assert ['only available to administrators' in e.value for e in app.error] == [True]
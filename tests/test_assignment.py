@@ -0,0 +1,63 @@
+from modules import assignment, database
+from modules.workflow import init_workflow_table
+
+def _staff(email, role):
+    assert database.add_user(email, 'secret123', email.split('@')[0], role)
+    with database.get_db_connection() as conn:
+        return conn.execute('SELECT user_id FROM users WHERE email = ?', (email,)).fetchone()[0]
+
+def test_rebuild_skips_inactive_staff(db):
+    active = _staff('active@example.com', 'faculty')
+    inactive = _staff('inactive@example.com', 'faculty')
+    with database.get_db_connection() as conn:
+        conn.execute('UPDATE users SET is_active = 0 WHERE user_id = ?', (inactive,))
+        conn.commit()
+
+    init_workflow_table()
+    queue = assignment.AssignmentQueue()
+    with database.get_db_connection() as conn:
+        queue.rebuild(conn)
+
+    assert inactive not in queue.depths()
+    assert {queue.pick('Academic') for _ in range(5)} == {active}
+
+def _ticket(student, category='Academic Query'):
+    assert database.submit_ticket(student, 'Help', 'Please help', category, 'Medium')
+    with database.get_db_connection() as conn:
+        return conn.execute('''
+            SELECT t.ticket_id, ws.assigned_to FROM tickets t
+            JOIN workflow_state ws ON ws.entity_type = 'ticket' AND ws.entity_id = t.ticket_id
+            ORDER BY t.ticket_id DESC LIMIT 1
+        ''').fetchone()
+
+def test_reassignment_moves_the_open_count(db):
+    from modules.workflow import update_workflow_stage
+
+    first = _staff('first@example.com', 'faculty')
+    second = _staff('second@example.com', 'faculty')
+    student = _staff('student@example.com', 'student')
+    ticket_id, assignee = _ticket(student)
+    other = second if assignee == first else first
+    queue = assignment.get_queue()
+    assert queue.depths() == {assignee: 1, other: 0}
+
+    assert update_workflow_stage(ticket_id=ticket_id, stage='In Progress', progress=25, assigned_to=other)
+    assert queue.depths() == {assignee: 0, other: 1}
+    # The same assignee again changes nothing
+    assert update_workflow_stage(ticket_id=ticket_id, stage='In Progress', progress=50, assigned_to=other)
+    assert queue.depths() == {assignee: 0, other: 1}
+
+def test_deactivated_staff_leave_the_queue_at_once(db):
+    busy = _staff('busy@example.com', 'faculty')
+    idle = _staff('idle@example.com', 'faculty')
+    student = _staff('student@example.com', 'student')
+    queue = assignment.get_queue()
+
+    assert database.set_user_active(idle, False)
+    assert idle not in queue.depths()
+    assert {_ticket(student)['assigned_to'] for _ in range(3)} == {busy}
+
+    # Back with the items it still holds (none), and first in line again
+    assert database.set_user_active(idle, True)
+    assert queue.depths()[idle] == 0
+    assert _ticket(student)['assigned_to'] == idle
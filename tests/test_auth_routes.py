@@ -0,0 +1,49 @@
+import asyncio
+
+from starlette.routing import Router
+
+from modules import database, sessions
+from modules.auth import LOGOUT_ROUTE, SESSION_COOKIE
+from modules.auth_routes import ROUTES
+
+def _call(method, path, query='', cookie=None):
+    """Run one request through the routes; returns (status, Set-Cookie headers)"""
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'raw_path': path.encode(), 'root_path': '',
+        'query_string': query.encode(), 'scheme': 'http', 'server': ('testserver', 80),
+        'client': ('127.0.0.1', 5000), 'http_version': '1.1',
+        'headers': [(b'host', b'testserver')] + ([(b'cookie', f'{SESSION_COOKIE}={cookie}'.encode())] if cookie else []),
+    }
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(Router(routes=ROUTES)(scope, receive, send))
+    start = sent[0]
+    return start['status'], [value.decode() for name, value in start['headers'] if name == b'set-cookie']
+
+def _session():
+    assert database.add_user('student@example.com', 'secret123', 'Student', 'student')
+    return sessions.create_session(database.get_user('student@example.com', 'secret123'))
+
+def test_logout_needs_a_post_with_a_code_for_the_session(db):
+    token = _session()
+
+    # A cross-site <img src="/erp/logout"> is a GET: refused, cookie untouched
+    status, cookies = _call('GET', LOGOUT_ROUTE, cookie=token)
+    assert status == 405 and not cookies
+    # A POST without a code, or with a code minted for another session, changes nothing
+    assert _call('POST', LOGOUT_ROUTE, cookie=token) == (303, [])
+    other = sessions.create_handoff(sessions.create_session(database.get_user('student@example.com', 'secret123')))
+    assert _call('POST', LOGOUT_ROUTE, f'code={other}', cookie=token) == (303, [])
+    assert sessions.resolve(token)
+
+    code = sessions.create_handoff(token)
+    status, cookies = _call('POST', LOGOUT_ROUTE, f'code={code}', cookie=token)
+    assert status == 303
+    assert [c for c in cookies if c.startswith(f'{SESSION_COOKIE}=""') or 'Max-Age=0' in c]
+    assert sessions.resolve(token) is None
@@ -0,0 +1,49 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from modules import database, fee_repository
+
+def _fee(amount_due=1000):
+    assert database.add_user('carol@example.com', 'secret123', 'Carol', 'student')
+    with database.get_db_connection() as conn:
+        user_id = conn.execute("SELECT user_id FROM users WHERE email = 'carol@example.com'").fetchone()[0]
+    return fee_repository.add_fee(user_id, 1, amount_due)
+
+def _fee_row(fee_id):
+    with database.get_db_connection() as conn:
+        fee = conn.execute('SELECT amount_paid, fee_status FROM fees WHERE fee_id = ?', (fee_id,)).fetchone()
+        ledger = conn.execute('SELECT COUNT(*), SUM(amount) FROM fee_payments WHERE fee_id = ?',
+                              (fee_id,)).fetchone()
+    return fee['amount_paid'], fee['fee_status'], ledger[0], ledger[1]
+
+def test_concurrent_payments_all_land(db):
+    fee_id = _fee()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        payments = list(pool.map(lambda _: fee_repository.record_payment(fee_id, 25), range(40)))
+
+    assert all(payment and payment['fee_id'] == fee_id for payment in payments)
+    assert len({payment['transaction_id'] for payment in payments}) == 40
+    assert _fee_row(fee_id) == (1000, 'Paid', 40, 1000)
+
+def test_repeated_idempotency_key_pays_once(db):
+    fee_id = _fee()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        payments = list(pool.map(
+            lambda _: fee_repository.record_payment(fee_id, 300, idempotency_key='checkout-1'), range(8)))
+
+    assert len({payment['payment_id'] for payment in payments}) == 1
+    assert _fee_row(fee_id) == (300, 'Partial', 1, 300)
+
+    # A new key is a new payment; the old key still returns the first one
+    assert fee_repository.record_payment(fee_id, 200, idempotency_key='checkout-2')['amount'] == 200
+    assert fee_repository.record_payment(fee_id, 999, idempotency_key='checkout-1') == payments[0]
+    assert _fee_row(fee_id) == (500, 'Partial', 2, 500)
+
+def test_payment_validation(db):
+    fee_id = _fee()
+    assert fee_repository.record_payment(fee_id + 1, 100) is None
+    for amount in (0, -5, None):
+        with pytest.raises(ValueError):
+            fee_repository.record_payment(fee_id, amount)
+    assert _fee_row(fee_id) == (0, 'Pending', 0, None)
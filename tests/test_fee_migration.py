@@ -0,0 +1,66 @@
+import sqlite3
+
+from modules import database, fee_repository
+
+# modules/fees.py before the fee repository existed
+LEGACY_FEES_SQL = """
+    CREATE TABLE fees (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        semester INTEGER,
+        total_amount REAL,
+        paid_amount REAL DEFAULT 0,
+        status TEXT DEFAULT 'Pending',
+        due_date DATE,
+        paid_date DATE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY(user_id) REFERENCES users(user_id)
+    )
+"""
+
+def test_legacy_fees_table_is_migrated(tmp_path, monkeypatch):
+    path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(path)
+    conn.execute(LEGACY_FEES_SQL)
+    conn.executemany('''
+        INSERT INTO fees (user_id, semester, total_amount, paid_amount, status, due_date, paid_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(1, 1, 1000, 1000, 'Paid', '2024-01-01', '2024-01-05'),
+          # Two rows for one semester were allowed; they become one fee
+          (1, 2, 500, 0, 'Pending', '2024-06-01', None),
+          (1, 2, 500, 200, 'Partial', '2024-07-01', '2024-06-20'),
+          (2, 1, 800, 0, 'Overdue', '2023-01-01', None),
+          (2, None, 100, 0, 'Pending', None, None)])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, 'DATABASE_PATH', path)
+    database.init_database()
+    assert database.add_user('dave@example.com', 'secret123', 'Dave', 'student')
+    assert database.add_user('erin@example.com', 'secret123', 'Erin', 'student')
+
+    with database.get_db_connection() as conn:
+        fees = {(row['user_id'], row['semester']): tuple(row) for row in conn.execute('''
+            SELECT user_id, semester, amount_due, amount_paid, fee_status, due_date FROM fees
+        ''')}
+        assert fees == {
+            (1, 1): (1, 1, 1000, 1000, 'Paid', '2024-01-01'),
+            (1, 2): (1, 2, 1000, 200, 'Partial', '2024-06-01'),
+            (2, 1): (2, 1, 800, 0, 'Overdue', '2023-01-01'),
+            (2, 0): (2, 0, 100, 0, 'Pending', None),
+        }
+        assert conn.execute('SELECT COUNT(*) FROM fees_legacy_backup').fetchone()[0] == 5
+        assert {tuple(row) for row in conn.execute('SELECT user_id, total_due, total_paid FROM fee_totals')} == {
+            (1, 2000, 1200), (2, 900, 0)}
+        # Old column names still read through the compatibility view
+        assert conn.execute('SELECT total_amount, paid_amount, status FROM fees_v1 WHERE user_id = 1 '
+                            'AND semester = 2').fetchone()[:] == (1000, 200, 'Partial')
+        fee_id = conn.execute('SELECT fee_id FROM fees WHERE user_id = 1 AND semester = 2').fetchone()[0]
+
+        # A second run finds the current shape and leaves it alone
+        conn.isolation_level = None
+        assert not fee_repository._migrate_legacy_fees(conn)
+
+    payment = fee_repository.record_payment(fee_id, 800)
+    assert payment['user_id'] == 1
+    assert fee_repository.get_fee_summary(1)['total_paid'] == 2000
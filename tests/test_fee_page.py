@@ -0,0 +1,27 @@
+from streamlit.testing.v1 import AppTest
+
+from modules import database, fee_repository
+
+def _fee_page(user_id, admin):
+    from modules.fees import show_fee_management
+    show_fee_management(user_id, admin=admin)
+
+def _student_with_fee():
+    assert database.add_user('student@example.com', 'secret123', 'Student', 'student')
+    with database.get_db_connection() as conn:
+        user_id = conn.execute("SELECT user_id FROM users WHERE email = 'student@example.com'").fetchone()[0]
+    fee_repository.add_fee(user_id, 1, 1000)
+    return user_id
+
+def test_students_cannot_record_payments(db):
+    user_id = _student_with_fee()
+    page = AppTest.from_function(_fee_page, args=(user_id, False)).run()
+    assert not page.exception
+    assert not [b for b in page.button if b.label == 'Make Payment']
+    assert not page.number_input
+
+def test_admins_can_record_payments(db):
+    user_id = _student_with_fee()
+    page = AppTest.from_function(_fee_page, args=(user_id, True)).run()
+    assert not page.exception
+    assert [b for b in page.button if b.label == 'Make Payment']
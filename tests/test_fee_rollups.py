@@ -0,0 +1,58 @@
+from modules import database, fee_repository
+
+def _student(email, roll_number, department):
+    assert database.add_user(email, 'secret123', email.split('@')[0], 'student')
+    with database.get_db_connection() as conn:
+        user_id = conn.execute('SELECT user_id FROM users WHERE email = ?', (email,)).fetchone()[0]
+        conn.execute('INSERT INTO student_profiles (user_id, roll_number, department, semester) VALUES (?, ?, ?, 1)',
+                     (user_id, roll_number, department))
+        conn.commit()
+    return user_id
+
+def _monthly():
+    with database.get_db_connection() as conn:
+        return {(month, department): round(amount, 2) for month, department, amount in conn.execute(
+            'SELECT month, department, amount_collected FROM fee_collections_monthly')
+            if round(amount, 2) != 0}
+
+def _assert_matches_rebuild():
+    incremental = _monthly()
+    fee_repository.rebuild_fee_rollups()
+    assert incremental == _monthly()
+    assert all(amount > 0 for amount in incremental.values())
+    return incremental
+
+def test_incremental_monthly_collections_match_rebuild(db):
+    alice = _student('alice@example.com', '22CSE000001', 'CSE')
+    bob = _student('bob@example.com', '22ECE000001', 'ECE')
+    fee_repository.ensure_schema()
+    with database.get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO fees (user_id, semester, amount_due, amount_paid, fee_status, paid_date, created_at)
+            VALUES (?, 1, 1000, 500, 'Partial', '2026-01-15', '2026-01-01'),
+                   (?, 1, 1000, 0, 'Pending', NULL, '2026-02-01')
+        """, (alice, bob))
+        conn.commit()
+        alice_fee, bob_fee = (row[0] for row in conn.execute('SELECT fee_id FROM fees ORDER BY user_id'))
+    assert _assert_matches_rebuild() == {('2026-01', 'CSE'): 500}
+
+    # A payment lands in the month it is made; the January booking stays put
+    fee_repository.record_payment(bob_fee, 400)
+    collections = _assert_matches_rebuild()
+    assert collections[('2026-01', 'CSE')] == 500
+    assert sum(collections.values()) == 900
+
+    # Corrections through the upsert only book the difference, whichever way it goes
+    assert database.update_fee_record(alice, 1, 1000, 800)
+    assert database.update_fee_record(alice, 1, 1000, 700)
+    collections = _assert_matches_rebuild()
+    assert collections[('2026-01', 'CSE')] == 500
+    assert sum(amount for (_, department), amount in collections.items() if department == 'CSE') == 700
+
+    # Deleting a fee takes back every month it was booked to, and nothing else
+    with database.get_db_connection() as conn:
+        conn.execute('DELETE FROM fees WHERE fee_id = ?', (alice_fee,))
+        conn.commit()
+    collections = _assert_matches_rebuild()
+    assert all(department == 'ECE' for _, department in collections)
+    assert sum(collections.values()) == 400
@@ -0,0 +1,64 @@
+from datetime import date
+
+from modules import database, fee_repository, fee_sweeper
+
+def _student(email):
+    assert database.add_user(email, 'secret123', email.split('@')[0], 'student')
+    with database.get_db_connection() as conn:
+        return conn.execute('SELECT user_id FROM users WHERE email = ?', (email,)).fetchone()[0]
+
+def _statuses():
+    with database.get_db_connection() as conn:
+        return dict(conn.execute('SELECT fee_id, fee_status FROM fees').fetchall())
+
+def _reminders(user_id):
+    with database.get_db_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM notifications WHERE user_id = ? AND title = 'Fee overdue'",
+                            (user_id,)).fetchone()[0]
+
+def _sweep(day):
+    return fee_sweeper.sweep_overdue(date.fromisoformat(day))['marked_overdue']
+
+def test_watermarks_flip_each_fee_once(db):
+    fee_sweeper.init_sweeper_tables()
+    frank, grace = _student('frank@example.com'), _student('grace@example.com')
+    january = fee_repository.add_fee(frank, 1, 1000, '2026-01-10')
+    march = fee_repository.add_fee(frank, 2, 1000, '2026-03-10')
+    december = fee_repository.add_fee(frank, 3, 1000, '2026-12-01')
+    paid = fee_repository.add_fee(grace, 1, 500, '2026-01-01')
+    fee_repository.record_payment(paid, 500)
+    fee_repository.record_payment(march, 200)
+
+    assert _sweep('2026-02-01') == 1
+    assert _statuses()[january] == 'Overdue'
+    # Nothing new fell due: the second run flips nothing and sends no second reminder
+    assert _sweep('2026-02-01') == 0
+    assert _reminders(frank) == 1
+
+    # A fee added since the last run that was already past due is caught by the fee_id watermark
+    late = fee_repository.add_fee(grace, 2, 500, '2026-01-20')
+    assert _sweep('2026-02-02') == 1
+    assert _statuses()[late] == 'Overdue'
+
+    # The Partial fee flips once its due date passes; the Paid and future ones never do
+    assert _sweep('2026-04-01') == 1
+    statuses = _statuses()
+    assert (statuses[march], statuses[december], statuses[paid]) == ('Overdue', 'Pending', 'Paid')
+    assert (_reminders(frank), _reminders(grace)) == (2, 1)
+
+def test_backdated_run_does_not_skip_fees(db):
+    fee_sweeper.init_sweeper_tables()
+    heidi = _student('heidi@example.com')
+    assert _sweep('2026-04-01') == 0
+
+    # Added after the April run; the March fee is past due then but not on the backdated date
+    february = fee_repository.add_fee(heidi, 1, 1000, '2026-02-15')
+    march = fee_repository.add_fee(heidi, 2, 1000, '2026-03-15')
+    assert _sweep('2026-03-01') == 1
+    assert _statuses() == {february: 'Overdue', march: 'Pending'}
+
+    # The backdated run moved neither watermark, so the next run still finds the March fee
+    assert _sweep('2026-04-02') == 1
+    assert _statuses()[march] == 'Overdue'
+    assert _sweep('2026-04-03') == 0
+    assert _reminders(heidi) == 2
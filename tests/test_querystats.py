@@ -0,0 +1,22 @@
+from modules import database, querystats
+
+def test_throwaway_cursors_are_recorded(db):
+    querystats.enable()
+    querystats.reset()
+    try:
+        conn = database.get_connection()
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+            conn.execute("UPDATE users SET is_active = 1 WHERE user_id = 1")
+            assert [tuple(row) for row in conn.execute("SELECT ?", (1,)).fetchall()] == [(1,)]
+            # Nothing has been closed or garbage-collected yet
+            stats = {s['sql']: s for s in querystats.top_statements(limit=50)}
+        finally:
+            conn.close()
+    finally:
+        querystats.enable(False)
+
+    assert stats["SELECT COUNT(*) FROM users"]['calls'] == 1
+    assert stats["SELECT COUNT(*) FROM users"]['rows'] == 1
+    assert stats["UPDATE users SET is_active = ? WHERE user_id = ?"]['calls'] == 1
+    assert stats["SELECT ?"]['rows'] == 1
@@ -0,0 +1,74 @@
+import io
+
+from modules import database, fee_repository, reconciliation
+
+STATEMENT = """Txn Date,Ref No,Narration,Roll No,Credit
+2026-03-01,UTR-A,NEFT JUDY,,200
+2026-03-01,UTR-B,NEFT IVAN,,150
+2026-03-02,UTR-C,UPI FEES,22CSE000002,900
+2026-03-02,UTR-D,NEFT FEES 22ECE000003 SEM1,,250
+2026-03-03,UTR-E,UPI FEES,99XYZ000000,400
+2026-03-03,UTR-F,UPI FEES,22CSE000002,"5,000"
+2026-03-04,UTR-C,UPI FEES,22CSE000002,900
+2026-03-04,UTR-G,REVERSAL,22CSE000002,-10
+"""
+
+def _student(email, roll_number):
+    assert database.add_user(email, 'secret123', email.split('@')[0], 'student')
+    with database.get_db_connection() as conn:
+        user_id = conn.execute('SELECT user_id FROM users WHERE email = ?', (email,)).fetchone()[0]
+        conn.execute('INSERT INTO student_profiles (user_id, roll_number, department, semester) VALUES (?, ?, ?, 1)',
+                     (user_id, roll_number, roll_number[2:5]))
+        conn.commit()
+    return user_id
+
+def _state():
+    with database.get_db_connection() as conn:
+        fees = dict(conn.execute('SELECT fee_id, amount_paid FROM fees').fetchall())
+        ledger = conn.execute('SELECT COUNT(*) FROM fee_payments').fetchone()[0]
+    return fees, ledger
+
+def _setup():
+    ivan, judy = _student('ivan@example.com', '22CSE000002'), _student('judy@example.com', '22ECE000003')
+    fees = {'ivan1': fee_repository.add_fee(ivan, 1, 1000), 'ivan2': fee_repository.add_fee(ivan, 2, 1000),
+            'judy1': fee_repository.add_fee(judy, 1, 500)}
+    fee_repository.record_payment(fees['judy1'], 200, transaction_id='UTR-A')
+    fee_repository.record_payment(fees['ivan1'], 100, transaction_id='UTR-B')
+    return fees
+
+def _reasons(result):
+    return {e['transaction_id']: e['reason'] for e in result['exceptions']}
+
+def test_dry_run_reports_outcomes_and_writes_nothing(db):
+    _setup()
+    before = _state()
+    result = reconciliation.reconcile_statement(io.StringIO(STATEMENT), apply=False)
+
+    assert (result['lines'], result['matched'], result['confirmed']) == (8, 2, 1)
+    assert (result['applied'], result['applied_amount']) == (0, 0)
+    reasons = _reasons(result)
+    assert reasons['UTR-B'] == 'Already recorded with amount 100.00'
+    assert reasons['UTR-E'] == 'No student with an open fee found'
+    assert reasons['UTR-F'].startswith('No single open fee covers it (2 open')
+    assert reasons['UTR-C'] == 'Duplicate transaction id in statement'
+    assert reasons['UTR-G'] == 'Not a credit'
+    assert [e['row'] for e in result['exceptions']] == [3, 6, 7, 8, 9]
+    assert _state() == before
+
+def test_apply_records_matches_and_rerun_confirms_them(db):
+    fees = _setup()
+    result = reconciliation.reconcile_statement(io.StringIO(STATEMENT))
+    assert (result['matched'], result['applied'], result['applied_amount']) == (2, 2, 1150)
+
+    paid, ledger = _state()
+    # The roll number column picks Ivan's fee that 900 settles; the narration token finds Judy
+    assert paid == {fees['ivan1']: 1000, fees['ivan2']: 0, fees['judy1']: 450}
+    assert ledger == 4
+    with database.get_db_connection() as conn:
+        assert conn.execute("SELECT fee_id, method FROM fee_payments WHERE idempotency_key = 'statement:UTR-C'"
+                            ).fetchone()[:] == (fees['ivan1'], 'Bank')
+
+    # Uploading the same statement again applies nothing new
+    again = reconciliation.reconcile_statement(io.StringIO(STATEMENT))
+    assert (again['matched'], again['confirmed']) == (0, 3)
+    assert _state() == (paid, ledger)
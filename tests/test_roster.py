@@ -0,0 +1,51 @@
+import io
+
+from modules import database, roster
+
+ROSTER = """email,full_name,roll_number,department,semester,password
+liam@example.com,Liam,22CSE000101,CSE,1,firstpass1
+LIAM@example.com,Liam Again,22CSE000102,CSE,1,
+mia@example.com,Mia,22CSE000101,CSE,1,
+Kate@Example.com,Kate,22CSE000103,CSE,1,
+nora@example.com,Nora,22CSE000010,CSE,1,
+omar@example.com,Omar,22CSE000104,,1,
+pia@example.com,Pia,22ECE000105,ECE,3,
+"""
+
+def test_duplicates_and_registered_rows_are_reported(db):
+    # Already registered: Kate's email and another student's roll number
+    assert database.add_user('kate@example.com', 'secret123', 'Kate', 'student')
+    assert database.add_user('quinn@example.com', 'secret123', 'Quinn', 'student')
+    with database.get_db_connection() as conn:
+        conn.execute("""
+            INSERT INTO student_profiles (user_id, roll_number, department, semester)
+            SELECT user_id, '22CSE000010', 'CSE', 1 FROM users WHERE email = 'quinn@example.com'
+        """)
+        conn.commit()
+
+    result = roster.import_roster(io.StringIO(ROSTER), workers=1)
+
+    assert (result['created'], result['failed']) == (2, 5)
+    assert [(e['row'], e['error']) for e in result['errors']] == [
+        (3, 'Duplicate email in roster'),
+        (4, 'Duplicate roll number in roster'),
+        (5, 'Email already registered'),
+        (6, 'Roll number already exists'),
+        (7, 'Missing department'),
+    ]
+    # Only the row without a password gets a generated one, and both accounts can log in
+    [credential] = result['credentials']
+    assert credential['email'] == 'pia@example.com'
+    assert database.get_user('pia@example.com', credential['password'])['role'] == 'student'
+    assert database.get_user('liam@example.com', 'firstpass1')
+
+    with database.get_db_connection() as conn:
+        profiles = dict(conn.execute('''
+            SELECT u.email, sp.roll_number FROM users u JOIN student_profiles sp ON sp.user_id = u.user_id
+        ''').fetchall())
+    assert profiles == {'quinn@example.com': '22CSE000010', 'liam@example.com': '22CSE000101',
+                        'pia@example.com': '22ECE000105'}
+
+    # Importing the same file again creates nothing
+    again = roster.import_roster(io.StringIO(ROSTER), workers=1)
+    assert again['created'] == 0 and not again['credentials']
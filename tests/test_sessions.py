@@ -0,0 +1,11 @@
+from modules import database, sessions
+
+def test_handoff_code_is_single_use(db):
+    assert database.add_user('student@example.com', 'secret123', 'Student', 'student')
+    token = sessions.create_session(database.get_user('student@example.com', 'secret123'))
+
+    code = sessions.create_handoff(token)
+    assert code and token not in code
+    assert sessions.redeem_handoff(code) == token
+    assert sessions.redeem_handoff(code) is None
+    assert sessions.redeem_handoff('forged') is None
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from modules import database, sla
+from modules.notifications import init_notifications_table
+
+def _user(email, role):
+    assert database.add_user(email, 'secret123', email.split('@')[0], role)
+    with database.get_db_connection() as conn:
+        return conn.execute('SELECT user_id FROM users WHERE email = ?', (email,)).fetchone()[0]
+
+def _ticket(student, priority):
+    assert database.submit_ticket(student, 'Help', 'Please help', 'Academic Query', priority)
+    with database.get_db_connection() as conn:
+        return conn.execute('SELECT MAX(ticket_id) FROM tickets').fetchone()[0]
+
+def _timer(ticket_id):
+    with database.get_db_connection() as conn:
+        return conn.execute('''
+            SELECT k.priority, t.escalation_level, t.due_at IS NULL AS disarmed, t.breached_at IS NOT NULL AS breached
+            FROM sla_timers t JOIN tickets k ON k.ticket_id = t.entity_id
+            WHERE t.entity_type = 'ticket' AND t.entity_id = ?
+        ''', (ticket_id,)).fetchone()[:]
+
+def test_tick_escalates_then_breaches(db):
+    init_notifications_table()
+    sla.init_sla_tables()
+    admin = _user('admin@example.com', 'admin')
+    student = _user('rita@example.com', 'student')
+    start = sla._now()
+    waiting = _ticket(student, 'Medium')
+    answered = _ticket(student, 'Low')
+    with database.get_db_connection() as conn:
+        conn.execute("UPDATE tickets SET status = 'Resolved' WHERE ticket_id = ?", (answered,))
+        conn.commit()
+
+    scheduler = sla.SlaScheduler()
+    assert scheduler.tick(start + timedelta(hours=1)) == 0
+    assert len(scheduler) == 1  # the resolved ticket's timer was cancelled
+
+    # Medium waits 24 hours, then it is bumped to High with a fresh 8 hour SLA
+    escalated = start + timedelta(hours=25)
+    assert scheduler.tick(escalated) == 1
+    assert _timer(waiting) == ('High', 1, 0, 0)
+    assert scheduler.tick(escalated + timedelta(hours=7)) == 0
+
+    # A lapse at High is a breach: the timer is disarmed and never fires again
+    assert scheduler.tick(escalated + timedelta(hours=9)) == 1
+    assert _timer(waiting) == ('High', 2, 1, 1)
+    assert scheduler.tick(escalated + timedelta(days=30)) == 0
+    assert sla.SlaScheduler().tick(escalated + timedelta(days=30)) == 0
+    assert sla.get_sla_summary()['ticket'] == {'waiting': 1, 'overdue': 0, 'escalated': 1, 'breached': 1}
+
+    with database.get_db_connection() as conn:
+        messages = [row[0] for row in conn.execute(
+            'SELECT message FROM notifications WHERE user_id = ? ORDER BY id', (admin,))]
+    assert messages == ['1 ticket escalated', '1 ticket breached']
@@ -0,0 +1,55 @@
+import pytest
+
+from modules import throttle
+
+def test_attacker_lockout_does_not_block_victim():
+    limiter = throttle.LoginLimiter()
+    now = 1000.0
+    # The attacker burns the email bucket and the failure window from their IP
+    with pytest.raises(throttle.LoginThrottled):
+        for attempt in range(throttle.MAX_FAILURES + 5):
+            limiter.check('203.0.113.9', 'Victim@example.com', now=now + attempt)
+            limiter.record_failure('Victim@example.com', '203.0.113.9', now=now + attempt)
+    with pytest.raises(throttle.LoginThrottled):
+        limiter.check('203.0.113.9', 'victim@example.com', now=now + 20)
+
+    # The victim, on their own IP, still gets through
+    limiter.check('198.51.100.7', 'victim@example.com', now=now + 20)
+
+def test_failures_lock_the_email_for_that_ip():
+    limiter = throttle.LoginLimiter()
+    for attempt in range(throttle.MAX_FAILURES):
+        limiter.record_failure('user@example.com', '203.0.113.9', now=100.0 + attempt)
+    with pytest.raises(throttle.LoginThrottled) as raised:
+        limiter.check('203.0.113.9', 'user@example.com', now=200.0)
+    assert raised.value.scope == 'failures'
+
+def test_many_ips_are_slowed_on_one_account():
+    limiter = throttle.LoginLimiter()
+    now = 1000.0
+    # One attempt each from many addresses: no per-IP limit is reached...
+    delays = [limiter.check(f'203.0.113.{i}', 'victim@example.com', now=now) for i in range(60)]
+    assert delays[:int(throttle.ACCOUNT_BURST)] == [0.0] * int(throttle.ACCOUNT_BURST)
+    # ...but the account as a whole is slowed down, never refused
+    assert delays[-1] == throttle.ACCOUNT_MAX_DELAY
+    # and recovers at its refill rate
+    assert limiter.check('198.51.100.7', 'victim@example.com',
+                         now=now + throttle.ACCOUNT_BURST / throttle.ACCOUNT_RATE + 60) == 0.0
+
+def test_sweep_runs_on_a_timer_and_bounds_both_tables(monkeypatch):
+    monkeypatch.setattr(throttle, 'MAX_KEYS', 10)
+    limiter = throttle.LoginLimiter()
+    sweeps = []
+    sweep = limiter._sweep
+    monkeypatch.setattr(limiter, '_sweep', lambda now: (sweeps.append(now), sweep(now)))
+    for i in range(40):
+        limiter.check(f'203.0.113.{i}', f'user{i}@example.com', now=100.0)
+        limiter.record_failure(f'user{i}@example.com', f'203.0.113.{i}', now=100.0)
+    # Past twice MAX_KEYS a sweep trims back to MAX_KEYS instead of scanning on every call
+    assert len(sweeps) < 10
+    assert len(limiter._buckets) <= 2 * throttle.MAX_KEYS
+    assert len(limiter._failures) <= 2 * throttle.MAX_KEYS
+
+    limiter.check('198.51.100.7', 'late@example.com', now=100.0 + throttle.SWEEP_INTERVAL)
+    assert len(limiter._buckets) <= throttle.MAX_KEYS
+    assert len(limiter._failures) <= throttle.MAX_KEYS
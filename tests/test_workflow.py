@@ -0,0 +1,58 @@
+from modules import database, workflow
+
+# modules/workflow.py before the event log: one appended row per update, assignee as text
+LEGACY_TRACKING_SQL = """
+    CREATE TABLE workflow_tracking (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        request_id INTEGER,
+        ticket_id INTEGER,
+        current_stage TEXT,
+        progress_percentage INTEGER DEFAULT 0,
+        assigned_to TEXT,
+        notes TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def _state():
+    with database.get_db_connection() as conn:
+        return {(row['entity_type'], row['entity_id']): tuple(row)[2:] for row in conn.execute('''
+            SELECT entity_type, entity_id, current_stage, progress_percentage, assigned_to FROM workflow_state
+        ''')}
+
+def test_legacy_tracking_rows_are_replayed_once(db):
+    with database.get_db_connection() as conn:
+        conn.execute(LEGACY_TRACKING_SQL)
+        conn.executemany('''
+            INSERT INTO workflow_tracking (request_id, ticket_id, current_stage, progress_percentage, assigned_to,
+                                           notes, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [(1, None, 'Received', 0, '7', 'assigned', '2025-01-01 09:00:00'),
+              (None, 5, 'Received', 10, '9', None, '2025-01-01 09:30:00'),
+              # Same second as the next row: the id keeps them in order
+              (1, None, 'Under Review', 30, '', None, '2025-01-02 10:00:00'),
+              (1, None, 'In Progress', 50, None, 'started', '2025-01-02 10:00:00'),
+              (None, None, 'Received', 0, None, 'orphan', '2025-01-03 08:00:00')])
+        conn.commit()
+
+    workflow.init_workflow_table()
+    workflow.init_workflow_table()
+
+    # The newest row wins; rows without an assignee keep the last one given
+    assert _state() == {('request', 1): ('In Progress', 50, 7), ('ticket', 5): ('Received', 10, 9)}
+    history = workflow.get_workflow_history(request_id=1)
+    assert [row['stage'] for row in history] == ['In Progress', 'Under Review', 'Received']
+    assert history[0]['created_at'] == '2025-01-02 10:00:00'
+    with database.get_db_connection() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM workflow_events').fetchone()[0] == 4
+
+    # New events go on top of the replayed history
+    assert workflow.update_workflow_stage(request_id=1, stage='Completed', progress=100, notes='done')
+    assert _state()[('request', 1)] == ('Completed', 100, 7)
+    assert workflow.get_stage_counts() == {'Completed': 1, 'Received': 1}
+
+    # A rebuild from the log gives the same state
+    with database.get_db_connection() as conn:
+        workflow.rebuild_workflow_state(conn)
+        conn.commit()
+    assert _state() == {('request', 1): ('Completed', 100, 7), ('ticket', 5): ('Received', 10, 9)}
@@ -0,0 +1,54 @@
+"""
+Train the placement prediction model and fill predicted_placement in bulk
+Usage: python train_placement_model.py                 # train, then score active students
+       python train_placement_model.py --score-only    # rescore with the saved model
+       python train_placement_model.py --db data/bench.db --model data/models/bench.json
+"""
+import argparse
+import os
+import sys
+import time
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the placement model offline and score all active students")
+    parser.add_argument("--db", help="Database file (default: data/erp_system.db)")
+    parser.add_argument("--model", help="Model JSON path (default: data/models/placement_model.json)")
+    parser.add_argument("--l2", type=float, default=1e-2, help="L2 regularisation strength")
+    parser.add_argument("--score-only", action="store_true", help="Skip training and score with the saved model")
+    parser.add_argument("--no-score", action="store_true", help="Train and save without scoring")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.db:
+        # Must be set before modules.database is imported
+        os.environ["ERP_DATABASE_PATH"] = os.path.abspath(args.db)
+
+    from modules import placement_model
+
+    path = args.model or placement_model.MODEL_PATH
+    if args.score_only:
+        model = placement_model.load_model(path)
+        if model is None:
+            print(f"❌ No usable model at {path}")
+            sys.exit(1)
+    else:
+        try:
+            model = placement_model.train_model(path, l2=args.l2)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        holdout = model['holdout']
+        print(f"Trained on {model['samples']} outcomes (holdout of {holdout['samples']}): "
+              f"accuracy {holdout['accuracy']:.3f}, AUC {holdout['auc']}, log-loss {holdout['log_loss']:.3f}")
+        for name, coef in zip(model['features'], model['coefficients']):
+            print(f"  {name:<12} {coef:+.3f}")
+        print(f"✅ Saved model to {path}")
+
+    if not args.no_score:
+        started = time.perf_counter()
+        updated = placement_model.score_active_students(model)
+        print(f"✅ Scored {updated:,} active students in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()